@@ -0,0 +1,282 @@
+"""
+adaptive_sampling.py
+Adaptive choice of new compositions on the Cr–Co–Fe simplex.
+
+Instead of refining the fixed 21-point grid of compositions.txt uniformly,
+every batch goes where the interpolated surfaces need it most. For each
+property (default ΔE_hcp-fcc and γ_ISF_ANNNI) and temperature, the sampled
+points are triangulated as for the ternary plots (ternary_grid.py) and
+every candidate on a `--step` grid is scored by
+  uncertainty  sqrt( Σ w_v (f_v − f)² + Σ w_v σ_v² )
+               spread of the three vertex values around the linear
+               interpolant f (weights w_v) plus the interpolated standard
+               errors σ_v of the vertices (σ_ columns, e.g. Ensemble_all.csv)
+  gradient     |∇f| of the linear interpolant on the candidate's triangle
+Both are normalized to their maximum, mixed as
+(1 − g) · uncertainty + g · gradient (g = --gradient-weight) and the worst
+surface counts. A batch is picked greedily, the score damped by
+min(1, d / spacing) with d the distance to the closest sampled or already
+picked composition, so one batch spreads along the fcc/hcp boundary
+(plot_phase_diagram.py) instead of piling up in one triangle.
+
+Each batch is run through run_sweep.py (all phases, --temps, optionally
+--realizations), extracted with extract_energies_and_lattice.py and the
+surfaces are rebuilt, until the budget of LAMMPS jobs is spent. Proposed
+compositions are appended to <work-dir>/adaptive_compositions.txt
+(compositions.txt format); the new composition folders are picked up by
+the extractor and every plot like the original ones.
+
+Without a table yet (fresh --work-dir) or with fewer than three sampled
+compositions per surface, the first batch is a space-filling design instead:
+greedy farthest points of the candidate grid, starting at the pure elements.
+
+Usage
+-----
+python adaptive_sampling.py --budget 90 --batch 5 --cores 64
+python adaptive_sampling.py --propose-only --batch 8     # just write a batch
+python adaptive_sampling.py --data SFE_all.csv --properties "γ_ISF(mJ/m²)"
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import extract_energies_and_lattice
+import instrument
+import run_sweep
+from ternary_grid import interpolation_weights, simplex_grid, to_cartesian
+
+PROPERTIES = ["ΔE_hcp-fcc(eV/atom)", "γ_ISF_ANNNI"]
+STEP = 0.05                 # candidate grid (multiples of 0.01 keep folder names exact)
+BATCH = 4                   # compositions per batch
+SPACING = 0.1               # distance below which candidates are damped
+GRADIENT_WEIGHT = 0.5
+PROPOSALS_FILE = 'adaptive_compositions.txt'
+
+
+# ---- Data ------------------------------------------------------------------
+def load_table(path):
+    """Compiled table with Cr/Co/Fe fractions and ΔE_hcp-fcc (with σ) added."""
+    df = pd.read_csv(path)
+    df[["Cr", "Co", "Fe"]] = df["composition"].str.extract(
+        r"Cr([\d\.]+)_Co([\d\.]+)_Fe([\d\.]+)").astype(float)
+    if "E_hcp(eV/atom)" in df and "E_fcc(eV/atom)" in df:
+        df["ΔE_hcp-fcc(eV/atom)"] = df["E_hcp(eV/atom)"] - df["E_fcc(eV/atom)"]
+        if "σ_E_hcp(eV/atom)" in df and "σ_E_fcc(eV/atom)" in df:
+            df["σ_ΔE_hcp-fcc(eV/atom)"] = np.hypot(df["σ_E_hcp(eV/atom)"],
+                                                   df["σ_E_fcc(eV/atom)"])
+    return df
+
+
+def surface_points(df, prop, temperature):
+    """(points (n, 3), values, standard errors) of one property at one T."""
+    data = df[(df["T(K)"] == temperature) & df[prop].notna()]
+    sem_col = f"σ_{prop}"
+    sems = (np.nan_to_num(data[sem_col].to_numpy(dtype=float)) if sem_col in data
+            else np.zeros(len(data)))
+    return data[["Cr", "Co", "Fe"]].to_numpy(), data[prop].to_numpy(dtype=float), sems
+
+
+# ---- Scores ----------------------------------------------------------------
+def surface_scores(points, values, sems, step=STEP):
+    """
+    Candidate grid (simplex_grid(step)) with the uncertainty and gradient of
+    the linear interpolant of `values` at every grid point; NaN outside the
+    convex hull of `points`.
+    """
+    w = interpolation_weights(points, step=step, cache_dir='')
+    vertices, weights, inside = w["vertices"], w["weights"], w["inside"]
+    f = values[vertices]                                       # (G, 3)
+    f_hat = np.einsum("gv,gv->g", weights, f)
+    spread = np.einsum("gv,gv->g", weights, (f - f_hat[:, None]) ** 2)
+    noise = np.einsum("gv,gv->g", weights, sems[vertices] ** 2)
+    uncertainty = np.sqrt(spread + noise)
+
+    # Gradient of the plane through the three vertices (plot coordinates)
+    gradient = np.full(len(f), np.nan)
+    xy = np.column_stack(to_cartesian(points))[vertices[inside]]   # (g, 3, 2)
+    A = xy[:, 1:] - xy[:, :1]
+    b = f[inside, 1:] - f[inside, :1]
+    gradient[inside] = np.linalg.norm(np.linalg.solve(A, b[..., None])[..., 0], axis=1)
+
+    uncertainty[~inside] = np.nan
+    return w["grid"], uncertainty, gradient
+
+
+def _normalized(x):
+    """x / max(x), 1 where x is NaN (outside the sampled hull: unknown)."""
+    top = np.nanmax(x) if np.any(np.isfinite(x)) else 0.0
+    out = x / top if top > 0 else np.zeros_like(x)
+    return np.where(np.isfinite(out), out, 1.0)
+
+
+def acquisition(df, properties, temperatures, step=STEP, gradient_weight=GRADIENT_WEIGHT):
+    """
+    (candidates, score, driver): worst-surface score of every candidate and
+    the "property @ T" that produced it.
+    """
+    candidates, scores, drivers = None, [], []
+    for prop in properties:
+        for T in temperatures:
+            points, values, sems = surface_points(df, prop, T)
+            if len(points) < 3:
+                continue
+            candidates, u, g = surface_scores(points, values, sems, step)
+            scores.append((1.0 - gradient_weight) * _normalized(u)
+                          + gradient_weight * _normalized(g))
+            drivers.append(f"{prop} @ {T} K")
+    if not scores:
+        return None, None, None
+    scores = np.array(scores)
+    best = scores.argmax(axis=0)
+    return candidates, scores.max(axis=0), [drivers[i] for i in best]
+
+
+def select_batch(candidates, score, sampled, n, spacing=SPACING):
+    """
+    Greedy batch of up to n candidate indices: highest score, damped by
+    min(1, d / spacing) with d the distance to the sampled and picked points.
+    """
+    xy = np.column_stack(to_cartesian(candidates))
+    d = np.full(len(xy), np.inf)
+    if len(sampled):
+        ref = np.column_stack(to_cartesian(sampled))
+        d = np.sqrt(((xy[:, None, :] - ref[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+    picks = []
+    for _ in range(n):
+        total = score * np.minimum(d / spacing, 1.0)
+        i = int(np.argmax(total))
+        if total[i] <= 0:
+            break
+        picks.append(i)
+        d = np.minimum(d, np.hypot(*(xy - xy[i]).T))
+    return picks
+
+
+def propose(df, properties, temperatures, n, step=STEP, spacing=SPACING,
+            gradient_weight=GRADIENT_WEIGHT, pending=()):
+    """
+    Next batch as [{"composition": (Cr, Co, Fe), "score", "driver"}]. With no
+    table (df None) or no surface to score yet, a space-filling design: every
+    candidate scores 1 and the damping distance spans the whole simplex, so
+    each pick is the candidate farthest from everything sampled.
+    """
+    sampled = np.asarray(pending, dtype=float).reshape(-1, 3)
+    candidates = None
+    if df is not None:
+        sampled = np.vstack([df[["Cr", "Co", "Fe"]].to_numpy().reshape(-1, 3), sampled])
+        candidates, score, drivers = acquisition(df, properties, temperatures, step,
+                                                 gradient_weight)
+    if candidates is None:
+        candidates = simplex_grid(step)
+        score, drivers = np.ones(len(candidates)), ["initial design"] * len(candidates)
+        spacing = 1.0       # side of the simplex in plot coordinates
+    batch = []
+    for i in select_batch(candidates, score, sampled, n, spacing):
+        xCr, xCo = np.round(candidates[i, :2], 2)
+        xFe = max(0.0, round(1.0 - xCr - xCo, 2))
+        batch.append({"composition": (float(xCr), float(xCo), float(xFe)),
+                      "score": float(score[i]), "driver": drivers[i]})
+    return batch
+
+
+def append_proposals(path, batch, number):
+    """Append one batch to a compositions.txt-style file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    new = not os.path.exists(path)
+    with open(path, 'a') as f:
+        if new:
+            f.write("# Cr   Co   Fe   (adaptive_sampling.py)\n")
+        f.write(f"# batch {number}\n")
+        for p in batch:
+            f.write("{:.2f} {:.2f} {:.2f}   # score {:.3f}, {}\n".format(
+                *p["composition"], p["score"], p["driver"]))
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Adaptive composition sampling on the simplex.")
+    p.add_argument("--budget", type=int, default=90, help="LAMMPS jobs to spend")
+    p.add_argument("--batch", type=int, default=BATCH, help="compositions per batch")
+    p.add_argument("--properties", nargs="+", default=PROPERTIES)
+    p.add_argument("--temps", nargs="+", type=int, default=run_sweep.TEMPS)
+    p.add_argument("--step", type=float, default=STEP, help="candidate grid step")
+    p.add_argument("--spacing", type=float, default=SPACING)
+    p.add_argument("--gradient-weight", type=float, default=GRADIENT_WEIGHT,
+                   help="0: uncertainty only, 1: gradient only")
+    p.add_argument("--data", default=None,
+                   help="default: <work-dir>/All_Results_Compiled/Ensemble_all.csv")
+    p.add_argument("--propose-only", action="store_true",
+                   help="write one batch to the proposals file, run nothing")
+    p.add_argument("--realizations", type=int, default=1)
+    p.add_argument("--work-dir", default=run_sweep.RESULTS_DIR)
+    p.add_argument("--cores", type=int, default=None)
+    p.add_argument("--ranks-per-job", type=int, default=4)
+    p.add_argument("--lmp", default="lmp")
+    p.add_argument("--mpirun", default="mpirun", help="'none' to run lmp directly")
+    p.add_argument("--timeout", type=float, default=None)
+    p.add_argument("--cache-dir", default=run_sweep.CACHE_DIR)
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    args = p.parse_args(argv)
+
+    data = args.data or os.path.join(args.work_dir, 'All_Results_Compiled', 'Ensemble_all.csv')
+    proposals_file = os.path.join(args.work_dir, PROPOSALS_FILE)
+    mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+    per_composition = len(run_sweep.PHASES) * len(args.temps) * args.realizations
+
+    # Earlier proposals count as sampled (also those whose runs failed)
+    pending, number = [], 0
+    if os.path.exists(proposals_file):
+        pending = run_sweep.read_compositions(proposals_file)
+        with open(proposals_file, 'r') as f:
+            number = sum(line.startswith("# batch") for line in f)
+    first, remaining, failed = number, args.budget, 0
+    while remaining >= per_composition or args.propose_only:
+        if os.path.exists(data):
+            df = load_table(data)
+        else:
+            df = None
+            print(f"📭 No {data} yet: space-filling initial design")
+        missing = [prop for prop in args.properties if df is not None and prop not in df]
+        for prop in missing:
+            print(f"⚠️ {prop} not in {data}, skipped")
+        n = args.batch if args.propose_only else min(args.batch, remaining // per_composition)
+        batch = propose(df, [q for q in args.properties if q not in missing], args.temps, n,
+                        args.step, args.spacing, args.gradient_weight, pending)
+        if not batch:
+            print("🛑 No candidate left to sample")
+            break
+        number += 1
+        append_proposals(proposals_file, batch, number)
+        print(f"🎯 Batch {number}:")
+        for b in batch:
+            print("   Cr{:.2f} Co{:.2f} Fe{:.2f}  score {:.3f}  ({})".format(
+                *b["composition"], b["score"], b["driver"]))
+        if args.propose_only:
+            break
+
+        comps = [b["composition"] for b in batch]
+        pending += comps
+        jobs = run_sweep.build_jobs(comps, temperatures=args.temps,
+                                    realizations=args.realizations)
+        run_sweep.stage_inputs(args.work_dir)
+        with instrument.stage("adaptive", report=args.report, batch=number, jobs=len(jobs)):
+            results = run_sweep.run_jobs(jobs, args.work_dir, args.cores, args.ranks_per_job,
+                                         args.lmp, mpirun, args.timeout,
+                                         None if args.no_cache else args.cache_dir,
+                                         report=args.report)
+        failed += sum(r["status"] not in ("ok", "cached") for r in results)
+        remaining -= len(jobs)
+        extract_energies_and_lattice.main(["--results-dir", args.work_dir,
+                                           "--report", args.report])
+
+    print(f"\n✨ {number - first} batches, {args.budget - remaining} jobs "
+          f"({failed} failed); proposals in: {proposals_file}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
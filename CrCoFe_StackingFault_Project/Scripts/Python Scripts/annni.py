@@ -0,0 +1,178 @@
+"""
+annni.py
+Vectorized ANNNI (axial next-nearest-neighbour Ising) model for the
+Cr–Co–Fe stacking-fault energies.
+
+Every function works element-wise on scalars, NumPy arrays or pandas
+Series, so a whole SFE_all.csv / Lattice_all.csv (or a dense interpolated
+composition grid) is evaluated in one call instead of row by row.
+
+    J = annni_gamma(Efcc, Ehcp, Edhcp, a)        # arrays in, arrays out
+    res = annni_table(sfe, lat)                  # every composition and T
+    res, scales = calibrate(res)                 # per-fault LS scale vs DMLF
+
+Standard errors of the energies and of a (σ_ columns, e.g. from an ensemble
+run, see ensemble.py) are propagated to σ_γ_<fault>_ANNNI.
+"""
+
+import numpy as np
+
+EV_PER_A2_TO_MJ_PER_M2 = 16021.766
+FAULTS = ("ISF", "ESF", "Twin")
+# Layer correlations <s_i s_i+n>, n = 1..3, of the Hägg spins of each polytype:
+#   E_p = J0 - J1 c1 - J2 c2 - J3 c3
+POLYTYPES = {"fcc": (1.0, 1.0, 1.0),                  # 3C  +++
+             "hcp": (-1.0, 1.0, -1.0),                # 2H  +-
+             "dhcp": (0.0, -1.0, 0.0),                # 4H  ++--
+             "6H": (1.0 / 3.0, -1.0 / 3.0, -1.0)}     # 6H  +++---
+
+
+# ---- Model -----------------------------------------------------------------
+def annni_from_bulk(Efcc, Ehcp, Edhcp):
+    """
+    ANNNI (J1, J2) from bulk energies (per atom):
+      E_fcc  = J0 - J1 - J2
+      E_hcp  = J0 + J1 - J2
+      E_dhcp = J0 + J2
+    => J1 = 0.5*(E_hcp - E_fcc)
+       J2 = 0.5*(E_dhcp - 0.5*(E_fcc + E_hcp))
+    """
+    J1 = 0.5 * (Ehcp - Efcc)
+    J2 = 0.5 * (Edhcp - 0.5 * (Efcc + Ehcp))
+    return J1, J2
+
+
+def numerators_from_J(J1, J2, J3=0.0):
+    """
+    Fault-energy numerators (eV per {111} site):
+      γ_ISF  ∝ 4(J1 + J2 + J3)
+      γ_ESF  ∝ 4J1 + 8J2 + 8J3
+      γ_Twin ∝ 2J1 + 4J2 + 6J3
+    (J3 = 0: the two-parameter model of annni_from_bulk)
+    """
+    gI_num = 4.0 * (J1 + J2 + J3)
+    gE_num = 4.0 * J1 + 8.0 * J2 + 8.0 * J3
+    gT_num = 2.0 * J1 + 4.0 * J2 + 6.0 * J3
+    return gI_num, gE_num, gT_num
+
+
+def site_area(a_angstrom):
+    """Area of one {111} site: (sqrt(3)/4) * a^2 [Å²]."""
+    return (np.sqrt(3.0) / 4.0) * (a_angstrom ** 2)
+
+
+def to_mJ_per_m2(numerator_eV_per_site, a_angstrom):
+    """
+    Convert numerator (eV per {111} site) → γ (mJ/m²):
+      A = (sqrt(3)/4) * a^2      [Å² per {111} site]
+      1 eV/Å² = 16021.766 mJ/m²
+    """
+    return (numerator_eV_per_site / site_area(a_angstrom)) * EV_PER_A2_TO_MJ_PER_M2
+
+
+def annni_gamma(Efcc, Ehcp, Edhcp, a_angstrom):
+    """J1, J2 and γ_ISF/ESF/Twin (mJ/m²) for arrays of bulk energies and a_fcc."""
+    J1, J2 = annni_from_bulk(Efcc, Ehcp, Edhcp)
+    nums = numerators_from_J(J1, J2)
+    out = {"J1": J1, "J2": J2}
+    for fault, num in zip(FAULTS, nums):
+        out[f"γ_{fault}"] = to_mJ_per_m2(num, a_angstrom)
+    return out
+
+
+def annni_gamma_sem(Efcc, Ehcp, Edhcp, a_angstrom, sEfcc, sEhcp, sEdhcp, sa=0.0):
+    """
+    First-order standard errors of γ_ISF/ESF/Twin (mJ/m²) for independent
+    errors of the three energies and of a. The numerators are linear in the
+    energies (coefficients from numerators_from_J(annni_from_bulk(...)) of
+    unit energies); the site area adds a relative 2 σ_a / a.
+    """
+    coeffs = np.array([numerators_from_J(*annni_from_bulk(*unit)) for unit in np.eye(3)])
+    g = annni_gamma(Efcc, Ehcp, Edhcp, a_angstrom)
+    out = {}
+    for i, fault in enumerate(FAULTS):
+        c_fcc, c_hcp, c_dhcp = coeffs[:, i]
+        s_num = np.sqrt((c_fcc * sEfcc) ** 2 + (c_hcp * sEhcp) ** 2 + (c_dhcp * sEdhcp) ** 2)
+        out[f"σ_γ_{fault}"] = np.hypot(to_mJ_per_m2(s_num, a_angstrom),
+                                       2.0 * g[f"γ_{fault}"] * sa / a_angstrom)
+    return out
+
+
+# ---- Calibration -----------------------------------------------------------
+def ls_scale(y_target, x_model, axis=None):
+    """
+    Least-squares scalar s minimizing || y - s x ||² (ignore x<=0).
+    With `axis`, one scale per slice along that axis (e.g. per fault type).
+    """
+    x = np.asarray(x_model, dtype=float)
+    y = np.asarray(y_target, dtype=float)
+    m = x > 0
+    num = np.where(m, x * y, 0.0).sum(axis=axis)
+    den = np.where(m, x * x, 0.0).sum(axis=axis)
+    s = num / den
+    return float(s) if np.ndim(s) == 0 else s
+
+
+# ---- Tables ----------------------------------------------------------------
+def cell_lattice_parameter(a_fcc, replicas=10):
+    """
+    Per-cell fcc a (Å). Lattice_all.csv from extract_energies_and_lattice.py
+    is already per cell; older files hold the 10×10×10 supercell length
+    instead (~36 Å), which is divided by `replicas`.
+    """
+    a_fcc = np.asarray(a_fcc, dtype=float)
+    return np.where(a_fcc > 10.0, a_fcc / replicas, a_fcc)
+
+
+def annni_table(sfe, lat):
+    """
+    ANNNI J1, J2 and γ for every (composition, T) row of SFE_all.csv merged
+    with a_fcc(T) from Lattice_all.csv; DMLF γ columns are carried along.
+    With σ_E_<phase>(eV/atom) columns in `sfe` (Ensemble_all.csv) the errors
+    σ_γ_<fault>_ANNNI are added, including σ_a_fcc(Å) when `lat` has it.
+    """
+    import pandas as pd  # only needed here; keeps the log parsers free of pandas
+
+    lat_cols = [c for c in ("composition", "T(K)", "a_fcc(Å)", "σ_a_fcc(Å)") if c in lat]
+    # a_fcc always comes from `lat`, also when `sfe` (Ensemble_all.csv) has one
+    df = sfe.drop(columns=["a_fcc(Å)", "σ_a_fcc(Å)"], errors="ignore").merge(
+        lat[lat_cols], on=["composition", "T(K)"], how="left")
+    a = cell_lattice_parameter(df["a_fcc(Å)"].to_numpy())
+    energies = [df[f"E_{p}(eV/atom)"].to_numpy() for p in ("fcc", "hcp", "dhcp")]
+    g = annni_gamma(*energies, a)
+
+    res = pd.DataFrame({"composition": df["composition"], "T(K)": df["T(K)"].astype(int),
+                        "a(Å)": a, "J1(eV)": g["J1"], "J2(eV)": g["J2"]})
+    for k in FAULTS:
+        res[f"γ_{k}_ANNNI"] = g[f"γ_{k}"]
+        dmlf = f"γ_{k}(mJ/m²)"
+        if dmlf in df:
+            res[f"γ_{k}_DMLF"] = df[dmlf].to_numpy()
+
+    sem_cols = [f"σ_E_{p}(eV/atom)" for p in ("fcc", "hcp", "dhcp")]
+    if all(c in df for c in sem_cols):
+        # A single member has no ensemble error (NaN): leave it without one
+        sa = df["σ_a_fcc(Å)"].fillna(0.0).to_numpy() if "σ_a_fcc(Å)" in df else 0.0
+        s = annni_gamma_sem(*energies, a, *(df[c].to_numpy() for c in sem_cols), sa)
+        for k in FAULTS:
+            res[f"σ_γ_{k}_ANNNI"] = s[f"σ_γ_{k}"]
+    return res
+
+
+def calibrate(res):
+    """
+    Per-fault calibration factors (constant scale per fault type) fitted on
+    `res`, then scaled DMLF columns and % errors of ANNNI vs scaled DMLF.
+    Returns (res with new columns, {fault: scale}).
+    """
+    res = res.copy()
+    annni = np.stack([res[f"γ_{k}_ANNNI"].to_numpy() for k in FAULTS])
+    dmlf = np.stack([res[f"γ_{k}_DMLF"].to_numpy() for k in FAULTS])
+    scales = ls_scale(annni, dmlf, axis=1)
+
+    for k, s in zip(FAULTS, scales):
+        res[f"γ_{k}_DMLF_scaled"] = s * res[f"γ_{k}_DMLF"]
+        res[f"%Error_vs_scaled_{k}"] = 100.0 * (
+            (res[f"γ_{k}_ANNNI"] - res[f"γ_{k}_DMLF_scaled"]) / res[f"γ_{k}_DMLF_scaled"]
+        )
+    return res, dict(zip(FAULTS, (float(s) for s in scales)))
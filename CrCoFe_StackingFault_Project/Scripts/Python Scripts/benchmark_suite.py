@@ -0,0 +1,430 @@
+"""
+benchmark_suite.py
+Automated benchmark of the MEAM potential for the pure elements, generalizing
+Benchmarking/in.benchmark_Cr/Co/Fe (single box/relax runs compared by eye).
+
+For every element and phase of PHASES (the reference phase and fcc) the
+suite builds an orthogonal cell and runs, on the persistent LAMMPS pool
+(lammps_pool.py; one process per job without the Python module):
+  1. relax        box/relax to zero pressure: a (and c), E_coh = −E/atom
+  2. eos          E(V) at EOS_POINTS lattice scalings of ±EOS_RANGE
+     elastic      stress of ±ELASTIC_STRAIN along the six Voigt strains
+                  (atoms relaxed): C_ij = −Δp_i / Δε_j
+     vacancy      one atom removed, atoms relaxed at fixed volume:
+                  E_vac = E(N−1) − (N−1)/N E(N)
+  3. throughput   THROUGHPUT_STEPS NVE steps on a larger cell, one job at
+                  a time: MEAM atom-steps/s from the loop time
+The E(V) scans of all elements and phases are fitted together with the
+third-order Birch–Murnaghan equation (a cubic in V^(-2/3), one batched
+least-squares solve) for V0, B0 and B0'.
+
+The results are checked against Benchmarking/benchmark_reference.csv
+(reference value and relative tolerance per element, phase and property).
+The reference values are those of the current potential, so the check is a
+regression gate; the experimental / in.benchmark_* target values in its
+experiment column are only reported next to them (Fe E_vac, for one, is
+1.79 eV in experiment and 2.92 eV with this potential). After a deliberate
+change of the potential, the reference column is refreshed from the new
+benchmark_results.csv.
+Every throughput measurement is appended to
+Benchmarking/throughput_history.csv with a hash of library.meam +
+CrCoFe.meam, and a drop of more than THROUGHPUT_TOL against the last
+measurement of a different potential revision is reported.
+
+Usage
+-----
+python benchmark_suite.py --workers 8
+python benchmark_suite.py --elements Fe --phases bcc --no-throughput
+python benchmark_suite.py --backend subprocess --lmp lmp_mpi
+
+Output
+------
+- Benchmarking/benchmark_results.csv    (value, reference, error, PASS/FAIL,
+                                        deviation from experiment)
+- Benchmarking/throughput_history.csv   (appended)
+- Results/benchmark/                    (structures and job logs)
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import time
+
+import numpy as np
+
+import instrument
+import lammps_pool
+import run_sweep
+from supercell import ELEMENTS, write_lammps_data
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_DIR = os.path.join(run_sweep.PROJECT_DIR, 'Benchmarking')
+REFERENCE_FILE = os.path.join(BENCHMARK_DIR, 'benchmark_reference.csv')
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, 'benchmark_results.csv')
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, 'throughput_history.csv')
+WORK_DIR = os.path.join(run_sweep.RESULTS_DIR, 'benchmark')
+
+# Starting lattice parameters (a, c) of in.benchmark_* (fcc: same volume as bcc)
+PHASES = {"Cr": {"bcc": (2.885, None), "fcc": (3.63, None)},
+          "Co": {"hcp": (2.503, 4.057), "fcc": (3.54, None)},
+          "Fe": {"bcc": (2.867, None), "fcc": (3.61, None)}}
+# Orthogonal cells: lengths in units of (a, a, a) or (a, √3 a, c), fractional basis
+CELLS = {"bcc": [(0, 0, 0), (0.5, 0.5, 0.5)],
+         "fcc": [(0, 0, 0), (0.5, 0.5, 0), (0.5, 0, 0.5), (0, 0.5, 0.5)],
+         "hcp": [(0, 0, 0), (0.5, 0.5, 0), (0.5, 5 / 6, 0.5), (0, 1 / 3, 0.5)]}
+SIZES = {"bcc": (5, 5, 5), "fcc": (4, 4, 4), "hcp": (5, 3, 3)}
+THROUGHPUT_SIZES = {"bcc": (10, 10, 10), "fcc": (8, 8, 8), "hcp": (10, 6, 6)}
+
+EOS_POINTS = 9
+EOS_RANGE = 0.03            # ± relative change of the lattice parameters
+ELASTIC_STRAIN = 0.005
+THROUGHPUT_STEPS = 200
+THROUGHPUT_TOL = 0.2        # relative throughput drop reported as a regression
+EV_PER_A3_TO_GPA = 160.21766
+BAR_TO_GPA = 1.0e-4
+MINIMIZE = "minimize        0.0 1.0e-8 1000 10000"
+# Voigt order: strain component, box change for +δ, pressure component
+VOIGT = [("xx", "x scale {s}", "pxx"), ("yy", "y scale {s}", "pyy"),
+         ("zz", "z scale {s}", "pzz"), ("yz", "yz final $({d}*lz)", "pyz"),
+         ("xz", "xz final $({d}*lz)", "pxz"), ("xy", "xy final $({d}*ly)", "pxy")]
+
+
+# ---- Structures ------------------------------------------------------------
+def lattice_cell(phase, a, c=None, size=(1, 1, 1)):
+    """Positions and box of an orthogonal bcc/fcc/hcp cell replicated `size` times."""
+    if phase == "hcp":
+        lengths = np.array([a, np.sqrt(3.0) * a, c or a * np.sqrt(8.0 / 3.0)])
+    else:
+        lengths = np.array([a, a, a])
+    basis = np.array(CELLS[phase])
+    n = np.array(size)
+    shifts = np.stack(np.meshgrid(*(np.arange(k) for k in n), indexing="ij"), -1).reshape(-1, 3)
+    frac = (shifts[:, None, :] + basis[None, :, :]).reshape(-1, 3)
+    box = dict(zip(("lx", "ly", "lz"), lengths * n))
+    return frac * lengths, box
+
+
+def write_cell(path, element, phase, a, c=None, size=(1, 1, 1)):
+    positions, box = lattice_cell(phase, a, c, size)
+    types = np.full(len(positions), ELEMENTS.index(element) + 1)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_lammps_data(path, positions, types, box,
+                      f"{element} {phase} {size[0]}x{size[1]}x{size[2]} a={a:.6f}")
+    return path
+
+
+def potential_hash(potentials_dir=run_sweep.POTENTIALS_DIR):
+    """Short hash of library.meam + CrCoFe.meam (the potential revision)."""
+    h = hashlib.sha1()
+    for name in ('library.meam', 'CrCoFe.meam'):
+        with open(os.path.join(potentials_dir, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+# ---- Jobs ------------------------------------------------------------------
+def relax_job(work_dir, element, phase):
+    a, c = PHASES[element][phase]
+    size = SIZES[phase]
+    name = f"{element}_{phase}"
+    data = write_cell(os.path.join(work_dir, "structures", f"{name}.data"),
+                      element, phase, a, c, size)
+    relaxed = os.path.abspath(os.path.join(work_dir, "structures", f"{name}_relaxed.data"))
+    box = ("box/relax x 0.0 y 0.0 z 0.0 couple xy" if phase == "hcp"
+           else "box/relax iso 0.0")
+    results = {"E(eV)": "pe", "atoms": "atoms", "a(Å)": f"lx/{size[0]}"}
+    if phase == "hcp":
+        results["c(Å)"] = f"lz/{size[2]}"
+    return {"name": f"{name}/relax", "data": os.path.abspath(data),
+            "commands": [f"fix             bench_relax all {box}",
+                         "minimize        1.0e-15 1.0e-15 5000 10000",
+                         f'write_data      "{relaxed}"'],
+            "results": results, "relaxed": relaxed}
+
+
+def property_jobs(element, phase, relaxed):
+    """E(V), strain and vacancy jobs on the relaxed cell."""
+    name = f"{element}_{phase}"
+    jobs = []
+    for i, s in enumerate(np.linspace(1 - EOS_RANGE, 1 + EOS_RANGE, EOS_POINTS).tolist()):
+        jobs.append({"name": f"{name}/eos_{i}", "data": relaxed,
+                     "commands": [f"change_box      all x scale {s!r} y scale {s!r} "
+                                  f"z scale {s!r} remap", MINIMIZE],
+                     "results": {"E/atom(eV)": "pe/atoms", "V/atom(Å³)": "vol/atoms"}})
+    for comp, change, _ in VOIGT:
+        for sign, d in (("+", ELASTIC_STRAIN), ("-", -ELASTIC_STRAIN)):
+            jobs.append({"name": f"{name}/strain_{comp}{sign}", "data": relaxed,
+                         "commands": [f"change_box      all {change.format(s=repr(1 + d), d=d)}"
+                                      " remap", MINIMIZE],
+                         "results": {p: p for _, _, p in VOIGT}})
+    jobs.append({"name": f"{name}/vacancy", "data": relaxed,
+                 "commands": ["group           bench_vac id 1",
+                              "delete_atoms    group bench_vac compress no", MINIMIZE],
+                 "results": {"E(eV)": "pe", "atoms": "atoms"}})
+    return jobs
+
+
+def throughput_job(work_dir, element, phase, a, c=None):
+    size = THROUGHPUT_SIZES[phase]
+    path = write_cell(os.path.join(work_dir, "structures", f"{element}_{phase}_md.data"),
+                      element, phase, a, c, size)
+    return {"name": f"{element}_{phase}/throughput", "data": os.path.abspath(path),
+            "commands": ["velocity        all create 300.0 12345 mom yes rot yes",
+                         "fix             bench_nve all nve",
+                         "timestep        0.001",
+                         f"run             {THROUGHPUT_STEPS}"],
+            "results": {"atoms": "atoms"}}
+
+
+# ---- Analysis --------------------------------------------------------------
+def birch_murnaghan_fit(V, E):
+    """
+    Third-order Birch–Murnaghan fit of every row of V, E ((S, n) arrays).
+    E is a cubic in x = V^(-2/3); it is fitted in t = x / mean(x) − 1 for all
+    rows with one batched QR solve. Returns arrays E0, V0, B0 (eV/Å³), B0'.
+    """
+    V, E = np.atleast_2d(np.asarray(V, dtype=float)), np.atleast_2d(np.asarray(E, dtype=float))
+    x = V ** (-2.0 / 3.0)
+    xm = x.mean(axis=1)
+    t = x / xm[:, None] - 1.0
+    A = np.stack([t ** k for k in range(4)], axis=-1)                  # (S, n, 4)
+    Q, R = np.linalg.qr(A)
+    q = np.linalg.solve(R, np.einsum("snk,sn->sk", Q, E)[..., None])[..., 0]
+    q0, q1, q2, q3 = q.T
+    # Minimum: root of dE/dt with positive curvature (cancellation-free form)
+    t0 = -q1 / (q2 + np.sqrt(q2 ** 2 - 3.0 * q1 * q3))
+    E0 = q0 + q1 * t0 + q2 * t0 ** 2 + q3 * t0 ** 3
+    V0 = (xm * (1.0 + t0)) ** -1.5
+    Exx = (2.0 * q2 + 6.0 * q3 * t0) / xm ** 2
+    Exxx = 6.0 * q3 / xm ** 3
+    dx = -2.0 / 3.0 * V0 ** (-5.0 / 3.0)
+    ddx = 10.0 / 9.0 * V0 ** (-8.0 / 3.0)
+    E2 = Exx * dx ** 2
+    E3 = Exxx * dx ** 3 + 3.0 * Exx * dx * ddx
+    return {"E0": E0, "V0": V0, "B0": V0 * E2, "B0'": -1.0 - V0 * E3 / E2}
+
+
+def elastic_matrix(results, name):
+    """6×6 C (GPa) from the ±strain pressures of one element/phase."""
+    C = np.zeros((6, 6))
+    for j, (comp, _, _) in enumerate(VOIGT):
+        plus = results[f"{name}/strain_{comp}+"]
+        minus = results[f"{name}/strain_{comp}-"]
+        for i, (_, _, p) in enumerate(VOIGT):
+            C[i, j] = -(plus[p] - minus[p]) / (2.0 * ELASTIC_STRAIN) * BAR_TO_GPA
+    return 0.5 * (C + C.T)
+
+
+def elastic_constants(C, phase):
+    """Independent constants: cubic (averaged over equivalent axes) or hexagonal."""
+    if phase == "hcp":
+        return {"C11(GPa)": 0.5 * (C[0, 0] + C[1, 1]), "C12(GPa)": C[0, 1],
+                "C13(GPa)": 0.5 * (C[0, 2] + C[1, 2]), "C33(GPa)": C[2, 2],
+                "C44(GPa)": 0.5 * (C[3, 3] + C[4, 4]), "C66(GPa)": C[5, 5]}
+    return {"C11(GPa)": np.mean(np.diag(C)[:3]),
+            "C12(GPa)": np.mean([C[0, 1], C[0, 2], C[1, 2]]),
+            "C44(GPa)": np.mean(np.diag(C)[3:])}
+
+
+def properties(results, pairs):
+    """{(element, phase): {property: value}} from the job results."""
+    out = {}
+    names = [f"{el}_{ph}" for el, ph in pairs]
+    scans = [[results.get(f"{n}/eos_{i}") for i in range(EOS_POINTS)] for n in names]
+    complete = [all(scan) for scan in scans]
+    fit = None
+    if any(complete):
+        V = [[r["V/atom(Å³)"] for r in s] for s, ok in zip(scans, complete) if ok]
+        E = [[r["E/atom(eV)"] for r in s] for s, ok in zip(scans, complete) if ok]
+        fit = birch_murnaghan_fit(V, E)
+    k = 0
+    for (el, ph), name, ok in zip(pairs, names, complete):
+        props = {}
+        relax = results.get(f"{name}/relax")
+        if relax:
+            props["a(Å)"] = relax["a(Å)"]
+            if "c(Å)" in relax:
+                props["c(Å)"] = relax["c(Å)"]
+                props["c/a"] = relax["c(Å)"] / relax["a(Å)"]
+            props["E_coh(eV/atom)"] = -relax["E(eV)"] / relax["atoms"]
+            vac = results.get(f"{name}/vacancy")
+            if vac:
+                n = relax["atoms"]
+                props["E_vac(eV)"] = vac["E(eV)"] - (n - 1) / n * relax["E(eV)"]
+        if ok:
+            props["V0(Å³/atom)"] = float(fit["V0"][k])
+            props["B0(GPa)"] = float(fit["B0"][k] * EV_PER_A3_TO_GPA)
+            props["B0'"] = float(fit["B0'"][k])
+            k += 1
+        if all(f"{name}/strain_{c}{s}" in results for c, _, _ in VOIGT for s in "+-"):
+            props.update({p: float(v) for p, v in
+                          elastic_constants(elastic_matrix(results, name), ph).items()})
+        out[(el, ph)] = props
+    return out
+
+
+def check(props, reference_file=REFERENCE_FILE):
+    """
+    Result rows: every property with its reference, relative error and status,
+    and, where the reference file has one, the experimental value and the
+    relative deviation from it (not part of the status).
+    """
+    refs = {}
+    if os.path.exists(reference_file):
+        with open(reference_file, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                refs[(row["element"], row["phase"], row["property"])] = row
+    rows = []
+    for (el, ph), values in sorted(props.items()):
+        for prop, value in values.items():
+            row = {"element": el, "phase": ph, "property": prop, "value": value}
+            ref = refs.get((el, ph, prop))
+            if ref:
+                err = (value - float(ref["reference"])) / float(ref["reference"])
+                row.update(reference=float(ref["reference"]), rel_error=err,
+                           rel_tol=float(ref["rel_tol"]),
+                           status="PASS" if abs(err) <= float(ref["rel_tol"]) else "FAIL")
+                if ref.get("experiment"):
+                    exp = float(ref["experiment"])
+                    row.update(experiment=exp, exp_error=(value - exp) / exp)
+            rows.append(row)
+    # Reference properties that no job produced (failed or not run)
+    for (el, ph, prop), ref in sorted(refs.items()):
+        if (el, ph) in props and prop not in props[(el, ph)]:
+            rows.append({"element": el, "phase": ph, "property": prop, "value": float("nan"),
+                         "reference": float(ref["reference"]), "rel_error": float("nan"),
+                         "rel_tol": float(ref["rel_tol"]), "status": "MISSING"})
+    return rows
+
+
+# ---- Throughput history ----------------------------------------------------
+def throughput_rows(results, revision, backend):
+    rows = []
+    for res in results:
+        perf = instrument.lammps_performance(res["log"])
+        if res["status"] != "ok" or not perf["loop_time_s"]:
+            continue
+        el, ph = res["job"]["name"].split("/")[0].split("_")
+        rows.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "potential": revision,
+                     "element": el, "phase": ph, "atoms": perf["atoms"],
+                     "steps": perf["steps"], "loop_s": perf["loop_time_s"],
+                     "atom_steps_per_s": perf["atoms"] * perf["steps"] / perf["loop_time_s"],
+                     "backend": backend})
+    return rows
+
+
+def regressions(rows, history_file=HISTORY_FILE, tol=THROUGHPUT_TOL):
+    """
+    Append `rows` to the history and compare each with the last entry of the
+    same element/phase measured with a different potential revision.
+    """
+    history = []
+    if os.path.exists(history_file):
+        with open(history_file, 'r', newline='') as f:
+            history = list(csv.DictReader(f))
+    slow = []
+    for row in rows:
+        before = [h for h in history if (h["element"], h["phase"]) == (row["element"], row["phase"])
+                  and h["potential"] != row["potential"]]
+        if before:
+            prev = float(before[-1]["atom_steps_per_s"])
+            change = row["atom_steps_per_s"] / prev - 1.0
+            row["change_vs_previous"] = change
+            if change < -tol:
+                slow.append((row, before[-1]))
+    fields = ["time", "potential", "element", "phase", "atoms", "steps", "loop_s",
+              "atom_steps_per_s", "backend"]
+    new = not os.path.exists(history_file)
+    with open(history_file, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if new:
+            writer.writeheader()
+        writer.writerows(rows)
+    return slow
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the MEAM potential for Cr, Co and Fe.")
+    p.add_argument("--elements", nargs="+", default=list(PHASES))
+    p.add_argument("--phases", nargs="+", default=None, help="default: all of PHASES")
+    p.add_argument("--no-throughput", action="store_true")
+    p.add_argument("--backend", choices=["auto", "library", "subprocess"], default="auto")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--work-dir", default=WORK_DIR)
+    p.add_argument("--lmp", default="lmp", help="subprocess backend: LAMMPS executable")
+    p.add_argument("--mpirun", default="none", help="subprocess backend: MPI launcher")
+    p.add_argument("--reference", default=REFERENCE_FILE)
+    p.add_argument("-o", "--output", default=RESULTS_FILE)
+    p.add_argument("--history", default=HISTORY_FILE)
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    args = p.parse_args(argv)
+
+    pairs = [(el, ph) for el in args.elements for ph in PHASES[el]
+             if args.phases is None or ph in args.phases]
+    mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+    backend = lammps_pool.choose_backend(args.backend)
+    pool = dict(work_dir=args.work_dir, backend=backend, lmp=args.lmp, mpirun=mpirun,
+                report=args.report)
+    results = {}
+
+    def collect(done):
+        for res in done:
+            if res["status"] == "ok":
+                results[res["job"]["name"]] = res["results"]
+        return done
+
+    with instrument.stage("benchmark", report=args.report, pairs=len(pairs)) as rec:
+        # ---- 1. Relaxed cells ----
+        relax = [relax_job(args.work_dir, el, ph) for el, ph in pairs]
+        collect(lammps_pool.run_pool(relax, workers=args.workers, **pool))
+        # ---- 2. E(V), elastic constants, vacancies (all in one queue) ----
+        jobs = [job for (el, ph), r in zip(pairs, relax) if r["name"] in results
+                for job in property_jobs(el, ph, r["relaxed"])]
+        collect(lammps_pool.run_pool(jobs, workers=args.workers, **pool))
+        # ---- 3. Throughput, one job at a time ----
+        slow = []
+        if not args.no_throughput:
+            md = [throughput_job(args.work_dir, el, ph, results[f"{el}_{ph}/relax"]["a(Å)"],
+                                 results[f"{el}_{ph}/relax"].get("c(Å)"))
+                  for el, ph in pairs if f"{el}_{ph}/relax" in results]
+            done = collect(lammps_pool.run_pool(md, workers=1, **pool))
+            throughput = throughput_rows(done, potential_hash(), backend)
+            slow = regressions(throughput, args.history)
+        rows = check(properties(results, pairs), args.reference)
+        rec.update(jobs=len(results),
+                   failed=sum(r.get("status") in ("FAIL", "MISSING") for r in rows))
+
+    fields = ["element", "phase", "property", "value", "reference", "rel_error", "rel_tol",
+              "status", "experiment", "exp_error"]
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print("\n📏 Benchmark vs reference:")
+    for r in rows:
+        ref = (f"ref {r['reference']:.4g} ({100 * r['rel_error']:+.1f} %, "
+               f"tol {100 * r['rel_tol']:.3g} %) {r['status']}" if "reference" in r else "")
+        if "experiment" in r:
+            ref += f"  [exp {r['experiment']:.4g}, {100 * r['exp_error']:+.1f} %]"
+        print(f"   {r['element']:>2} {r['phase']:<3} {r['property']:<16} {r['value']:10.4f}  {ref}")
+    if not args.no_throughput:
+        for r in throughput:
+            change = (f" ({100 * r['change_vs_previous']:+.0f} % vs previous potential)"
+                      if "change_vs_previous" in r else "")
+            print(f"⏱️ {r['element']} {r['phase']}: {r['atom_steps_per_s']:.3g} atom-steps/s{change}")
+        for row, prev in slow:
+            print(f"⚠️ Throughput regression {row['element']} {row['phase']}: "
+                  f"{row['atom_steps_per_s']:.3g} vs {float(prev['atom_steps_per_s']):.3g} "
+                  f"atom-steps/s (potential {prev['potential']})")
+    failed = [r for r in rows if r.get("status") in ("FAIL", "MISSING")]
+    print(f"\n✨ {len(rows) - len(failed)}/{len(rows)} properties within tolerance; "
+          f"results in: {args.output}")
+    return 1 if failed or slow else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
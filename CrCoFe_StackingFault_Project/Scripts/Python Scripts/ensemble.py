@@ -0,0 +1,89 @@
+"""
+ensemble.py
+Statistics over the chemical-disorder realizations (ensemble members) that
+run_sweep.py --realizations K runs for every composition and temperature.
+
+Each member gives one value per quantity: the time-averaged potential energy
+per atom of fcc, hcp and dhcp, a_fcc, and the ANNNI γ evaluated from that
+member's own energies and a_fcc (so the correlations between them are kept).
+The values are folded into Welford accumulators (equilibration.py) one member
+at a time and reported as
+  <q>       mean over the members
+  sd_<q>    sample standard deviation (member-to-member scatter)
+  σ_<q>     standard error of the mean, sd / √K
+sd and σ are NaN for a single member.
+
+    rows = ensemble_rows(records)    # lattice records, see lattice.py
+"""
+
+import numpy as np
+
+from annni import FAULTS, annni_gamma
+from equilibration import welford_init, welford_result, welford_update
+
+ENERGY_COLUMNS = ["E_fcc(eV/atom)", "E_hcp(eV/atom)", "E_dhcp(eV/atom)"]
+LATTICE_COLUMN = "a_fcc(Å)"
+GAMMA_COLUMNS = [f"γ_{k}_ANNNI" for k in FAULTS]
+QUANTITIES = ENERGY_COLUMNS + [LATTICE_COLUMN] + GAMMA_COLUMNS
+
+
+# ---- Statistics ------------------------------------------------------------
+def summary(acc):
+    """(mean, sd, sem) of a one-value Welford accumulator."""
+    mean, var = welford_result(acc)
+    sd = float(np.sqrt(var[0]))
+    return float(mean[0]), sd, float(sd / np.sqrt(acc["n"]))
+
+
+def ensemble_stats(values):
+    """(mean, sd, sem) of the member values of one quantity."""
+    acc = welford_init(1)
+    for v in values:
+        welford_update(acc, [v])
+    return summary(acc)
+
+
+# ---- Members ---------------------------------------------------------------
+def member_values(records):
+    """
+    {(composition, T): {realization: {quantity: value}}} from lattice records
+    {"composition", "T", "phase", "realization", "a", "E", ...}; members with
+    all three energies and a_fcc also get their ANNNI γ.
+    """
+    points = {}
+    for rec in records:
+        members = points.setdefault((rec["composition"], rec["T"]), {})
+        values = members.setdefault(rec.get("realization", 0), {})
+        if "E" in rec:
+            values[f"E_{rec['phase']}(eV/atom)"] = rec["E"]
+        if rec["phase"] == "fcc":
+            values[LATTICE_COLUMN] = rec["a"]
+
+    for members in points.values():
+        for values in members.values():
+            if all(c in values for c in ENERGY_COLUMNS + [LATTICE_COLUMN]):
+                g = annni_gamma(*(values[c] for c in ENERGY_COLUMNS), values[LATTICE_COLUMN])
+                values.update({c: float(g[f"γ_{k}"]) for c, k in zip(GAMMA_COLUMNS, FAULTS)})
+    return points
+
+
+# ---- Tables ----------------------------------------------------------------
+def ensemble_columns():
+    """Ensemble_all.csv columns: means, then sd_ and σ_ of every quantity."""
+    return (["composition", "T(K)", "realizations"] + QUANTITIES
+            + [f"sd_{q}" for q in QUANTITIES] + [f"σ_{q}" for q in QUANTITIES])
+
+
+def ensemble_rows(records):
+    """One row per (composition, T): member count, mean, sd and SEM."""
+    rows = []
+    for (comp, T), members in sorted(member_values(records).items()):
+        accs = {}
+        for values in members.values():
+            for q, v in values.items():
+                welford_update(accs.setdefault(q, welford_init(1)), [v])
+        row = {"composition": comp, "T(K)": T, "realizations": len(members)}
+        for q, acc in accs.items():
+            row[q], row[f"sd_{q}"], row[f"σ_{q}"] = summary(acc)
+        rows.append(row)
+    return rows
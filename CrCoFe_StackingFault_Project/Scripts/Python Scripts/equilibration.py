@@ -0,0 +1,226 @@
+"""
+equilibration.py
+Equilibration test and averages with error bars for the NPT thermo stream.
+
+For every log the NPT thermo rows (all thermo tables after the
+minimization, joined across the blocks of an adaptive run) are analysed:
+  - the equilibration time t0 is the start that maximizes the number of
+    effectively uncorrelated samples N_eff = (N - t0) / g of PotEng, where g
+    is the statistical inefficiency (integrated autocorrelation time),
+  - the production part (t >= t0) of PotEng, Lx, Ly, Lz, Volume is averaged
+    and its standard error is std * sqrt(g / n).
+
+The early-stopping itself happens inside LAMMPS (equilibrate.in with
+-var equil adaptive); its verdict is read from the log.
+
+Usage
+-----
+python equilibration.py                       # every Results/*/out_files/log_*.out
+python equilibration.py log_fcc_300K.out ...  # given logs
+
+Output
+------
+- Results/All_Results_Compiled/Equilibration_all.csv, one row per log; the
+  members of an ensemble (log_<phase>_<T>K_r<k>.out) carry their realization
+"""
+
+import argparse
+import csv
+import glob
+import os
+
+import numpy as np
+
+from lammps_log import parse_log
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
+OUTPUT_DIR = os.path.join(RESULTS_DIR, 'All_Results_Compiled')
+
+QUANTITIES = ["PotEng", "Lx", "Ly", "Lz", "Volume"]
+MAX_CANDIDATES = 100    # t0 values tried by detect_equilibration
+
+
+# ---- Statistics ------------------------------------------------------------
+def statistical_inefficiency(x):
+    """
+    g = 1 + 2 Σ_t (1 - t/N) C(t), with the normalized autocorrelation C(t)
+    from one FFT and the sum truncated at the first C(t) <= 0.
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if n < 3:
+        return 1.0
+    dx = x - x.mean()
+    var = dx @ dx / n
+    if var == 0:
+        return 1.0
+    f = np.fft.rfft(dx, 2 * n)
+    acf = np.fft.irfft(f * np.conj(f))[1:n] / (var * np.arange(n - 1, 0, -1))
+    stop = np.flatnonzero(acf <= 0)
+    t = np.arange(1, (stop[0] if len(stop) else n - 1) + 1)
+    g = 1.0 + 2.0 * np.sum((1.0 - t / n) * acf[:len(t)])
+    return max(g, 1.0)
+
+
+def detect_equilibration(x, max_candidates=MAX_CANDIDATES):
+    """(t0, g, N_eff): start of the production part that maximizes N_eff."""
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    # Keep at least 3 samples (and half the run at most as burn-in)
+    candidates = np.unique(np.linspace(0, max(n // 2, 0), min(max_candidates, n // 2 + 1))
+                           .astype(int))
+    best = (0, 1.0, float(n))
+    n_eff_best = -1.0
+    for t0 in candidates:
+        g = statistical_inefficiency(x[t0:])
+        n_eff = (n - t0) / g
+        if n_eff > n_eff_best:
+            n_eff_best, best = n_eff, (int(t0), g, n_eff)
+    return best
+
+
+def mean_sem(x, g=None):
+    """Mean and its standard error, corrected for correlation by g."""
+    x = np.asarray(x, dtype=float)
+    if len(x) < 2:
+        return float(x.mean()) if len(x) else np.nan, np.nan
+    g = statistical_inefficiency(x) if g is None else g
+    return float(x.mean()), float(x.std(ddof=1) * np.sqrt(g / len(x)))
+
+
+# ---- Running statistics ----------------------------------------------------
+def welford_init(size=1):
+    """Empty running-statistics accumulator for vectors of length `size`."""
+    return {"n": 0, "mean": np.zeros(size), "m2": np.zeros(size)}
+
+
+def welford_update(acc, x):
+    """Add one sample (Welford's online mean / sum of squared deviations)."""
+    x = np.asarray(x, dtype=float)
+    acc["n"] += 1
+    delta = x - acc["mean"]
+    acc["mean"] = acc["mean"] + delta / acc["n"]
+    acc["m2"] = acc["m2"] + delta * (x - acc["mean"])
+    return acc
+
+
+def welford_merge(a, b):
+    """Accumulator of the union of two sample sets (Chan et al.)."""
+    n = a["n"] + b["n"]
+    if n == 0:
+        return welford_init(len(a["mean"]))
+    delta = b["mean"] - a["mean"]
+    return {"n": n, "mean": a["mean"] + delta * (b["n"] / n),
+            "m2": a["m2"] + b["m2"] + delta ** 2 * (a["n"] * b["n"] / n)}
+
+
+def welford_result(acc):
+    """(mean, sample variance); the variance is NaN below two samples."""
+    var = acc["m2"] / (acc["n"] - 1) if acc["n"] > 1 else np.full_like(acc["m2"], np.nan)
+    return acc["mean"], var
+
+
+# ---- Logs ------------------------------------------------------------------
+def npt_series(run, columns=QUANTITIES):
+    """
+    Step and `columns` of the NPT part of a parsed log: thermo tables after
+    the minimization (Temp not all zero), with the repeated first row of each
+    continuation run dropped.
+    """
+    steps, values = [], {c: [] for c in columns}
+    last = -1
+    for block in run["thermo"]:
+        if "Step" not in block or not all(c in block for c in columns):
+            continue
+        temp = np.frombuffer(block["Temp"], dtype=np.float64) if "Temp" in block else None
+        if temp is None or not temp.any():
+            continue
+        step = np.frombuffer(block["Step"], dtype=np.float64)
+        keep = step > last
+        # A new run starting at 0 (reset_timestep) restarts the series
+        if len(step) and step[0] < last:
+            steps, values = [], {c: [] for c in columns}
+            keep = np.ones(len(step), dtype=bool)
+        steps.append(step[keep])
+        for c in columns:
+            values[c].append(np.frombuffer(block[c], dtype=np.float64)[keep])
+        if len(step):
+            last = step[-1]
+    if not steps:
+        return np.array([]), {c: np.array([]) for c in columns}
+    return np.concatenate(steps), {c: np.concatenate(v) for c, v in values.items()}
+
+
+def analyze(step, series, key="PotEng"):
+    """Equilibration time from `key`, then mean ± SEM of every series."""
+    t0, g, n_eff = detect_equilibration(series[key])
+    rec = {"npt_steps": int(step[-1]) if len(step) else 0,
+           "t0_step": int(step[t0]) if len(step) else 0,
+           "samples": len(step) - t0, "n_eff": round(n_eff, 1)}
+    for name, x in series.items():
+        mean, sem = mean_sem(x[t0:])
+        rec[name] = mean
+        rec[f"{name}_sem"] = sem
+    return rec
+
+
+def summarize_log(path):
+    """
+    Record for one log: composition/phase/T/realization from its path
+    (log_fcc_300K.out, ensemble members log_fcc_300K_r1.out) plus analyze().
+    """
+    from lattice import RE_LOG_NAME  # lattice imports this module
+    run = parse_log(path)
+    step, series = npt_series(run)
+    m = RE_LOG_NAME.match(os.path.basename(path))
+    rec = {"composition": os.path.basename(os.path.dirname(os.path.dirname(path))),
+           "phase": m.group(1) if m else "",
+           "T(K)": int(float(m.group(2))) if m else "",
+           "realization": int(m.group(3) or 0) if m else "",
+           "equilibrated": run["meta"].get("equilibrated", "")}
+    if len(step) < 3:
+        return rec
+    rec.update(analyze(step, series))
+    return rec
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Equilibrium averages with error bars.")
+    p.add_argument("logs", nargs="*", help="default: Results/*/out_files/log_*.out")
+    p.add_argument("--results-dir", default=RESULTS_DIR)
+    p.add_argument("-o", "--output", default=None,
+                   help="default: <results-dir>/All_Results_Compiled/Equilibration_all.csv")
+    args = p.parse_args(argv)
+
+    logs = args.logs or sorted(glob.glob(os.path.join(args.results_dir, "*",
+                                                      "out_files", "log_*.out")))
+    output = args.output or os.path.join(args.results_dir, 'All_Results_Compiled',
+                                         'Equilibration_all.csv')
+    print(f"🔍 Analysing {len(logs)} logs...")
+    records = [summarize_log(path) for path in logs]
+
+    fields = (["composition", "phase", "T(K)", "realization", "equilibrated", "npt_steps",
+               "t0_step", "samples", "n_eff"]
+              + [f for q in QUANTITIES for f in (q, f"{q}_sem")])
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(records)
+
+    for rec in records:
+        member = f" r{rec['realization']}" if rec["realization"] else ""
+        point = f"{rec['composition']} {rec['phase']} {rec['T(K)']}K{member}"
+        if "Lx" in rec:
+            print(f"  {point}: t0={rec['t0_step']} N_eff={rec['n_eff']} "
+                  f"pe={rec['PotEng']:.3f}±{rec['PotEng_sem']:.3f} "
+                  f"Lx={rec['Lx']:.4f}±{rec['Lx_sem']:.4f}")
+        else:
+            print(f"⚠️ {point}: no NPT thermo rows")
+    print(f"✅ Equilibration_all.csv written to: {output}")
+
+
+if __name__ == "__main__":
+    main()
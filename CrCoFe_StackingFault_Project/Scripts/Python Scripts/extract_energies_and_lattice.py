@@ -1,60 +1,261 @@
-import os
-import pandas as pd
-import re
-
-# Paths
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
-OUTPUT_DIR = os.path.join(RESULTS_DIR, 'All_Results_Compiled')
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-records = []
-
-print("🔍 Extracting SFE data from composition folders...")
-
-for comp_folder in os.listdir(RESULTS_DIR):
-    path = os.path.join(RESULTS_DIR, comp_folder)
-    if not os.path.isdir(path) or comp_folder == 'All_Results_Compiled':
-        continue
-
-    out_dir = os.path.join(path, "out_files")
-    if not os.path.exists(out_dir):
-        continue
-
-    for file in os.listdir(out_dir):
-        if not file.endswith(".out"):
-            continue
-
-        filepath = os.path.join(out_dir, file)
-        with open(filepath, 'r') as f:
-            content = f.read()
-
-        # Extract temperature, fault type, and gamma
-        match = re.search(r'Temperature:\s*(\d+)', content)
-        temp = int(match.group(1)) if match else None
-
-        if 'ISF' in file:
-            fault = 'ISF'
-        elif 'ESF' in file:
-            fault = 'ESF'
-        elif 'Twin' in file or 'TWIN' in file:
-            fault = 'Twin'
-        else:
-            fault = 'Unknown'
-
-        gamma_match = re.search(r'Stacking fault energy:\s*([-+]?\d*\.\d+|\d+)', content)
-        gamma = float(gamma_match.group(1)) if gamma_match else None
-
-        records.append({
-            'Composition': comp_folder,
-            'Temperature': temp,
-            'Fault_Type': fault,
-            'Gamma_mJ_m2': gamma
-        })
-
-df = pd.DataFrame(records)
-df = df.dropna(subset=['Gamma_mJ_m2'])
-csv_path = os.path.join(OUTPUT_DIR, 'SEF_all.csv')
-df.to_csv(csv_path, index=False)
-
-print(f"✅ SEF_all.csv generated successfully at: {csv_path}")
+"""
+extract_energies_and_lattice.py
+Compiles the LAMMPS outputs in Results/<composition>/out_files.
+
+Composition folders are scanned in parallel (one process-pool task per
+folder). Every .out file's mtime/size is recorded in
+All_Results_Compiled/extract_manifest.json, so later runs only re-parse new
+or changed files and merge them into the existing compiled tables.
+
+Lattice_all.csv holds per-cell a, c and c/a of every log_<phase>_<T>K.out,
+time-averaged over the production part of the NPT thermo stream during the
+same parsing pass (see lattice.py), with their standard errors (σ_ columns).
+
+Ensemble_all.csv holds, per composition and temperature, the mean, standard
+deviation (sd_) and standard error (σ_) over the disorder realizations
+(log_<phase>_<T>K_r<k>.out of run_sweep.py --realizations) of E_fcc, E_hcp,
+E_dhcp, a_fcc and the ANNNI γ of every member (see ensemble.py). With several
+members, Lattice_all.csv holds their mean and its ensemble standard error.
+
+Every parsed file is also stored in results.sqlite (results_db.py) with
+numeric Cr/Co/Fe/T columns and its source file, for indexed range queries.
+
+Usage
+-----
+python extract_energies_and_lattice.py             # incremental
+python extract_energies_and_lattice.py --full      # re-parse everything
+
+Timing and resources of each run are appended to Results/run_report.jsonl.
+"""
+
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrument
+import results_db
+from ensemble import ensemble_columns, ensemble_rows
+from lattice import (PRODUCTION, RE_LOG_NAME, box_observer, lattice_columns,
+                     lattice_record, lattice_rows)
+from lammps_log import (concat_columns, parse_log, read_columnar, select_rows,
+                        thermo_columns, write_columnar)
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
+OUTPUT_DIR = os.path.join(RESULTS_DIR, 'All_Results_Compiled')
+MANIFEST_FILE = 'extract_manifest.json'
+FORMAT = 2          # manifest entry layout; older entries are re-parsed
+
+SEF_FIELDS = ['Composition', 'Temperature', 'Fault_Type', 'Gamma_mJ_m2']
+
+
+def fault_type(filename):
+    """Fault type encoded in the .out file name."""
+    if 'ISF' in filename:
+        return 'ISF'
+    elif 'ESF' in filename:
+        return 'ESF'
+    elif 'Twin' in filename or 'TWIN' in filename:
+        return 'Twin'
+    return 'Unknown'
+
+
+def composition_folders(results_dir=RESULTS_DIR):
+    """Composition folders that have an out_files/ directory."""
+    folders = []
+    for comp_folder in sorted(os.listdir(results_dir)):
+        path = os.path.join(results_dir, comp_folder)
+        if not os.path.isdir(path) or comp_folder == 'All_Results_Compiled':
+            continue
+        if os.path.isdir(os.path.join(path, "out_files")):
+            folders.append(comp_folder)
+    return folders
+
+
+def file_records(comp_folder, filepath, run):
+    """SEF rows contributed by one parsed .out file."""
+    gamma = run["meta"].get("gamma")
+    if gamma is None:
+        return []
+    return [{
+        'Composition': comp_folder,
+        'Temperature': run["meta"].get("temperature"),
+        'Fault_Type': fault_type(os.path.basename(filepath)),
+        'Gamma_mJ_m2': gamma
+    }]
+
+
+def lattice_entry(comp_folder, filename, state, production):
+    """Lattice record of one NPT log (None for other .out files)."""
+    m = RE_LOG_NAME.match(filename)
+    if not m:
+        return None
+    phase, T = m.group(1), int(float(m.group(2)))
+    rec = lattice_record(state, phase, production)
+    if rec is None:
+        return None
+    return {"composition": comp_folder, "T": T, "phase": phase,
+            "realization": int(m.group(3) or 0), **rec}
+
+
+def scan_composition(results_dir, comp_folder, known, production=PRODUCTION):
+    """
+    Stat every .out file of one composition and parse only those whose
+    (mtime, size) differ from the manifest entry in `known`.
+    Returns (manifest entries for all current files, {relpath: parsed run}).
+    """
+    entries, runs = {}, {}
+    out_dir = os.path.join(results_dir, comp_folder, "out_files")
+    with os.scandir(out_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".out") or not entry.is_file():
+                continue
+            rel = os.path.join(comp_folder, "out_files", entry.name)
+            st = entry.stat()
+            old = known.get(rel)
+            if (old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size
+                    and old.get("production") == production and old.get("format") == FORMAT):
+                entries[rel] = old
+                continue
+            # One streaming pass per file: thermo tables, box averages, metadata
+            observer, state = box_observer()
+            run = parse_log(entry.path, observers=[observer])
+            runs[rel] = run
+            entries[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                            "production": production, "format": FORMAT,
+                            "records": file_records(comp_folder, entry.path, run),
+                            "lattice": lattice_entry(comp_folder, entry.name, state,
+                                                     production)}
+    return entries, runs
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Compile SEF data, lattice parameters and thermo tables.")
+    p.add_argument("--results-dir", default=RESULTS_DIR)
+    p.add_argument("--full", action="store_true", help="ignore the manifest")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--production", type=float, default=PRODUCTION,
+                   help="fraction of each NPT run averaged for Lattice_all.csv")
+    p.add_argument("--db", default=None,
+                   help="results database (default: results.sqlite next to the tables), "
+                        "'' to disable")
+    p.add_argument("--report", default=instrument.REPORT_FILE,
+                   help="run report (JSON lines), '' to disable")
+    args = p.parse_args(argv)
+
+    results_dir = args.results_dir
+    output_dir = os.path.join(results_dir, 'All_Results_Compiled')
+    db_path = os.path.join(output_dir, 'results.sqlite') if args.db is None else args.db
+    os.makedirs(output_dir, exist_ok=True)
+    thermo_path = os.path.join(output_dir, 'thermo_all.npz')
+
+    manifest = {} if args.full else load_manifest(output_dir)
+    if manifest and not os.path.exists(thermo_path):
+        manifest = {}
+    print("🔍 Extracting SFE data from composition folders...")
+
+    with instrument.stage("extract", report=args.report) as rec:
+        folders = composition_folders(results_dir)
+        new_manifest, new_runs = {}, {}
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = []
+            for comp_folder in folders:
+                prefix = comp_folder + os.sep
+                known = {k: v for k, v in manifest.items() if k.startswith(prefix)}
+                futures.append(pool.submit(scan_composition, results_dir, comp_folder,
+                                           known, args.production))
+            for future in futures:
+                entries, runs = future.result()
+                new_manifest.update(entries)
+                new_runs.update(runs)
+
+        # Merge: keep thermo rows of unchanged files, append the re-parsed ones
+        kept = [rel for rel in new_manifest if rel not in new_runs]
+        tables = []
+        if kept and os.path.exists(thermo_path):
+            old = read_columnar(thermo_path)
+            tables.append(select_rows(old, np.isin(old["source"], kept)))
+        tables.append(thermo_columns(new_runs))
+        write_columnar(thermo_path, concat_columns(tables))
+
+        records = [r for rel in sorted(new_manifest) for r in new_manifest[rel]["records"]]
+
+        # Typed columnar store
+        sef_columns = {
+            'Composition': np.array([r['Composition'] for r in records], dtype=str),
+            # -1 marks a file without a "Temperature:" line
+            'Temperature': np.array([r['Temperature'] if r['Temperature'] is not None else -1
+                                     for r in records], dtype=np.int32),
+            'Fault_Type': np.array([r['Fault_Type'] for r in records], dtype=str),
+            'Gamma_mJ_m2': np.array([r['Gamma_mJ_m2'] for r in records], dtype=np.float64),
+        }
+        write_columnar(os.path.join(output_dir, 'SEF_all.npz'), sef_columns)
+
+        # Plain CSV kept for the existing plotting scripts
+        csv_path = os.path.join(output_dir, 'SEF_all.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SEF_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+
+        # Per-cell lattice parameters, one row per composition and temperature
+        lattice = [new_manifest[rel]["lattice"] for rel in sorted(new_manifest)
+                   if new_manifest[rel].get("lattice")]
+        lattice_path = os.path.join(output_dir, 'Lattice_all.csv')
+        with open(lattice_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=lattice_columns())
+            writer.writeheader()
+            writer.writerows(lattice_rows(lattice))
+
+        # Mean / sd / SEM over the disorder realizations of every point
+        ensemble = ensemble_rows(lattice)
+        ensemble_path = os.path.join(output_dir, 'Ensemble_all.csv')
+        with open(ensemble_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=ensemble_columns())
+            writer.writeheader()
+            writer.writerows(ensemble)
+        save_manifest(output_dir, new_manifest)
+
+        # Indexed store: changed files, plus any the database does not have yet
+        stored = 0
+        if db_path:
+            conn = results_db.connect(db_path)
+            stored, _ = results_db.sync_manifest(conn, new_manifest, set(new_runs))
+            conn.close()
+        rec.update(folders=len(folders), parsed=len(new_runs), unchanged=len(kept),
+                   stored=stored,
+                   realizations=max((r["realizations"] for r in ensemble), default=0))
+
+    removed = len(set(manifest) - set(new_manifest))
+    print(f"🔁 {len(new_runs)} new/changed, {len(kept)} unchanged, {removed} removed files")
+    print(f"✅ SEF_all.csv generated successfully at: {csv_path}")
+    print(f"✅ Lattice_all.csv ({len(lattice)} runs) generated at: {lattice_path}")
+    print(f"✅ Ensemble_all.csv ({len(ensemble)} points) generated at: {ensemble_path}")
+    print(f"✅ Thermo tables written to: {thermo_path}")
+    if db_path:
+        print(f"✅ {stored} runs stored in: {db_path}")
+
+
+if __name__ == "__main__":
+    main()
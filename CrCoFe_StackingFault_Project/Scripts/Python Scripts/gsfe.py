@@ -0,0 +1,326 @@
+"""
+gsfe.py
+Generalized stacking-fault energy (GSFE) curves along <112> on {111}.
+
+For every composition and temperature one perfect {111} slab is built (the
+same slab as the reference of stacking_faults.py, a_fcc(T) from
+Lattice_all.csv) and a single LAMMPS session (Lammps Scripts/gsfe.in)
+walks the rigid shift u of the upper half in N steps, relaxing all atoms
+along z only after every step:
+    γ(u) = (E(u) − E(0)) / (lx · ly)        [eV/Å² → mJ/m²]
+u is given in units of the partial Burgers vector b_p = a_fcc/√6, so
+γ(1) is the intrinsic stacking fault and the maximum before it the
+unstable stacking fault energy γ_usf.
+
+The energies are streamed from LAMMPS while it runs (one line per step),
+and the scans of all compositions run concurrently on the available cores
+(--cores, --ranks-per-job), with finished scans restored from the run cache.
+
+Usage
+-----
+python gsfe.py --cores 64 --ranks-per-job 4 --steps 20
+python gsfe.py --max-shift 3 --steps 60            # full period A → B → C → A
+python gsfe.py --collect-only
+
+Output
+------
+- Results/All_Results_Compiled/GSFE_all.csv       (γ(u) of every step)
+- Results/All_Results_Compiled/GSFE_summary.csv   (γ_usf, u_usf, γ_isf)
+"""
+
+import argparse
+import csv
+import math
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+import instrument
+import run_cache
+import run_sweep
+import supercell
+from annni import EV_PER_A2_TO_MJ_PER_M2
+from stacking_faults import LATTICE_FILE, NLAYERS, SEED, SIZE, VACUUM, fault_slab, lattice_parameters
+
+# Paths
+GSFE_DIR = os.path.join(run_sweep.STRUCTURES_DIR, 'gsfe')
+
+STEPS = 20              # displacements per scan
+MAX_SHIFT = 1.0         # scan length in units of b_p
+
+RE_STEP = re.compile(r'^GSFE step (\d+)/(\d+): E=(\S+) area=(\S+)')
+
+
+# ---- Structure -------------------------------------------------------------
+def shift_vector(a_fcc, max_shift=MAX_SHIFT):
+    """Cartesian (dx, dy) of a shift of `max_shift` partials A → B along <112>."""
+    a = a_fcc / math.sqrt(2.0)
+    u, v = supercell.SITE_SHIFTS["B"]
+    return max_shift * a * (u + 0.5 * v), max_shift * a * (math.sqrt(3.0) / 2.0) * v
+
+
+def write_scan(work_dir, composition, T, a_fcc, size=SIZE, nlayers=NLAYERS, vacuum=VACUUM,
+               seed=SEED, steps=STEPS, max_shift=MAX_SHIFT):
+    """Slab data file of one (composition, T) scan; returns its job dict."""
+    folder = run_sweep.composition_folder(*composition)
+    positions, box = fault_slab("perfect", a_fcc, size, nlayers, vacuum)
+    types = supercell.random_types(len(positions), composition, seed)
+    rel = os.path.join(GSFE_DIR, folder, f"T{T}.data")
+    path = os.path.join(work_dir, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    supercell.write_lammps_data(
+        tmp, positions, types, box,
+        f"GSFE {{111}} slab {folder} a_fcc={a_fcc:.6f} T={T} "
+        f"{size[0]}x{size[1]}x{nlayers} layers seed={seed}")
+    os.replace(tmp, path)
+
+    # Fault plane halfway between the two middle layers
+    dz = a_fcc / math.sqrt(3.0)
+    dx, dy = shift_vector(a_fcc, max_shift / steps)
+    log = os.path.join("out_files", f"log_gsfe_{T}K.out")
+    return {"name": f"{folder}/gsfe_{T}K", "composition": folder, "phase": "gsfe", "T": T,
+            "input": "gsfe.in",
+            "variables": {"data_file": os.path.join("..", rel),
+                          "zcut": f"{(nlayers // 2 + 0.5) * dz:.8f}",
+                          "dx": f"{dx:.10f}", "dy": f"{dy:.10f}", "nsteps": steps},
+            "structure": None,
+            "deps": ["gsfe.in", rel, "library.meam", "CrCoFe.meam"],
+            "log": log, "outputs": [log],
+            "max_shift": max_shift, "b_p": a_fcc / math.sqrt(6.0)}
+
+
+# ---- Streaming run ---------------------------------------------------------
+def parse_step(line):
+    """(step, nsteps, E, area) of a 'GSFE step' line, else None."""
+    m = RE_STEP.match(line)
+    if m is None:
+        return None
+    return int(m.group(1)), int(m.group(2)), float(m.group(3)), float(m.group(4))
+
+
+def stream_job(job, work_dir, lmp="lmp", mpirun="mpirun", ranks=4, timeout=None,
+               on_step=None):
+    """
+    Run one scan, copying LAMMPS stdout to the job log line by line and
+    calling on_step(job, step, nsteps, E, area) as the energies arrive.
+    """
+    job_dir = os.path.join(work_dir, job["composition"])
+    log_path = os.path.join(job_dir, job["log"])
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    cmd = run_sweep.job_command(job, lmp, mpirun, ranks)
+
+    start = time.time()
+    status, returncode, resources = "ok", None, {}
+    with open(log_path, 'w') as log:
+        try:
+            proc = subprocess.Popen(cmd, cwd=job_dir, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                    start_new_session=True)
+        except OSError as exc:
+            log.write(f"Failed to launch {cmd[0]}: {exc}\n")
+            status = "failed"
+        else:
+            expired = threading.Event()
+
+            def kill():
+                expired.set()
+                os.killpg(proc.pid, signal.SIGKILL)
+
+            timer = threading.Timer(timeout, kill) if timeout is not None else None
+            if timer:
+                timer.start()
+            for line in proc.stdout:
+                log.write(line)
+                point = parse_step(line)
+                if point and on_step:
+                    on_step(job, *point)
+            if timer:
+                timer.cancel()
+            _, wait_status, rusage = os.wait4(proc.pid, 0)
+            returncode = proc.returncode = os.waitstatus_to_exitcode(wait_status)
+            resources = instrument.rusage_resources(rusage)
+            if expired.is_set():
+                status = "timeout"
+            elif returncode != 0:
+                status = "failed"
+
+    return {"job": job, "status": status, "returncode": returncode,
+            "wall_s": time.time() - start, "log": log_path, "resources": resources}
+
+
+def run_scan(job, work_dir, cache_dir=None, lmp="lmp", mpirun="mpirun", ranks=4,
+             timeout=None, on_step=None):
+    """stream_job, or the cached log of an identical earlier scan."""
+    job_dir = os.path.join(work_dir, job["composition"])
+    key = run_cache.run_key(job, work_dir) if cache_dir else None
+    if key and run_cache.restore(cache_dir, key, job_dir):
+        return {"job": job, "status": "cached", "returncode": 0, "wall_s": 0.0,
+                "log": os.path.join(job_dir, job["log"])}
+    res = stream_job(job, work_dir, lmp, mpirun, ranks, timeout, on_step)
+    if key and res["status"] == "ok":
+        run_cache.store(cache_dir, key, job, job_dir)
+    return res
+
+
+def run_scans(jobs, work_dir, cores=None, ranks_per_job=4, lmp="lmp", mpirun="mpirun",
+              timeout=None, cache_dir=None, report=None, on_step=None):
+    """All scans concurrently, cores // ranks_per_job at a time."""
+    cores = cores or os.cpu_count() or 1
+    slots = max(1, cores // ranks_per_job)
+    print(f"🚀 {len(jobs)} GSFE scans on {cores} cores: {slots} × {ranks_per_job} ranks")
+    if cache_dir:
+        run_cache.clean_partial(cache_dir)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=slots) as pool:
+        futures = [pool.submit(run_scan, job, work_dir, cache_dir, lmp, mpirun,
+                               ranks_per_job, timeout, on_step) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            res = future.result()
+            results.append(res)
+            run_sweep.report_job(report, res)
+            mark = "✅" if res["status"] in ("ok", "cached") else "❌"
+            print(f"{mark} [{done}/{len(jobs)}] {res['job']['name']} "
+                  f"{res['status']} in {res['wall_s']:.1f} s")
+    return results
+
+
+# ---- Curves ----------------------------------------------------------------
+def read_scan(log_path):
+    """Steps, total steps, energies and areas of the 'GSFE step' lines of a log."""
+    points = []
+    with open(log_path, 'r', errors='replace') as f:
+        for line in f:
+            point = parse_step(line)
+            if point:
+                points.append(point)
+    points.sort()
+    return points
+
+
+def gsfe_curve(points, max_shift=MAX_SHIFT):
+    """u (b_p units) and γ (mJ/m²) from the scan points, relative to step 0."""
+    step = np.array([p[0] for p in points], dtype=float)
+    nsteps = points[0][1]
+    E = np.array([p[2] for p in points])
+    area = np.array([p[3] for p in points])
+    u = step / nsteps * max_shift
+    return u, (E - E[0]) / area * EV_PER_A2_TO_MJ_PER_M2
+
+
+def curve_summary(u, gamma):
+    """γ_usf (maximum for 0 < u ≤ 1), its position u_usf and γ_isf = γ(1)."""
+    first = (u > 0) & (u <= 1.0 + 1e-9)
+    rec = {"γ_usf(mJ/m²)": np.nan, "u_usf(b_p)": np.nan, "γ_isf(mJ/m²)": np.nan}
+    if first.any():
+        i = np.flatnonzero(first)[np.argmax(gamma[first])]
+        rec.update({"γ_usf(mJ/m²)": float(gamma[i]), "u_usf(b_p)": float(u[i])})
+    if u[-1] >= 1.0 - 1e-9:
+        rec["γ_isf(mJ/m²)"] = float(np.interp(1.0, u, gamma))
+    return rec
+
+
+def collect(work_dir, jobs, output_dir):
+    """Write GSFE_all.csv and GSFE_summary.csv from the logs of `jobs`."""
+    curve_rows, summary_rows = [], []
+    for job in jobs:
+        log_path = os.path.join(work_dir, job["composition"], job["log"])
+        if not os.path.exists(log_path):
+            continue
+        points = read_scan(log_path)
+        if not points or points[0][0] != 0:
+            continue
+        u, gamma = gsfe_curve(points, job["max_shift"])
+        for (step, _, E, _), ui, gi in zip(points, u, gamma):
+            curve_rows.append({"composition": job["composition"], "T(K)": job["T"],
+                               "step": step, "u(b_p)": ui, "u(Å)": ui * job["b_p"],
+                               "E(eV)": E, "γ(mJ/m²)": gi})
+        summary_rows.append({"composition": job["composition"], "T(K)": job["T"],
+                             "steps": len(points) - 1, **curve_summary(u, gamma)})
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, rows, fields in (
+            ("GSFE_all.csv", curve_rows,
+             ["composition", "T(K)", "step", "u(b_p)", "u(Å)", "E(eV)", "γ(mJ/m²)"]),
+            ("GSFE_summary.csv", summary_rows,
+             ["composition", "T(K)", "steps", "γ_usf(mJ/m²)", "u_usf(b_p)", "γ_isf(mJ/m²)"])):
+        with open(os.path.join(output_dir, name), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    return summary_rows
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="GSFE curves along <112> on {111}.")
+    p.add_argument("--compositions", default=run_sweep.COMPOSITIONS_FILE)
+    p.add_argument("--temps", nargs="+", type=int, default=run_sweep.TEMPS)
+    p.add_argument("--lattice", default=LATTICE_FILE,
+                   help=f"Lattice_all.csv for a_fcc(T) (default {supercell.A_FCC} Å if missing)")
+    p.add_argument("--steps", type=int, default=STEPS, help="displacements per scan")
+    p.add_argument("--max-shift", type=float, default=MAX_SHIFT,
+                   help="scan length in partial Burgers vectors (3 = full period)")
+    p.add_argument("--size", type=int, nargs=2, default=list(SIZE), metavar=("NX", "NY"))
+    p.add_argument("--layers", type=int, default=NLAYERS)
+    p.add_argument("--vacuum", type=float, default=VACUUM)
+    p.add_argument("--seed", type=int, default=SEED)
+    p.add_argument("--work-dir", default=run_sweep.RESULTS_DIR)
+    p.add_argument("--cores", type=int, default=None)
+    p.add_argument("--ranks-per-job", type=int, default=4)
+    p.add_argument("--lmp", default="lmp")
+    p.add_argument("--mpirun", default="mpirun", help="'none' to run lmp directly")
+    p.add_argument("--timeout", type=float, default=None)
+    p.add_argument("--cache-dir", default=run_sweep.CACHE_DIR)
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    p.add_argument("--collect-only", action="store_true", help="only re-read existing logs")
+    p.add_argument("-o", "--output-dir", default=None,
+                   help="default: <work-dir>/All_Results_Compiled")
+    args = p.parse_args(argv)
+
+    compositions = run_sweep.read_compositions(args.compositions)
+    a_fcc = lattice_parameters(args.lattice, compositions, args.temps)
+    output_dir = args.output_dir or os.path.join(args.work_dir, 'All_Results_Compiled')
+
+    run_sweep.stage_inputs(args.work_dir)
+    jobs = [write_scan(args.work_dir, comp, T, a_fcc[run_sweep.composition_folder(*comp)][T],
+                       tuple(args.size), args.layers, args.vacuum, args.seed,
+                       args.steps, args.max_shift)
+            for comp in compositions for T in args.temps]
+
+    failed = []
+    if not args.collect_only:
+        lock = threading.Lock()
+
+        def on_step(job, step, nsteps, E, area):
+            with lock:
+                print(f"  {job['name']}: step {step}/{nsteps} E={E:.4f} eV")
+
+        mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+        with instrument.stage("gsfe", report=args.report, jobs=len(jobs)):
+            results = run_scans(jobs, args.work_dir, args.cores, args.ranks_per_job,
+                                args.lmp, mpirun, args.timeout,
+                                None if args.no_cache else args.cache_dir,
+                                args.report, on_step)
+        failed = [r for r in results if r["status"] not in ("ok", "cached")]
+        for r in failed:
+            print(f"⚠️ {r['job']['name']}: {r['status']} (see {r['log']})")
+
+    summary = collect(args.work_dir, jobs, output_dir)
+    for rec in summary:
+        print(f"  {rec['composition']} {rec['T(K)']}K: γ_usf={rec['γ_usf(mJ/m²)']:.1f} "
+              f"γ_isf={rec['γ_isf(mJ/m²)']:.1f} mJ/m²")
+    print(f"✅ GSFE_all.csv / GSFE_summary.csv ({len(summary)} curves) written to: {output_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+"""
+instrument.py
+Lightweight timing / resource instrumentation for every pipeline stage.
+
+Each stage or job appends one JSON line to a run report
+(default Results/run_report.jsonl) with wall time, CPU time (self +
+reaped children), peak RSS and I/O bytes. LAMMPS jobs additionally carry
+the loop time, steps and ns/day that LAMMPS prints in its log.
+
+    with stage("extract", report=REPORT_FILE) as rec:
+        ...                              # rec can take extra fields
+
+Usage
+-----
+python instrument.py                        # summary of Results/run_report.jsonl
+python instrument.py path/to/run_report.jsonl
+"""
+
+import json
+import os
+import resource
+import socket
+import sys
+import time
+from contextlib import contextmanager
+
+from lammps_log import iter_log
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_FILE = os.path.join(BASE_DIR, '..', 'Results', 'run_report.jsonl')
+
+BLOCK_BYTES = 512       # unit of ru_inblock / ru_oublock
+
+
+# ---- Measurements ----------------------------------------------------------
+def _proc_io():
+    """(read_bytes, write_bytes) of this process from /proc, if available."""
+    try:
+        with open("/proc/self/io", 'r') as f:
+            fields = dict(line.split(":") for line in f)
+        return int(fields["read_bytes"]), int(fields["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _snapshot():
+    return {"wall": time.perf_counter(),
+            "self": resource.getrusage(resource.RUSAGE_SELF),
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN),
+            "io": _proc_io()}
+
+
+def _delta(before, after):
+    cpu_user = sum(after[k].ru_utime - before[k].ru_utime for k in ("self", "children"))
+    cpu_sys = sum(after[k].ru_stime - before[k].ru_stime for k in ("self", "children"))
+    rec = {"wall_s": after["wall"] - before["wall"],
+           "cpu_user_s": cpu_user, "cpu_sys_s": cpu_sys,
+           # ru_maxrss is a lifetime peak (KiB on Linux), not per stage
+           "peak_rss_mb": max(after["self"].ru_maxrss, after["children"].ru_maxrss) / 1024.0}
+    if before["io"] and after["io"]:
+        rec["read_bytes"] = after["io"][0] - before["io"][0]
+        rec["write_bytes"] = after["io"][1] - before["io"][1]
+    else:
+        rec["read_bytes"] = BLOCK_BYTES * sum(
+            after[k].ru_inblock - before[k].ru_inblock for k in ("self", "children"))
+        rec["write_bytes"] = BLOCK_BYTES * sum(
+            after[k].ru_oublock - before[k].ru_oublock for k in ("self", "children"))
+    return rec
+
+
+def rusage_resources(ru):
+    """Resource fields for one child from the rusage returned by os.wait4."""
+    return {"cpu_user_s": ru.ru_utime, "cpu_sys_s": ru.ru_stime,
+            "peak_rss_mb": ru.ru_maxrss / 1024.0,
+            "read_bytes": BLOCK_BYTES * ru.ru_inblock,
+            "write_bytes": BLOCK_BYTES * ru.ru_oublock}
+
+
+def lammps_performance(log_path):
+    """Loop time, steps and ns/day summed / taken from a LAMMPS log."""
+    perf = {"loop_time_s": 0.0, "steps": 0}
+    try:
+        for kind, payload in iter_log(log_path):
+            if kind == "loop":
+                perf["loop_time_s"] += payload["time_s"]
+                perf["steps"] += payload["steps"]
+                perf["atoms"] = payload["atoms"]
+                perf["procs"] = payload["procs"]
+            elif kind == "meta" and payload[0] in ("ns_per_day", "timesteps_per_s"):
+                perf[payload[0]] = payload[1]
+    except OSError:
+        pass
+    return perf
+
+
+# ---- Report ----------------------------------------------------------------
+def write_record(report, rec):
+    """Append one JSON line (O_APPEND keeps concurrent writers' lines whole)."""
+    if not report:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(report)), exist_ok=True)
+    line = json.dumps({"timestamp": time.time(), "host": socket.gethostname(),
+                       "pid": os.getpid(), **rec}, default=str)
+    with open(report, 'a') as f:
+        f.write(line + "\n")
+
+
+@contextmanager
+def stage(name, report=REPORT_FILE, **tags):
+    """Measure the enclosed block and append it to `report` as stage `name`."""
+    rec = {"stage": name, **tags}
+    before = _snapshot()
+    try:
+        yield rec
+    finally:
+        rec.update(_delta(before, _snapshot()))
+        write_record(report, rec)
+
+
+def measure(func, *args):
+    """Run func(*args) and return its resource record (for pool workers)."""
+    before = _snapshot()
+    func(*args)
+    return _delta(before, _snapshot())
+
+
+# ---- Summary ---------------------------------------------------------------
+def read_report(report=REPORT_FILE):
+    with open(report, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    report = sys.argv[1] if len(sys.argv) > 1 else REPORT_FILE
+    records = read_report(report)
+    totals = {}
+    for rec in records:
+        t = totals.setdefault(rec["stage"], {"n": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                             "peak_rss_mb": 0.0, "loop_time_s": 0.0})
+        t["n"] += 1
+        t["wall_s"] += rec.get("wall_s", 0.0)
+        t["cpu_s"] += rec.get("cpu_user_s", 0.0) + rec.get("cpu_sys_s", 0.0)
+        t["peak_rss_mb"] = max(t["peak_rss_mb"], rec.get("peak_rss_mb", 0.0))
+        t["loop_time_s"] += rec.get("loop_time_s", 0.0)
+
+    print(f"📊 {len(records)} records in {report}")
+    print(f"{'stage':<12}{'n':>6}{'wall (s)':>12}{'cpu (s)':>12}{'rss (MB)':>10}{'loop (s)':>12}")
+    for name, t in sorted(totals.items(), key=lambda kv: -kv[1]["wall_s"]):
+        print(f"{name:<12}{t['n']:>6}{t['wall_s']:>12.1f}{t['cpu_s']:>12.1f}"
+              f"{t['peak_rss_mb']:>10.0f}{t['loop_time_s']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
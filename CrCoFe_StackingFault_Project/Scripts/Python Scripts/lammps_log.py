@@ -0,0 +1,246 @@
+"""
+lammps_log.py
+Single-pass, line-streaming parser for LAMMPS logs / redirected stdout (.out).
+
+One pass over the file picks up
+  - every thermo table (header line starting with "Step" up to "Loop time of"),
+  - the `print "Final <phase> box at <T> K: Lx=.. Ly=.. Lz=.."` line,
+  - run metadata (LAMMPS version, atom count, loop timings, total wall time,
+    the adaptive equilibration verdict of equilibrate.in, the
+    `print "Cells <phase>: nx ny nz"` replication counts),
+  - the legacy "Temperature:" / "Stacking fault energy:" lines.
+Lines are never held in memory; thermo values go straight into typed
+``array('d')`` columns. Use ``iter_log`` directly for constant-memory
+consumers (running averages, equilibration checks).
+
+Parsed runs are written as a typed columnar NumPy .npz (see write_columnar).
+"""
+
+import re
+from array import array
+
+import numpy as np
+
+# ---- Patterns --------------------------------------------------------------
+RE_VERSION = re.compile(r'^LAMMPS \((.+)\)')
+RE_LOOP = re.compile(
+    r'^Loop time of ([\d.eE+-]+) on (\d+) procs for (\d+) steps with (\d+) atoms')
+RE_PERF = re.compile(r'^Performance: .*?([\d.eE+-]+) timesteps/s')
+RE_NS_DAY = re.compile(r'([\d.eE+-]+) ns/day')
+RE_WALL = re.compile(r'^Total wall time: (\d+):(\d+):(\d+)')
+RE_FINAL_BOX = re.compile(
+    r'^Final (\w+) box at ([\d.]+) K: Lx=(\S+) Ly=(\S+) Lz=(\S+)')
+RE_BOX_SHAPE = re.compile(r'^\s*(?:Created )?(orthogonal|triclinic) box = ')
+RE_CELLS = re.compile(r'^Cells (\w+): (\d+) (\d+) (\d+)')
+RE_EQUIL = re.compile(r'^Equilibration (converged|not converged) after (\d+) steps')
+RE_TEMPERATURE = re.compile(r'Temperature:\s*(\d+)')
+RE_GAMMA = re.compile(r'Stacking fault energy:\s*([-+]?\d*\.\d+|\d+)')
+
+
+def _is_number(token):
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+# ---- Streaming -------------------------------------------------------------
+def iter_log(path):
+    """
+    Yield (kind, payload) events from a LAMMPS log, one line at a time:
+      ("thermo_header", [column names])  start of a new thermo table
+      ("thermo", [float values])         one thermo row
+      ("loop", {...})                    "Loop time of ..." (ends a table)
+      ("final_box", {...})               the print "Final ... box" line
+      ("meta", (key, value))             version, atoms, wall time, ...
+    """
+    columns = None
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            tokens = line.split()
+            if columns is not None:
+                if len(tokens) == len(columns) and _is_number(tokens[0]):
+                    try:
+                        yield "thermo", [float(t) for t in tokens]
+                        continue
+                    except ValueError:
+                        pass
+                if not line.startswith("Loop time of"):
+                    # WARNING lines etc. may interrupt a table without ending it
+                    if line.startswith("WARNING") or not tokens:
+                        continue
+                    columns = None
+            if not tokens:
+                continue
+
+            if tokens[0] == "Step" and not any(_is_number(t) for t in tokens):
+                columns = tokens
+                yield "thermo_header", list(tokens)
+                continue
+
+            m = RE_LOOP.match(line)
+            if m:
+                columns = None
+                yield "loop", {"time_s": float(m.group(1)), "procs": int(m.group(2)),
+                               "steps": int(m.group(3)), "atoms": int(m.group(4))}
+                continue
+            m = RE_FINAL_BOX.match(line)
+            if m:
+                yield "final_box", {"phase": m.group(1), "T": float(m.group(2)),
+                                    "Lx": float(m.group(3)), "Ly": float(m.group(4)),
+                                    "Lz": float(m.group(5))}
+                continue
+            m = RE_VERSION.match(line)
+            if m:
+                yield "meta", ("version", m.group(1))
+                continue
+            m = RE_PERF.match(line)
+            if m:
+                yield "meta", ("timesteps_per_s", float(m.group(1)))
+                m = RE_NS_DAY.search(line)
+                if m:
+                    yield "meta", ("ns_per_day", float(m.group(1)))
+                continue
+            m = RE_BOX_SHAPE.match(line)
+            if m:
+                yield "meta", ("triclinic", m.group(1) == "triclinic")
+                continue
+            m = RE_CELLS.match(line)
+            if m:
+                yield "meta", ("cells", tuple(int(g) for g in m.groups()[1:]))
+                continue
+            m = RE_EQUIL.match(line)
+            if m:
+                yield "meta", ("equilibrated", m.group(1) == "converged")
+                yield "meta", ("npt_steps", int(m.group(2)))
+                continue
+            m = RE_WALL.match(line)
+            if m:
+                h, mi, s = (int(g) for g in m.groups())
+                yield "meta", ("wall_s", 3600 * h + 60 * mi + s)
+                continue
+            # "Created 4000 atoms" (create_atoms) or "  2000 atoms" (read_data)
+            if (len(tokens) in (2, 3) and tokens[-1] == "atoms" and tokens[-2].isdigit()
+                    and tokens[0] in ("Created", tokens[-2])):
+                yield "meta", ("atoms", int(tokens[-2]))
+                continue
+            m = RE_TEMPERATURE.search(line)
+            if m:
+                yield "meta", ("temperature", int(m.group(1)))
+            m = RE_GAMMA.search(line)
+            if m:
+                yield "meta", ("gamma", float(m.group(1)))
+
+
+def parse_log(path, observers=()):
+    """
+    Collect iter_log events into
+      {"thermo": [{column: array('d')}, ...], "final_box": dict or None,
+       "loops": [dict, ...], "meta": {key: value}}
+    Every event is also passed to each observer(kind, payload), so streaming
+    consumers (e.g. lattice.box_observer) share the single pass.
+    """
+    run = {"thermo": [], "final_box": None, "loops": [], "meta": {}}
+    block = None
+    for kind, payload in iter_log(path):
+        for observer in observers:
+            observer(kind, payload)
+        if kind == "thermo_header":
+            block = {name: array('d') for name in payload}
+            run["thermo"].append(block)
+        elif kind == "thermo":
+            for col, value in zip(block.values(), payload):
+                col.append(value)
+        elif kind == "loop":
+            run["loops"].append(payload)
+        elif kind == "final_box":
+            run["final_box"] = payload
+        elif kind == "meta":
+            key, value = payload
+            # Keep the first legacy match, like re.search on the whole file
+            if key in ("temperature", "gamma"):
+                run["meta"].setdefault(key, value)
+            else:
+                run["meta"][key] = value
+    return run
+
+
+# ---- Columnar output -------------------------------------------------------
+def thermo_columns(runs):
+    """
+    Flatten {source: parsed run} into one typed thermo table:
+    source (str), block (int32), Step (int64) and one float64 column per
+    thermo keyword (NaN where a run did not print that keyword).
+    """
+    names = []
+    for run in runs.values():
+        for block in run["thermo"]:
+            names += [n for n in block if n != "Step" and n not in names]
+
+    sources, blocks, steps = [], [], []
+    values = {n: [] for n in names}
+    for source, run in runs.items():
+        for b, block in enumerate(run["thermo"]):
+            n = len(block["Step"]) if "Step" in block else 0
+            if n == 0:
+                continue
+            sources.append(np.full(n, source))
+            blocks.append(np.full(n, b, dtype=np.int32))
+            steps.append(np.frombuffer(block["Step"], dtype=np.float64).astype(np.int64))
+            for name in names:
+                if name in block:
+                    values[name].append(np.frombuffer(block[name], dtype=np.float64))
+                else:
+                    values[name].append(np.full(n, np.nan))
+
+    if not sources:
+        return {"source": np.array([], dtype=str), "block": np.array([], dtype=np.int32),
+                "Step": np.array([], dtype=np.int64)}
+    table = {"source": np.concatenate(sources), "block": np.concatenate(blocks),
+             "Step": np.concatenate(steps)}
+    for name in names:
+        table[name] = np.concatenate(values[name])
+    return table
+
+
+def concat_columns(tables):
+    """Row-wise union of columnar tables; missing float columns become NaN."""
+    tables = [t for t in tables if t and len(t["source"])]
+    if not tables:
+        return thermo_columns({})
+    names = []
+    for t in tables:
+        names += [n for n in t if n not in names]
+    merged = {}
+    for name in names:
+        parts = []
+        for t in tables:
+            if name in t:
+                parts.append(np.asarray(t[name]))
+            else:
+                parts.append(np.full(len(t["source"]), np.nan))
+        merged[name] = np.concatenate(parts)
+    return merged
+
+
+def select_rows(table, mask):
+    """Rows of a columnar table where mask is True."""
+    return {name: col[mask] for name, col in table.items()}
+
+
+def write_columnar(path, columns):
+    """Write {name: 1-D array} as a compressed .npz (no pickled objects)."""
+    arrays = {}
+    for name, col in columns.items():
+        col = np.asarray(col)
+        if col.dtype == object:
+            col = col.astype(str)
+        arrays[name] = col
+    np.savez_compressed(path, **arrays)
+
+
+def read_columnar(path):
+    """Inverse of write_columnar."""
+    with np.load(path, allow_pickle=False) as z:
+        return {name: z[name] for name in z.files}
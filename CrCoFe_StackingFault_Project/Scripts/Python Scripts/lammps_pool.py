@@ -0,0 +1,407 @@
+"""
+lammps_pool.py
+Pool of long-lived LAMMPS instances (library mode) for many short runs.
+
+Every `mpirun ... lmp` launch pays for process start-up and for parsing
+library.meam / CrCoFe.meam again; for minimizations, single points,
+benchmarks and GSFE points that start-up dominates. Here each worker
+process keeps one LAMMPS instance (the `lammps` Python module) with the
+MEAM potential loaded and takes jobs from the executor's queue. Between
+jobs only the atoms and the box are replaced:
+    delete_atoms group all
+    change_box all x final ... xy final ... units box
+    read_data <next structure> add merge
+and the fixes, computes, groups, regions, variables and dumps a job
+created are removed again, so the next job starts from a clean session.
+A job that raises inside LAMMPS discards its instance (the next job
+gets a fresh one).
+
+A job is a dict
+    {"name": "Cr0.50_Co0.25_Fe0.25/fcc_relax",
+     "data": "/abs/path/structure.data",         # box and atoms
+     "commands": ["min_style cg", "minimize 0.0 1.0e-6 1000 10000"],
+     "results": {"E(eV)": "pe", "V(Å³)": "vol"}}  # equal-style expressions
+and its result holds the evaluated "results", the status and the log.
+
+Without the LAMMPS Python module (or with --backend subprocess) the same
+jobs run as standalone input files through run_sweep.run_job. For tests
+without LAMMPS, pass engine_factory=mock_engine (or --backend mock).
+
+Usage
+-----
+python lammps_pool.py structures/*.data --minimize --workers 8
+python lammps_pool.py a.data b.data --backend subprocess --lmp lmp_mpi --ranks 1
+
+Output
+------
+- Results/pool/logs/<job>.log (one LAMMPS log per job)
+- -o energies.csv (optional)
+"""
+
+import argparse
+import csv
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from types import SimpleNamespace
+
+import instrument
+import run_sweep
+
+try:
+    from lammps import lammps as _lammps
+except (ImportError, OSError):
+    _lammps = None
+
+POOL_DIR = "pool"       # under the work dir: logs/, inputs/
+SETUP = ["units           metal",
+         "atom_style      atomic",
+         "boundary        p p p"]
+POTENTIAL = ["pair_style      meam",
+             'pair_coeff      * * "{library}" Cr Co Fe "{meam}" Cr Co Fe',
+             "neighbor        2.0 bin",
+             "neigh_modify    delay 0 every 1 check yes"]
+RESULT_VAR = "pool_result"
+
+RE_RESULT = re.compile(r'^Result (\d+) = (\S+)$')
+
+# Per worker process: its LAMMPS instance and whether a structure is loaded
+_WORKER = {"factory": None, "engine": None, "loaded": False}
+
+
+# ---- Engines ---------------------------------------------------------------
+def lammps_engine():
+    """A serial LAMMPS instance without screen or log output."""
+    if _lammps is None:
+        raise RuntimeError("the LAMMPS Python module is not installed")
+    return _lammps(cmdargs=["-screen", "none", "-log", "none", "-nocite"])
+
+
+def mock_engine(values=None):
+    """
+    Stand-in with the engine interface used here (command, extract_variable,
+    close). It records every command in .history; extract_variable returns
+    values[expression] (0.0 by default) for the last defined result variable.
+    """
+    values = values or {}
+    engine = SimpleNamespace(history=[], closed=False)
+    defined = {}
+
+    def command(line):
+        engine.history.append(line)
+        words = line.split(None, 3)
+        if len(words) == 4 and words[0] == "variable" and words[2] == "equal":
+            defined[words[1]] = words[3]
+
+    def extract_variable(name, group=None, vartype=None):
+        return float(values.get(defined.get(name), 0.0))
+
+    def close():
+        engine.closed = True
+
+    engine.command, engine.extract_variable, engine.close = command, extract_variable, close
+    return engine
+
+
+def library_available():
+    """True when a LAMMPS instance can actually be created in this environment."""
+    try:
+        lammps_engine().close()
+    except Exception:
+        return False
+    return True
+
+
+# ---- Commands --------------------------------------------------------------
+def potential_commands(potentials_dir=run_sweep.POTENTIALS_DIR):
+    paths = {"library": os.path.abspath(os.path.join(potentials_dir, 'library.meam')),
+             "meam": os.path.abspath(os.path.join(potentials_dir, 'CrCoFe.meam'))}
+    return [line.format(**paths) for line in POTENTIAL]
+
+
+def read_box(path):
+    """Box bounds and tilt factors from the header of a LAMMPS data file."""
+    box = {"xy": 0.0, "xz": 0.0, "yz": 0.0, "triclinic": False}
+    with open(path, 'r') as f:
+        next(f)                                 # comment line
+        for line in f:
+            words = line.split()
+            if line.strip() in ("Atoms", "Masses") or (words and words[0] == "Atoms"):
+                break
+            for axis in "xyz":
+                if words[2:4] == [f"{axis}lo", f"{axis}hi"]:
+                    box[f"{axis}lo"], box[f"{axis}hi"] = float(words[0]), float(words[1])
+            if words[3:6] == ["xy", "xz", "yz"]:
+                box["xy"], box["xz"], box["yz"] = (float(v) for v in words[:3])
+                box["triclinic"] = True
+    return box
+
+
+def first_structure_commands(data, potentials_dir=run_sweep.POTENTIALS_DIR):
+    """Session set-up: read the first structure, load the potential."""
+    # Triclinic from the start, so any later box shape can be set in place
+    return (SETUP + [f'read_data       "{data}"', "change_box      all triclinic"]
+            + potential_commands(potentials_dir))
+
+
+def next_structure_commands(data):
+    """Swap atoms and box for another structure, keeping the potential."""
+    b = read_box(data)
+    lines = ["delete_atoms    group all",
+             f"change_box      all x final {b['xlo']!r} {b['xhi']!r} y final {b['ylo']!r} {b['yhi']!r} "
+             f"z final {b['zlo']!r} {b['zhi']!r} xy final {b['xy']!r} xz final {b['xz']!r} "
+             f"yz final {b['yz']!r} units box"]
+    if b["triclinic"]:
+        return lines + [f'read_data       "{data}" add merge', "reset_timestep  0"]
+    # read_data cannot merge an orthogonal file into a triclinic box
+    return lines + ["change_box      all ortho", f'read_data       "{data}" add merge',
+                    "change_box      all triclinic", "reset_timestep  0"]
+
+
+def cleanup_commands(commands):
+    """Commands that remove what `commands` defined, in reverse order."""
+    undo = {}
+
+    def add(key):
+        undo.pop(key, None)                 # redefined: undo at its new position
+        undo[key] = True
+
+    for line in commands:
+        words = line.split()
+        if len(words) < 2:
+            continue
+        cmd, name = words[0], words[1]
+        if cmd in ("unfix", "uncompute", "undump"):
+            undo.pop(f"{cmd} {name}", None)     # already removed by the job itself
+        elif cmd == "fix":
+            add(f"unfix {name}")
+        elif cmd == "compute":
+            add(f"uncompute {name}")
+        elif cmd == "dump":
+            add(f"undump {name}")
+        elif cmd in ("group", "region", "variable") and name != "all":
+            if words[2:3] == ["delete"]:
+                undo.pop(f"{cmd} {name} delete", None)
+            elif words[2:3] != ["clear"]:
+                add(f"{cmd} {name} delete")
+    # The last definition undone first
+    return list(reversed(undo))
+
+
+def standalone_script(job, potentials_dir=run_sweep.POTENTIALS_DIR):
+    """The job as an input file for the subprocess path ('Result ...' lines)."""
+    lines = first_structure_commands(job["data"], potentials_dir) + list(job["commands"])
+    # Results by index: LAMMPS does not pass non-ASCII names through unchanged
+    lines += [f'print           "Result {i} = $({expr}:%.12g)"'
+              for i, expr in enumerate(job.get("results", {}).values())]
+    return "\n".join(lines) + "\n"
+
+
+def _slug(name):
+    return re.sub(r'[^\w.-]+', '_', name)
+
+
+def job_log(job):
+    """Log path of a job, relative to <work-dir>/pool."""
+    return os.path.join("logs", f"{_slug(job['name'])}.log")
+
+
+# ---- Library backend -------------------------------------------------------
+def _init_worker(factory):
+    _WORKER.update(factory=factory, engine=None, loaded=False)
+
+
+def _discard_engine():
+    if _WORKER["engine"] is not None:
+        try:
+            _WORKER["engine"].close()
+        except Exception:
+            pass
+    _WORKER.update(engine=None, loaded=False)
+
+
+def _execute(job, log_path, potentials_dir):
+    """Run one job in this worker's instance; returns (status, results, error)."""
+    if _WORKER["engine"] is None:
+        try:
+            _WORKER["engine"] = _WORKER["factory"]()
+        except Exception as exc:
+            return "no_engine", {}, str(exc)
+    engine = _WORKER["engine"]
+    try:
+        engine.command(f'log "{log_path}"')
+        if _WORKER["loaded"]:
+            setup = next_structure_commands(job["data"])
+        else:
+            setup = first_structure_commands(job["data"], potentials_dir)
+        for line in setup:
+            engine.command(line)
+        _WORKER["loaded"] = True
+        for line in job["commands"]:
+            engine.command(line)
+        results = {}
+        for i, (name, expr) in enumerate(job.get("results", {}).items()):
+            engine.command(f"variable {RESULT_VAR} equal {expr}")
+            results[name] = engine.extract_variable(RESULT_VAR)
+            engine.command(f"variable {RESULT_VAR} delete")
+            engine.command(f'print "Result {i} = {results[name]!r}"')
+        for line in cleanup_commands(job["commands"]):
+            engine.command(line)
+        engine.command("log none")
+    except Exception as exc:
+        # Unknown state after a LAMMPS error: start the next job on a fresh instance
+        _discard_engine()
+        return "failed", {}, str(exc)
+    return "ok", results, None
+
+
+def run_library_job(job, work_dir, potentials_dir=run_sweep.POTENTIALS_DIR):
+    """One job in the calling worker's persistent instance (pool task)."""
+    log_path = os.path.abspath(os.path.join(work_dir, POOL_DIR, job_log(job)))
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    out = {}
+    start = time.time()
+    resources = instrument.measure(
+        lambda: out.update(zip(("status", "results", "error"),
+                               _execute(job, log_path, potentials_dir))))
+    return {"job": job, "backend": "library", "wall_s": time.time() - start,
+            "log": log_path, "resources": resources, **out}
+
+
+# ---- Subprocess backend ----------------------------------------------------
+def run_subprocess_job(job, work_dir, lmp="lmp", mpirun="mpirun", ranks=1, timeout=None,
+                       potentials_dir=run_sweep.POTENTIALS_DIR):
+    """One job as its own LAMMPS process (the fallback path)."""
+    slug = _slug(job["name"])
+    script = os.path.join(POOL_DIR, "inputs", f"{slug}.in")
+    os.makedirs(os.path.join(work_dir, POOL_DIR, "inputs"), exist_ok=True)
+    with open(os.path.join(work_dir, script), 'w') as f:
+        f.write(standalone_script(job, potentials_dir))
+    sweep_job = {"name": job["name"], "composition": POOL_DIR, "input": script,
+                 "variables": {}, "log": job_log(job)}
+    res = run_sweep.run_job(sweep_job, work_dir, lmp, mpirun, ranks, timeout)
+
+    names = list(job.get("results", {}))
+    results = {}
+    with open(res["log"], 'r', errors='replace') as f:
+        for line in f:
+            m = RE_RESULT.match(line.strip())
+            if m and int(m.group(1)) < len(names):
+                results[names[int(m.group(1))]] = float(m.group(2))
+    return {"job": job, "backend": "subprocess", "status": res["status"], "results": results,
+            "error": None if res["status"] == "ok" else f"exit {res['returncode']}",
+            "wall_s": res["wall_s"], "log": res["log"], "resources": res["resources"]}
+
+
+# ---- Pool ------------------------------------------------------------------
+def choose_backend(backend="auto", engine_factory=None):
+    """'library' or 'subprocess' for the requested backend."""
+    if backend == "auto":
+        return "library" if engine_factory is not None or library_available() else "subprocess"
+    return backend
+
+
+def report_result(report, res):
+    rec = {"stage": "lammps_pool", "job": res["job"]["name"], "backend": res["backend"],
+           "status": res["status"], "wall_s": res["wall_s"], **res.get("resources", {})}
+    instrument.write_record(report, rec)
+
+
+def run_pool(jobs, work_dir=run_sweep.RESULTS_DIR, workers=None, backend="auto",
+             engine_factory=None, lmp="lmp", mpirun=None, ranks=1, timeout=None,
+             potentials_dir=run_sweep.POTENTIALS_DIR, report=None):
+    """
+    Run `jobs` on `workers` persistent LAMMPS instances, or as separate
+    processes when library mode is unavailable. Jobs whose worker cannot
+    create an instance are rerun on the subprocess path.
+    """
+    workers = workers or os.cpu_count() or 1
+    backend = choose_backend(backend, engine_factory)
+    print(f"🚀 {len(jobs)} jobs on {workers} {backend} workers")
+    fallback = partial(run_subprocess_job, work_dir=work_dir, lmp=lmp, mpirun=mpirun,
+                       ranks=ranks, timeout=timeout, potentials_dir=potentials_dir)
+
+    results, retry = [], []
+    if backend == "library":
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(engine_factory or lammps_engine,)) as pool:
+            futures = [pool.submit(run_library_job, job, work_dir, potentials_dir)
+                       for job in jobs]
+            for future in as_completed(futures):
+                res = future.result()
+                if res["status"] == "no_engine":
+                    retry.append(res["job"])
+                else:
+                    results.append(res)
+        if retry:
+            print(f"⚠️ No LAMMPS instance for {len(retry)} jobs, running them as processes")
+    else:
+        retry = list(jobs)
+
+    if retry:
+        with ThreadPoolExecutor(max_workers=max(1, workers // ranks)) as pool:
+            results += pool.map(fallback, retry)
+
+    for res in results:
+        report_result(report, res)
+        mark = "✅" if res["status"] == "ok" else "❌"
+        print(f"{mark} {res['job']['name']} ({res['backend']}) {res['status']} "
+              f"in {res['wall_s']:.2f} s")
+    return results
+
+
+# ---- CLI -------------------------------------------------------------------
+def structure_jobs(paths, minimize=False):
+    """Energy (optionally after a static relaxation) of every data file."""
+    commands = (["min_style       cg", "minimize        0.0 1.0e-6 1000 10000"]
+                if minimize else ["run             0"])
+    return [{"name": os.path.splitext(os.path.basename(path))[0],
+             "data": os.path.abspath(path), "commands": commands,
+             "results": {"E(eV)": "pe", "atoms": "atoms", "E/atom(eV)": "pe/atoms",
+                         "V(Å³)": "vol"}}
+            for path in paths]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run many short LAMMPS jobs on a pool of instances.")
+    p.add_argument("data", nargs="+", help="LAMMPS data files")
+    p.add_argument("--minimize", action="store_true", help="relax before reporting")
+    p.add_argument("--backend", choices=["auto", "library", "subprocess", "mock"],
+                   default="auto")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--work-dir", default=run_sweep.RESULTS_DIR)
+    p.add_argument("--lmp", default="lmp", help="subprocess backend: LAMMPS executable")
+    p.add_argument("--mpirun", default="none", help="subprocess backend: MPI launcher")
+    p.add_argument("--ranks", type=int, default=1, help="subprocess backend: ranks per job")
+    p.add_argument("--timeout", type=float, default=None)
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    p.add_argument("-o", "--output", default=None, help="CSV of the results")
+    args = p.parse_args(argv)
+
+    jobs = structure_jobs(args.data, args.minimize)
+    backend, factory = args.backend, None
+    if backend == "mock":
+        backend, factory = "library", mock_engine
+    mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+    with instrument.stage("lammps_pool", report=args.report, jobs=len(jobs)):
+        results = run_pool(jobs, args.work_dir, args.workers, backend, factory, args.lmp,
+                           mpirun, args.ranks, args.timeout, report=args.report)
+
+    fields = ["structure", "status", "backend"] + list(jobs[0]["results"]) if jobs else []
+    rows = [{"structure": r["job"]["name"], "status": r["status"], "backend": r["backend"],
+             **r["results"]} for r in sorted(results, key=lambda r: r["job"]["name"])]
+    for row in rows:
+        print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"✅ {len(rows)} results written to: {args.output}")
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+"""
+lattice.py
+Per-cell lattice parameters (a, c, c/a) from time-averaged box lengths.
+
+The box lengths Lx, Ly, Lz (and PotEng, for the energy per atom) of the NPT
+thermo rows are accumulated while the
+log is streamed (constant memory, see box_observer): one Welford accumulator
+per bin of BIN_STEPS steps. At the end the bins of the production part (the
+last PRODUCTION fraction of the NPT run) are merged into the mean, and the
+spread of the bin means gives the standard error (block averaging).
+
+The averages are divided by the replication counts of each phase's cell:
+  fcc   cubic cell a                       Lx, Ly, Lz = n a
+        (close-packed triclinic cell,       lx = nx a/√2, ly = ny √3/2 a/√2,
+         e.g. an SQS)                       lz = nrepeats √3 a)
+  hcp   LAMMPS hcp lattice, a × √3a × c    Lx = nx a, Ly = ny √3 a, Lz = nz c
+  dhcp  supercell.py triclinic cell        lx = nx a, ly = ny (√3/2) a,
+        (c = 4 layers, ABAC)               lz = nrepeats c
+The counts come from the `Cells <phase>: nx ny nz` line printed by the
+LAMMPS inputs, or from REPLICAS for older logs. A hexagonal phase built as a
+triclinic box (supercell.py) uses the √3/2 row spacing whatever its name.
+
+    rec = lattice_from_log("Cr0.33_Co0.33_Fe0.34/out_files/log_hcp_300K.out", "hcp")
+    rec["a"], rec["a_sem"], rec["c"], rec["c/a"], rec["E"]
+
+Ensemble members (log_hcp_300K_r1.out, ... from run_sweep.py --realizations)
+are separate records; lattice_rows averages them (ensemble.py).
+"""
+
+import re
+from functools import reduce
+
+import numpy as np
+
+from ensemble import ensemble_stats
+from equilibration import welford_init, welford_merge, welford_result, welford_update
+from lammps_log import iter_log
+
+# Replication counts of the inputs in Lammps Scripts/ (nx, ny, nz / nrepeats)
+REPLICAS = {"fcc": (10, 10, 10), "hcp": (10, 10, 10), "dhcp": (10, 10, 5)}
+BIN_STEPS = 1000        # steps per running-average bin
+PRODUCTION = 0.5        # fraction of the NPT run averaged over
+
+# log_<phase>_<T>K.out, or log_<phase>_<T>K_r<member>.out for ensemble members
+RE_LOG_NAME = re.compile(r'^log_(\w+?)_(\d+(?:\.\d+)?)K(?:_r(\d+))?\.out$')
+BOX_COLUMNS = ("Step", "Temp", "Lx", "Ly", "Lz")
+ENERGY_COLUMN = "PotEng"
+
+
+# ---- Streaming -------------------------------------------------------------
+def box_observer(bin_steps=BIN_STEPS):
+    """
+    (observer, state): feed observer(kind, payload) every iter_log event;
+    state collects the binned Welford accumulators of (Lx, Ly, Lz, PotEng)
+    over the NPT rows (Temp > 0, i.e. not the minimization), the Cells line,
+    the box shape and the number of atoms. PotEng is NaN in tables without it.
+    """
+    state = {"bins": {}, "columns": None, "energy": None, "last": -1.0, "cells": None,
+             "triclinic": None, "atoms": None, "bin_steps": bin_steps}
+
+    def observer(kind, payload):
+        if kind == "thermo_header":
+            state["columns"] = ([payload.index(c) for c in BOX_COLUMNS]
+                                if all(c in payload for c in BOX_COLUMNS) else None)
+            state["energy"] = (payload.index(ENERGY_COLUMN) if ENERGY_COLUMN in payload
+                               else None)
+        elif kind == "thermo" and state["columns"]:
+            i_step, i_temp, *i_box = state["columns"]
+            step = payload[i_step]
+            if payload[i_temp] == 0.0:
+                return
+            if step < state["last"]:
+                state["bins"] = {}          # reset_timestep: a new NPT run
+            elif step == state["last"]:
+                return                      # first row of a continuation run
+            state["last"] = step
+            b = int(step // bin_steps)
+            if b not in state["bins"]:
+                state["bins"][b] = welford_init(4)
+            energy = payload[state["energy"]] if state["energy"] is not None else np.nan
+            welford_update(state["bins"][b], [payload[i] for i in i_box] + [energy])
+        elif kind == "meta" and payload[0] == "cells":
+            state["cells"] = payload[1]
+        elif kind == "meta" and payload[0] == "triclinic":
+            state["triclinic"] = payload[1]
+        elif kind == "meta" and payload[0] == "atoms":
+            state["atoms"] = payload[1]
+
+    return observer, state
+
+
+def box_averages(state, production=PRODUCTION):
+    """
+    Mean and SEM of (Lx, Ly, Lz, PotEng) over the bins of the last `production`
+    fraction of the NPT run, or None without NPT rows.
+    """
+    bins = state["bins"]
+    if not bins:
+        return None
+    keys = sorted(bins)
+    start = keys[-1] - production * (keys[-1] - keys[0] + 1)
+    kept = [bins[k] for k in keys if k > start]
+    mean, _ = welford_result(reduce(welford_merge, kept))
+    if len(kept) > 1:
+        means = np.array([b["mean"] for b in kept])
+        sem = means.std(axis=0, ddof=1) / np.sqrt(len(kept))
+    else:
+        sem = np.full(4, np.nan)
+    return {"mean": mean, "sem": sem, "samples": sum(b["n"] for b in kept),
+            "from_step": int(min(k for k in keys if k > start) * state["bin_steps"])}
+
+
+# ---- Per-cell parameters ---------------------------------------------------
+def cell_parameters(phase, box, cells, triclinic=None):
+    """a, c, c/a (Å) and their SEMs from box averages and replication counts."""
+    per = box["mean"][:3] / np.asarray(cells, dtype=float)
+    dper = box["sem"][:3] / np.asarray(cells, dtype=float)
+    if phase == "fcc" and triclinic:
+        # Close-packed cell (supercell.py / sqs.py): a/√2 along x, √3/2 a/√2
+        # along y, three {111} layers (√3 a) per repeat along z
+        per = per * [np.sqrt(2.0), np.sqrt(8.0 / 3.0), 1.0 / np.sqrt(3.0)]
+        dper = dper * [np.sqrt(2.0), np.sqrt(8.0 / 3.0), 1.0 / np.sqrt(3.0)]
+    if phase == "fcc":
+        return {"a": float(per.mean()), "a_sem": float(np.sqrt(np.sum(dper ** 2)) / 3)}
+
+    if triclinic is None:
+        triclinic = phase != "hcp"
+    # Row spacing along y: √3/2 a (triclinic) or √3 a per orthogonal hcp cell
+    row = np.sqrt(3.0) / 2 if triclinic else np.sqrt(3.0)
+    a = 0.5 * (per[0] + per[1] / row)
+    a_sem = 0.5 * np.hypot(dper[0], dper[1] / row)
+    c, c_sem = per[2], dper[2]
+    return {"a": float(a), "a_sem": float(a_sem), "c": float(c), "c_sem": float(c_sem),
+            "c/a": float(c / a), "c/a_sem": float(c / a * np.hypot(c_sem / c, a_sem / a))}
+
+
+def lattice_record(state, phase, production=PRODUCTION, replicas=REPLICAS):
+    """Per-cell parameters for a finished box_observer state, or None."""
+    box = box_averages(state, production)
+    cells = state["cells"] or replicas.get(phase)
+    if box is None or cells is None:
+        return None
+    rec = cell_parameters(phase, box, cells, state["triclinic"])
+    rec.update(samples=box["samples"], from_step=box["from_step"], cells=list(cells))
+    if state["atoms"] and np.isfinite(box["mean"][3]):
+        # Potential energy per atom (eV/atom), time-averaged like the box
+        rec.update(E=float(box["mean"][3] / state["atoms"]),
+                   E_sem=float(box["sem"][3] / state["atoms"]), atoms=state["atoms"])
+    return rec
+
+
+def lattice_from_log(path, phase, production=PRODUCTION, replicas=REPLICAS,
+                     bin_steps=BIN_STEPS):
+    """Stream one log and return its per-cell lattice parameters."""
+    observer, state = box_observer(bin_steps)
+    for kind, payload in iter_log(path):
+        observer(kind, payload)
+    return lattice_record(state, phase, production, replicas)
+
+
+# ---- Tables ----------------------------------------------------------------
+def lattice_columns():
+    """Lattice_all.csv columns: the legacy ones, then their standard errors."""
+    cols = ["composition", "T(K)", "a_fcc(Å)", "a_hcp(Å)", "c_hcp(Å)", "c/a_hcp",
+            "a_dhcp(Å)", "c_dhcp(Å)", "c/a_dhcp"]
+    return cols + [f"σ_{c}" for c in cols[2:]]
+
+
+def lattice_rows(records):
+    """
+    One row per (composition, T) from records
+    {"composition", "T", "phase", "a", "a_sem", ..., "realization"}.
+    Several ensemble members of a phase are averaged; σ is then the ensemble
+    standard error instead of the time-averaging one.
+    """
+    members = {}
+    for rec in records:
+        members.setdefault((rec["composition"], rec["T"], rec["phase"]), []).append(rec)
+    rows = {}
+    for (comp, T, phase), recs in sorted(members.items()):
+        row = rows.setdefault((comp, T), {"composition": comp, "T(K)": T})
+        for key, unit in (("a", "(Å)"), ("c", "(Å)"), ("c/a", "")):
+            if key not in recs[0]:
+                continue
+            if len(recs) == 1:
+                mean, sem = recs[0][key], recs[0][f"{key}_sem"]
+            else:
+                mean, _, sem = ensemble_stats([r[key] for r in recs])
+            row[f"{key}_{phase}{unit}"] = mean
+            row[f"σ_{key}_{phase}{unit}"] = sem
+    return [rows[k] for k in sorted(rows)]
@@ -3,13 +3,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import ternary
-from scipy.interpolate import LinearNDInterpolator
 import re
 
+from ternary_grid import interpolate, interpolation_weights, to_cartesian
+
 # 🧭 Paths
 BASE_DIR = os.path.join("..", "..", "Results", "All the results compiled")
 OUTPUT_DIR = os.path.join("..", "..", "Plots", "ternary_Lattice_plots")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # 🎯 Properties and Temperatures
 LATTICE_PROPERTIES = ["a_fcc(Å)", "a_hcp(Å)", "a_dhcp(Å)"]
@@ -43,25 +43,15 @@ def make_ternary_plot(df, property_name, temperature, output_dir):
     points = data[["Cr", "Co", "Fe"]].values
     values = data[property_name].values
 
-    interp = LinearNDInterpolator(points, values, fill_value=np.nan)
-
-    step = 0.02
-    grid = []
-    for i in np.arange(0, 1 + step, step):
-        for j in np.arange(0, 1 - i + step, step):
-            k = 1 - i - j
-            if k >= 0:
-                grid.append((i, j, k))
-    grid = np.array(grid)
-
-    grid_z = interp(grid)
+    # Grid + barycentric weights are shared by every property at this T
+    w = interpolation_weights(points, step=0.02)
+    grid_z = interpolate(w, values)
     grid_z = np.nan_to_num(grid_z, nan=np.nanmean(values))
 
     fig, tax = ternary.figure(scale=1.0)
     fig.set_size_inches(7, 6)
 
-    x = [p[1] + 0.5 * p[2] for p in grid]
-    y = [np.sqrt(3) / 2 * p[2] for p in grid]
+    x, y = to_cartesian(w["grid"])
 
     cntr = plt.tricontourf(x, y, grid_z, levels=15, cmap="viridis")
 
@@ -88,6 +78,7 @@ def make_ternary_plot(df, property_name, temperature, output_dir):
 
 
 def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     csv_path = os.path.join(BASE_DIR, "Lattice_all.csv")
     df = pd.read_csv(csv_path)
     df = extract_compositions(df)
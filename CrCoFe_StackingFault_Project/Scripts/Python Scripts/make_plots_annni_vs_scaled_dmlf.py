@@ -4,19 +4,27 @@ Reads ANNNI_vs_DMLF_calibrated.csv and plots:
   - γ_ISF:  ANNNI vs Scaled DMLF
   - γ_ESF:  ANNNI vs Scaled DMLF
   - γ_Twin: ANNNI vs Scaled DMLF
+With σ_γ_<kind>_ANNNI columns (ensemble runs) the ANNNI curves get a ±σ band.
+Tables without γ_<kind>_DMLF_scaled (make_csv_annni_vs_dmlf.py --sfe
+Ensemble_all.csv) are plotted as ANNNI curves alone. Tables without the
+four target compositions show every composition they hold; an empty table
+is skipped.
 
 Output
 ------
-- Shows three figures interactively (save as needed from your IDE),
-  or uncomment plt.savefig(...) lines to write PDFs/PNGs.
+- <kind>_ANNNI_vs_scaledDMLF.png for ISF, ESF and Twin (non-interactive,
+  nothing blocks on plt.show()).
 """
 
+import os
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 IN_FILE = "ANNNI_vs_DMLF_calibrated.csv"
-
-df = pd.read_csv(IN_FILE)
+OUTPUT_DIR = "."
 
 targets = [
     "Cr0.00_Co0.00_Fe1.00",
@@ -26,23 +34,58 @@ targets = [
 ]
 labels = ["Cr0Fe1", "Cr0.33Co0.33Fe0.33", "Cr0.50Co0.25Fe0.25", "Cr0.67Co0.17Fe0.17"]
 linestyles = {"ANNNI": "-", "Scaled DMLF": "--"}
+kinds = {
+    "ISF": "Intrinsic Stacking Fault Energy",
+    "ESF": "Extrinsic Stacking Fault Energy",
+    "Twin": "Twin Fault Energy",
+}
+
+
+def output_name(kind):
+    return f"{kind}_ANNNI_vs_scaledDMLF.png"
 
-def plot_one(kind, title):
+
+def curves(df):
+    """
+    (composition, label) pairs to plot: the four targets present in the table,
+    or, for tables of other compositions (make_csv_annni_vs_dmlf.py --all on
+    our own runs), every composition in it.
+    """
+    present = set(df["composition"])
+    chosen = [(c, l) for c, l in zip(targets, labels) if c in present]
+    return chosen or [(c, c) for c in sorted(present)]
+
+
+def plot_one(df, kind, title, output_dir=OUTPUT_DIR):
+    if df.empty:
+        print(f"⚠️ No rows in the ANNNI table: {output_name(kind)} skipped")
+        return
     plt.figure(figsize=(10,6))
-    for comp, label in zip(targets, labels):
+    for comp, label in curves(df):
         sub = df[df["composition"]==comp].sort_values("T(K)")
-        plt.plot(sub["T(K)"], sub[f"γ_{kind}_ANNNI"],
-                 linestyle=linestyles["ANNNI"], linewidth=2, label=f"{label} ANNNI")
-        plt.plot(sub["T(K)"], sub[f"γ_{kind}_DMLF_scaled"],
-                 linestyle=linestyles["Scaled DMLF"], linewidth=2, label=f"{label} Scaled DMLF")
-    plt.title(f"{title}: ANNNI vs Scaled DMLF", fontsize=14)
+        line, = plt.plot(sub["T(K)"], sub[f"γ_{kind}_ANNNI"],
+                         linestyle=linestyles["ANNNI"], linewidth=2, label=f"{label} ANNNI")
+        if f"σ_γ_{kind}_ANNNI" in sub:
+            err = sub[f"σ_γ_{kind}_ANNNI"]
+            plt.fill_between(sub["T(K)"], sub[f"γ_{kind}_ANNNI"] - err,
+                             sub[f"γ_{kind}_ANNNI"] + err, color=line.get_color(), alpha=0.2)
+        if f"γ_{kind}_DMLF_scaled" in sub:
+            plt.plot(sub["T(K)"], sub[f"γ_{kind}_DMLF_scaled"],
+                     linestyle=linestyles["Scaled DMLF"], linewidth=2,
+                     label=f"{label} Scaled DMLF")
+    versus = ": ANNNI vs Scaled DMLF" if f"γ_{kind}_DMLF_scaled" in df else ": ANNNI"
+    plt.title(f"{title}{versus}", fontsize=14)
     plt.xlabel("Temperature (K)", fontsize=12)
     plt.ylabel("γ (mJ/m²)", fontsize=12)
     plt.grid(True, linestyle="--", alpha=0.5)
     plt.legend(ncol=2)
-    # plt.savefig(f"{kind}_ANNNI_vs_scaledDMLF.pdf", bbox_inches="tight")
-    plt.show()
+    output_file = os.path.join(output_dir, output_name(kind))
+    plt.savefig(output_file, dpi=300, bbox_inches="tight")
+    plt.close()
+    print(f"✅ Saved: {output_file}")
+
 
-plot_one("ISF",  "Intrinsic Stacking Fault Energy")
-plot_one("ESF",  "Extrinsic Stacking Fault Energy")
-plot_one("Twin", "Twin Fault Energy")
+if __name__ == "__main__":
+    df = pd.read_csv(IN_FILE)
+    for kind, title in kinds.items():
+        plot_one(df, kind, title)
@@ -0,0 +1,387 @@
+"""
+pipeline.py
+One entry point for the whole workflow: LAMMPS sweep → compiled tables →
+ANNNI comparison → figures.
+
+Every stage is an existing script whose main(argv) is called with the
+configured paths:
+  run      run_sweep.py                     Results/<composition>/out_files/*.out
+  extract  extract_energies_and_lattice.py  Results/All_Results_Compiled/*_all.csv
+  annni    make_csv_annni_vs_dmlf.py        ANNNI_vs_DMLF_calibrated.csv
+  plot     render_plots.py                  Plots/ (+ .render_manifest.json)
+
+The dependencies are not written down: a stage depends on every stage that
+produces one of its inputs, so changing a path in the config rewires the
+DAG. As in make, a stage is outdated when one of its outputs is missing or
+older than its newest input (the stage's own scripts count as inputs), and
+only outdated stages on the way to the target are rerun. A stage that failed
+stays outdated until it succeeds (results_dir/.pipeline_failed.json), even
+if it wrote its outputs, e.g. the manifest of a partly rendered plot stage.
+The run stage takes hours, so it only runs when it is the target; otherwise
+it is reported.
+extract stops the pipeline when no *.out file exists yet, instead of
+writing empty tables.
+
+With --from-runs the ANNNI table and the plots use the tables compiled from
+our own runs (Ensemble_all.csv, Lattice_all.csv under results_dir), so
+re-running one composition reaches the ternary and SFE vs T plots as well.
+The ANNNI table then covers every composition of the runs (--all), not only
+the four DMLF targets.
+Every stage writes its timings to one run report (report, default
+results_dir/run_report.jsonl; '' disables it), and the plots keep their
+ternary interpolation cache in results_dir/.ternary_cache.
+
+The stage modules (and numpy / pandas / matplotlib behind them) are imported
+only when that stage runs; `status` imports none of them.
+
+Usage
+-----
+python pipeline.py status                 # DAG and what is outdated
+python pipeline.py plot                   # annni (if outdated), then plot
+python pipeline.py plot --from-runs -n    # extract → annni → plot from our own runs
+python pipeline.py all -n                 # dry run of every stage but run
+python pipeline.py run -- --cores 64      # arguments after -- go to the target stage
+python pipeline.py plot --force           # rerun the target even if up to date
+python pipeline.py plot --config paths.json --plots-dir /tmp/plots
+
+Config
+------
+--config takes a JSON object with any of the keys below (relative paths are
+taken relative to the config file); command-line options override it:
+  results_dir    Results/ of run_sweep.py (compiled tables in All_Results_Compiled/)
+  data_dir       curated SFE_all.csv and Lattice_all.csv
+  annni_csv      ANNNI vs DMLF table
+  plots_dir      figures
+  compositions   composition list of the sweep
+  from_runs      ANNNI and plots from results_dir tables instead of data_dir
+  report         run report of every stage ('' to disable)
+"""
+
+import argparse
+import fnmatch
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..')
+PROJECT_DIR = os.path.join(SCRIPTS_DIR, '..')
+
+DEFAULTS = {
+    "results_dir": os.path.join(SCRIPTS_DIR, 'Results'),
+    "data_dir": os.path.join(PROJECT_DIR, 'All_the_results_compiled'),
+    "annni_csv": os.path.join(PROJECT_DIR, 'ANNNI_vs_DMLF model comparisions',
+                              'ANNNI_vs_DMLF_calibrated.csv'),
+    "plots_dir": os.path.join(PROJECT_DIR, 'Plots'),
+    "compositions": os.path.join(PROJECT_DIR, 'Benchmarking', 'compositions.txt'),
+    "from_runs": False,
+    "report": None,         # results_dir/run_report.jsonl
+}
+PATH_KEYS = ["results_dir", "data_dir", "annni_csv", "plots_dir", "compositions", "report"]
+REPORT_FILE = 'run_report.jsonl'
+TERNARY_CACHE = '.ternary_cache'     # interpolation weights of the plots, under results_dir
+FAILED_FILE = '.pipeline_failed.json'  # {stage: outputs} of stages whose last run failed
+TARGETS = ["run", "extract", "annni", "plot"]
+
+
+def _show(path):
+    """Path relative to the project when it is inside it, for messages."""
+    rel = os.path.relpath(path, PROJECT_DIR)
+    return path if rel.startswith('..') else rel
+
+
+def _sources(*modules):
+    return [os.path.join(BASE_DIR, m + ".py") for m in modules]
+
+
+# ---- Stages ----------------------------------------------------------------
+def build_stages(cfg):
+    """
+    Stage dicts in declaration order: name, module, argv for its main(),
+    inputs / outputs (paths or glob patterns), required (patterns that must
+    match a file) and manual (run only as target).
+    """
+    results = cfg["results_dir"]
+    compiled = os.path.join(results, 'All_Results_Compiled')
+    report = (os.path.join(results, REPORT_FILE) if cfg["report"] is None
+              else cfg["report"])
+    logs = os.path.join(results, '*', 'out_files', '*.out')
+    if cfg["from_runs"]:
+        sfe = os.path.join(compiled, 'Ensemble_all.csv')
+        lat = os.path.join(compiled, 'Lattice_all.csv')
+    else:
+        sfe = os.path.join(cfg["data_dir"], 'SFE_all.csv')
+        lat = os.path.join(cfg["data_dir"], 'Lattice_all.csv')
+    plot_modules = ["render_plots", "sfe_ternary_plots", "lattice_plots", "plot_phase_diagram",
+                    "sfe_vs_temp", "make_plots_annni_vs_scaled_dmlf"]
+    stages = [
+        {"name": "run", "module": "run_sweep", "manual": True,
+         "argv": ["--compositions", cfg["compositions"], "--work-dir", results],
+         "inputs": [cfg["compositions"],
+                    os.path.join(SCRIPTS_DIR, 'Lammps Scripts', '*.in'),
+                    os.path.join(SCRIPTS_DIR, 'Potentials', '*')],
+         "outputs": [logs]},
+        {"name": "extract", "module": "extract_energies_and_lattice",
+         "argv": ["--results-dir", results], "required": [logs],
+         "inputs": [logs] + _sources("extract_energies_and_lattice", "lattice", "ensemble",
+                              "lammps_log", "annni"),
+         "outputs": [os.path.join(compiled, f) for f in
+                     ('SEF_all.csv', 'Lattice_all.csv', 'Ensemble_all.csv')]},
+        {"name": "annni", "module": "make_csv_annni_vs_dmlf",
+         "argv": ["--sfe", sfe, "--lattice", lat, "-o", cfg["annni_csv"]]
+                 + (["--all"] if cfg["from_runs"] else []),
+         "inputs": [sfe, lat] + _sources("make_csv_annni_vs_dmlf", "annni"),
+         "outputs": [cfg["annni_csv"]]},
+        {"name": "plot", "module": "render_plots",
+         "argv": ["--sfe", sfe, "--lattice", lat, "--annni-csv", cfg["annni_csv"],
+                  "--plots-dir", cfg["plots_dir"],
+                  "--cache-dir", os.path.join(results, TERNARY_CACHE)],
+         "inputs": [sfe, lat, cfg["annni_csv"]] + _sources(*plot_modules),
+         "outputs": [os.path.join(cfg["plots_dir"], '.render_manifest.json')]},
+    ]
+    for s in stages:
+        s["argv"] += ["--report", report]
+        for key in ("inputs", "outputs", "required"):
+            s[key] = [os.path.normpath(os.path.abspath(p)) for p in s.get(key, [])]
+        s.setdefault("manual", False)
+    return stages
+
+
+def _overlap(a, b):
+    """Whether two paths / glob patterns can name the same file."""
+    return a == b or fnmatch.fnmatchcase(a, b) or fnmatch.fnmatchcase(b, a)
+
+
+def dependencies(stages):
+    """{stage: set of stages producing one of its inputs}."""
+    deps = {s["name"]: set() for s in stages}
+    for s in stages:
+        for producer in stages:
+            if producer is not s and any(_overlap(i, o) for i in s["inputs"]
+                                         for o in producer["outputs"]):
+                deps[s["name"]].add(producer["name"])
+    return deps
+
+
+def topological_order(deps):
+    """Kahn's algorithm, always taking the first ready stage in declaration order."""
+    remaining = {k: set(v) for k, v in deps.items()}
+    order = []
+    while remaining:
+        ready = next((k for k, v in remaining.items() if not v), None)
+        if ready is None:
+            raise ValueError(f"dependency cycle between stages: {sorted(remaining)}")
+        order.append(ready)
+        del remaining[ready]
+        for v in remaining.values():
+            v.discard(ready)
+    return order
+
+
+def ancestors(deps, name):
+    seen, todo = set(), [name]
+    while todo:
+        for d in deps[todo.pop()]:
+            if d not in seen:
+                seen.add(d)
+                todo.append(d)
+    return seen
+
+
+# ---- Freshness -------------------------------------------------------------
+def _mtimes(pattern):
+    """mtimes of the files matched by a path or glob pattern (directories skipped)."""
+    paths = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+    return [os.path.getmtime(p) for p in paths if os.path.isfile(p)]
+
+
+def read_failed(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_result(path, stage, failed):
+    """Add a failed stage to the failed-stage file, or remove it after a success."""
+    entries = read_failed(path)
+    if failed:
+        entries[stage["name"]] = stage["outputs"]
+    elif entries.pop(stage["name"], None) is None:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(entries, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def freshness(stage, failed=None):
+    """
+    (outdated, reason) from the mtimes of the stage's inputs and outputs;
+    always outdated when its last run (with the same outputs) failed.
+    """
+    if (failed or {}).get(stage["name"]) == stage["outputs"]:
+        return True, "failed last run"
+    oldest = None
+    for pattern in stage["outputs"]:
+        times = _mtimes(pattern)
+        if not times:
+            return True, f"missing {_show(pattern)}"
+        oldest = min(times + ([oldest] if oldest is not None else []))
+    newest, newest_path = None, None
+    for pattern in stage["inputs"]:
+        times = _mtimes(pattern)
+        if times and (newest is None or max(times) > newest):
+            newest, newest_path = max(times), pattern
+    if newest is not None and newest > oldest:
+        return True, f"{_show(newest_path)} is newer"
+    return False, "up to date"
+
+
+def missing_inputs(stage, deps, stages, scheduled=()):
+    """
+    Literal inputs that do not exist and that no upstream stage produces, and
+    required patterns that match no file and that no scheduled stage produces.
+    """
+    produced = [o for s in stages if s["name"] in deps[stage["name"]] for o in s["outputs"]]
+    upcoming = [o for s in scheduled for o in s["outputs"]]
+    return ([p for p in stage["inputs"]
+             if not glob.has_magic(p) and not os.path.exists(p)
+             and not any(_overlap(p, o) for o in produced)]
+            + [p for p in stage["required"]
+               if not _mtimes(p) and not any(_overlap(p, o) for o in upcoming)])
+
+
+# ---- Execution -------------------------------------------------------------
+def run_stage(stage, extra=()):
+    """Import the stage's module now and call its main(); returns the exit code."""
+    module = importlib.import_module(stage["module"])
+    code = module.main(list(stage["argv"]) + list(extra))
+    return 0 if code is None else code
+
+
+def plan(stages, deps, targets, force=False, failed=None):
+    """Stages to run (in order) to bring `targets` up to date, and the outdated manual ones."""
+    by_name = {s["name"]: s for s in stages}
+    wanted = set(targets).union(*(ancestors(deps, t) for t in targets))
+    todo, skipped = [], []
+    for name in topological_order(deps):
+        if name not in wanted:
+            continue
+        stage = by_name[name]
+        outdated, reason = freshness(stage, failed)
+        stale_upstream = sorted(deps[name] & {s["name"] for s in todo})
+        if stale_upstream:
+            outdated, reason = True, f"after {', '.join(stale_upstream)}"
+        if name in targets and force:
+            outdated, reason = True, "forced"
+        if not outdated:
+            continue
+        if stage["manual"] and name not in targets:
+            skipped.append((stage, reason))
+        else:
+            todo.append(dict(stage, reason=reason))
+    return todo, skipped
+
+
+def execute(stages, deps, targets, force=False, dry_run=False, extra=(), failed_file=None):
+    todo, skipped = plan(stages, deps, targets, force,
+                         read_failed(failed_file) if failed_file else None)
+    for stage, reason in skipped:
+        print(f"⚠️ {stage['name']} is outdated ({reason}); "
+              f"run `python pipeline.py {stage['name']}` to refresh it")
+    if not todo:
+        print(f"✅ {', '.join(targets)} up to date")
+        return 0
+    for i, stage in enumerate(todo):
+        missing = missing_inputs(stage, deps, stages, todo[:i] if dry_run else ())
+        if missing:
+            what = ("no file matches" if glob.has_magic(missing[0]) else "missing input")
+            print(f"❌ {stage['name']}: {what} {_show(missing[0])}")
+            return 1
+        print(f"\n▶️ {stage['name']} ({stage['reason']}): {stage['module']}.py")
+        if dry_run:
+            continue
+        t0 = time.perf_counter()
+        code = 1        # an exception counts as a failure
+        try:
+            code = run_stage(stage, extra if [stage["name"]] == targets else ())
+        finally:
+            if failed_file:
+                record_result(failed_file, stage, code)
+        if code:
+            print(f"❌ {stage['name']} failed (exit code {code})")
+            return code
+        print(f"⏱️ {stage['name']} done in {time.perf_counter() - t0:.1f} s")
+    return 0
+
+
+def status(stages, deps, failed_file=None):
+    failed = read_failed(failed_file) if failed_file else None
+    for name in topological_order(deps):
+        stage = next(s for s in stages if s["name"] == name)
+        outdated, reason = freshness(stage, failed)
+        after = ", ".join(sorted(deps[name])) or "-"
+        mark = "🔄" if outdated else "✅"
+        manual = " [manual]" if stage["manual"] else ""
+        print(f"{mark} {name:<8} after: {after:<16} {reason}{manual}")
+    return 0
+
+
+# ---- Config ----------------------------------------------------------------
+def load_config(path=None, overrides=None):
+    cfg = dict(DEFAULTS)
+    if path:
+        with open(path, 'r') as f:
+            loaded = json.load(f)
+        unknown = set(loaded) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"{path}: unknown config keys {sorted(unknown)}")
+        root = os.path.dirname(os.path.abspath(path))
+        for key, value in loaded.items():
+            cfg[key] = os.path.join(root, value) if key in PATH_KEYS and value else value
+    cfg.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return cfg
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    extra = []
+    if "--" in argv:
+        cut = argv.index("--")
+        argv, extra = argv[:cut], argv[cut + 1:]
+
+    p = argparse.ArgumentParser(description="Run the SFE workflow as a DAG of stages.")
+    p.add_argument("command", choices=["status", "all"] + TARGETS,
+                   help="stage to bring up to date ('all': every stage but run)")
+    p.add_argument("--config", default=None, help="JSON file with path settings")
+    for key in PATH_KEYS:
+        p.add_argument("--" + key.replace("_", "-"), dest=key, default=None)
+    p.add_argument("--from-runs", action="store_true", default=None,
+                   help="ANNNI and plots from the extracted Ensemble_all.csv / Lattice_all.csv")
+    p.add_argument("--force", action="store_true", help="rerun the target stage")
+    p.add_argument("-n", "--dry-run", action="store_true", help="only show what would run")
+    args = p.parse_args(argv)
+
+    cfg = load_config(args.config, {k: getattr(args, k) for k in PATH_KEYS + ["from_runs"]})
+    stages = build_stages(cfg)
+    deps = dependencies(stages)
+    failed_file = os.path.join(cfg["results_dir"], FAILED_FILE)
+    if args.command == "status":
+        return status(stages, deps, failed_file)
+    if args.command == "all":
+        targets = [s["name"] for s in stages if not s["manual"]]
+        if extra:
+            p.error("arguments after -- need a single stage as command")
+    else:
+        targets = [args.command]
+    return execute(stages, deps, targets, args.force, args.dry_run, extra, failed_file)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+"""
+render_plots.py
+Single entry point for every figure of the project.
+
+Loads the compiled CSVs once, turns each figure into a spec (render
+function plus its own slice of the data) and renders the specs in a process
+pool on the non-interactive Agg backend:
+  - 9 SFE ternary plots          Plots/ternary_SFE_plots/
+  - 9 lattice ternary plots      Plots/ternary_Lattice_plots/
+  - phase diagram                Plots/phase_diagram.png
+  - 3 SFE vs T plots             Plots/SFE_vs_Temp/
+  - 3 ANNNI vs scaled DMLF plots Plots/ANNNI_vs_DMLF/   (if the CSV exists)
+
+A figure is skipped when the hash of its data slice and of the rendering
+module's source (which holds the style: cmaps, levels, dpi) matches the
+one recorded in Plots/.render_manifest.json and the image still exists.
+Per-figure and total timings are appended to the run report (instrument.py).
+The ternary interpolation weights are cached in --cache-dir (ternary_grid.py).
+
+--sfe Ensemble_all.csv plots the ensemble means of our own runs: the
+member-averaged ANNNI γ take the place of the γ columns and their standard
+errors become the error bars of the SFE vs T plots. An ANNNI table built from
+it (make_csv_annni_vs_dmlf.py --sfe Ensemble_all.csv) has no DMLF columns and
+is plotted as ANNNI curves with their ±σ band.
+
+Usage
+-----
+python render_plots.py                  # only what changed
+python render_plots.py --force -j 8
+python render_plots.py --sfe ../Results/All_Results_Compiled/Ensemble_all.csv \
+    --lattice ../Results/All_Results_Compiled/Lattice_all.csv --annni-csv annni_runs.csv
+python render_plots.py --check          # one figure of each kind, in a temporary folder
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+import instrument
+import lattice_plots
+import make_plots_annni_vs_scaled_dmlf
+import plot_phase_diagram
+import sfe_ternary_plots
+import sfe_vs_temp
+import ternary_grid
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.join(BASE_DIR, '..', '..')
+DATA_DIR = os.path.join(PROJECT_DIR, 'All_the_results_compiled')
+ANNNI_CSV = os.path.join(PROJECT_DIR, 'ANNNI_vs_DMLF model comparisions',
+                         'ANNNI_vs_DMLF_calibrated.csv')
+PLOTS_DIR = os.path.join(PROJECT_DIR, 'Plots')
+MANIFEST_FILE = '.render_manifest.json'
+
+TEMPS = [150, 300, 500]
+PHASE_DIAGRAM_T = 300
+
+
+# ---- Tables ----------------------------------------------------------------
+def load_sfe(path):
+    """
+    SFE table as read by the plots. Ensemble_all.csv (no γ_<fault>(mJ/m²)
+    columns) is mapped onto it: γ_<fault>_ANNNI → γ_<fault>(mJ/m²) and its
+    standard error σ_γ_<fault>_ANNNI → σ_γ_<fault>(mJ/m²).
+    """
+    sfe = pd.read_csv(path)
+    for col in sfe_ternary_plots.SFE_PROPERTIES:
+        fault = col.replace("γ_", "").replace("(mJ/m²)", "")
+        if col not in sfe and f"γ_{fault}_ANNNI" in sfe:
+            sfe = sfe.rename(columns={f"γ_{fault}_ANNNI": col,
+                                      f"σ_γ_{fault}_ANNNI": f"σ_{col}"})
+    return sfe
+
+
+# ---- Specs -----------------------------------------------------------------
+def _spec(func, args, output):
+    return {"func": func, "args": args, "output": output}
+
+
+def figure_specs(sfe, lat, annni, plots_dir):
+    """Every figure as {func, args, output}; args hold only its own data."""
+    specs = []
+
+    sfe = sfe_ternary_plots.extract_compositions(sfe.copy())
+    out = os.path.join(plots_dir, "ternary_SFE_plots")
+    for temp in TEMPS:
+        for prop in sfe_ternary_plots.SFE_PROPERTIES:
+            data = sfe.loc[sfe["T(K)"] == temp, ["T(K)", "Cr", "Co", "Fe", prop]]
+            name = sfe_ternary_plots.safe_filename(f"{prop}_{temp}K.png")
+            specs.append(_spec(sfe_ternary_plots.make_ternary_plot,
+                               (data, prop, temp, out), os.path.join(out, name)))
+
+    lat = lattice_plots.extract_compositions(lat.copy())
+    out = os.path.join(plots_dir, "ternary_Lattice_plots")
+    for temp in TEMPS:
+        for prop in lattice_plots.LATTICE_PROPERTIES:
+            data = lat.loc[lat["T(K)"] == temp, ["T(K)", "Cr", "Co", "Fe", prop]]
+            name = lattice_plots.safe_filename(f"{prop}_{temp}K.png")
+            specs.append(_spec(lattice_plots.make_ternary_plot,
+                               (data, prop, temp, out), os.path.join(out, name)))
+
+    phase = plot_phase_diagram.prepare(sfe.copy())
+    data = phase.loc[phase["T(K)"] == PHASE_DIAGRAM_T,
+                     ["T(K)", "Cr", "Co", "Fe", "ΔE_hcp-fcc(eV/atom)"]]
+    path = os.path.join(plots_dir, "phase_diagram.png")
+    specs.append(_spec(plot_phase_diagram.make_phase_diagram,
+                       (data, PHASE_DIAGRAM_T, path), path))
+
+    out = os.path.join(plots_dir, "SFE_vs_Temp")
+    for col, label in sfe_vs_temp.energy_types.items():
+        # Standard errors (σ_ columns) go along when present: error bars
+        data = sfe[["composition", "T(K)", col] + [c for c in [f"σ_{col}"] if c in sfe]]
+        specs.append(_spec(sfe_vs_temp.plot_energy_vs_temp, (data, col, label, out),
+                           os.path.join(out, sfe_vs_temp.output_name(col))))
+
+    if annni is not None:
+        out = os.path.join(plots_dir, "ANNNI_vs_DMLF")
+        for kind, title in make_plots_annni_vs_scaled_dmlf.kinds.items():
+            # Ensemble-derived tables have no DMLF columns, only the σ band
+            optional = [f"γ_{kind}_DMLF_scaled", f"σ_γ_{kind}_ANNNI"]
+            data = annni[["composition", "T(K)", f"γ_{kind}_ANNNI"]
+                         + [c for c in optional if c in annni]]
+            specs.append(_spec(make_plots_annni_vs_scaled_dmlf.plot_one, (data, kind, title, out),
+                               os.path.join(out, make_plots_annni_vs_scaled_dmlf.output_name(kind))))
+    return specs
+
+
+def spec_hash(spec):
+    """Hash of the figure's data slice and the source of its renderer."""
+    h = hashlib.sha1()
+    h.update(inspect.getsource(inspect.getmodule(spec["func"])).encode())
+    h.update(spec["func"].__name__.encode())
+    for arg in spec["args"]:
+        if isinstance(arg, pd.DataFrame):
+            h.update(pd.util.hash_pandas_object(arg, index=False).to_numpy().tobytes())
+            h.update("|".join(map(str, arg.columns)).encode())
+        else:
+            h.update(repr(arg).encode())
+    return h.hexdigest()
+
+
+# ---- Rendering -------------------------------------------------------------
+def render(func, args):
+    """Worker entry point (Agg backend is selected at import time); returns its resources."""
+    return instrument.measure(func, *args)
+
+
+def render_all(specs, plots_dir, force=False, workers=None, report=None, cache_dir=None):
+    manifest_path = os.path.join(plots_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    todo = []
+    for spec in specs:
+        key = os.path.relpath(spec["output"], plots_dir)
+        digest = spec_hash(spec)
+        if not force and manifest.get(key) == digest and os.path.exists(spec["output"]):
+            continue
+        os.makedirs(os.path.dirname(spec["output"]), exist_ok=True)
+        todo.append((key, digest, spec))
+    print(f"🎨 {len(todo)} of {len(specs)} figures to render")
+
+    failed = 0
+    init = (dict(initializer=ternary_grid.set_cache_dir, initargs=(cache_dir,))
+            if cache_dir is not None else {})
+    with ProcessPoolExecutor(max_workers=workers, **init) as pool:
+        futures = {pool.submit(render, spec["func"], spec["args"]): (key, digest)
+                   for key, digest, spec in todo}
+        for future in as_completed(futures):
+            key, digest = futures[future]
+            try:
+                resources = future.result()
+            except Exception as exc:
+                failed += 1
+                manifest.pop(key, None)
+                print(f"❌ {key}: {exc}")
+            else:
+                manifest[key] = digest
+                instrument.write_record(report, {"stage": "plot", "figure": key, **resources})
+
+    os.makedirs(plots_dir, exist_ok=True)
+    with open(manifest_path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return len(todo) - failed, failed
+
+
+def check(sfe, lat, annni):
+    """
+    Render the first figure of every kind (renderer) into a temporary folder,
+    in this process, without touching the manifest; returns the failures.
+    """
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        seen = set()
+        for spec in figure_specs(sfe, lat, annni, tmp):
+            if spec["func"] in seen:
+                continue
+            seen.add(spec["func"])
+            os.makedirs(os.path.dirname(spec["output"]), exist_ok=True)
+            name = os.path.relpath(spec["output"], tmp)
+            try:
+                spec["func"](*spec["args"])
+            except Exception as exc:
+                failed += 1
+                print(f"❌ {name}: {exc!r}")
+            else:
+                print(f"✅ {name}")
+    return failed
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Render all project figures in parallel.")
+    p.add_argument("--data-dir", default=DATA_DIR, help="folder with SFE_all.csv, Lattice_all.csv")
+    p.add_argument("--sfe", default=None,
+                   help="SFE table (default: <data-dir>/SFE_all.csv), or Ensemble_all.csv")
+    p.add_argument("--lattice", default=None,
+                   help="lattice table (default: <data-dir>/Lattice_all.csv)")
+    p.add_argument("--annni-csv", default=ANNNI_CSV)
+    p.add_argument("--plots-dir", default=PLOTS_DIR)
+    p.add_argument("--force", action="store_true", help="re-render everything")
+    p.add_argument("-j", "--workers", type=int, default=None)
+    p.add_argument("--check", action="store_true",
+                   help="render one figure of each kind to a temporary folder and exit")
+    p.add_argument("--cache-dir", default=ternary_grid.CACHE_DIR,
+                   help="ternary interpolation cache, '' to keep it in memory")
+    p.add_argument("--report", default=instrument.REPORT_FILE,
+                   help="run report (JSON lines), '' to disable")
+    args = p.parse_args(argv)
+    ternary_grid.set_cache_dir(args.cache_dir)
+
+    sfe = load_sfe(args.sfe or os.path.join(args.data_dir, "SFE_all.csv"))
+    lat = pd.read_csv(args.lattice or os.path.join(args.data_dir, "Lattice_all.csv"))
+    annni = pd.read_csv(args.annni_csv) if os.path.exists(args.annni_csv) else None
+    if args.check:
+        failed = check(sfe, lat, annni)
+        print(f"\n{'❌' if failed else '✨'} {failed} figure kinds failed")
+        return 1 if failed else 0
+
+    with instrument.stage("render", report=args.report) as rec:
+
+        specs = figure_specs(sfe, lat, annni, args.plots_dir)
+        done, failed = render_all(specs, args.plots_dir, args.force, args.workers,
+                                  args.report, args.cache_dir)
+        rec.update(figures=len(specs), rendered=done, failed=failed)
+    print(f"\n✨ {done} figures rendered, {len(specs) - done - failed} up to date, "
+          f"{failed} failed: {args.plots_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
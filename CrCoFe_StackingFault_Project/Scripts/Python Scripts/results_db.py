@@ -0,0 +1,321 @@
+"""
+results_db.py
+Single-file results database (SQLite) for the compiled data, in place of
+merging SFE_all.csv / Lattice_all.csv / Ensemble_all.csv by hand.
+
+Every parsed LAMMPS .out file (and every row of an imported legacy CSV) is
+one row of `runs`, with numeric Cr/Co/Fe fractions and T next to the
+composition name, the phase and the disorder realization (its seed is
+run_sweep.realization_seed(seed, realization)), and its provenance: the
+source file, its mtime/size and when it was stored. The values it produced
+are rows of `observables` (run, quantity, value), so new quantities need no
+schema change:
+  runs         id, source, origin, composition, cr, co, fe, T, phase,
+               realization, mtime_ns, size, stored
+  observables  run_id, quantity, value
+Indexes on (composition, T, phase, realization), (cr, co, fe, T) and
+(T, phase) serve the range queries of query() / point_table().
+
+The database runs in WAL mode with a busy timeout and writes each batch in
+one BEGIN IMMEDIATE transaction, so several extractors can append while
+plotting / ANNNI stages read.
+
+    conn = connect(DB_FILE)
+    df = point_table(conn, T=(300, 700), cr=(0.2, 0.5))   # one row per point
+    lat = lattice_rows(lattice_records(conn, phase="fcc"))
+
+Usage
+-----
+python results_db.py import SFE_all.csv Lattice_all.csv   # legacy tables
+python results_db.py query --T 300 700 --cr 0.2 0.5 -o points.csv
+python results_db.py                                      # summary
+
+Output
+------
+- Results/All_Results_Compiled/results.sqlite  (written by
+  extract_energies_and_lattice.py)
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import instrument
+from ensemble import ensemble_rows
+from lattice import lattice_rows
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(BASE_DIR, '..', 'Results', 'All_Results_Compiled', 'results.sqlite')
+
+BUSY_TIMEOUT = 60.0     # seconds a writer waits for the lock
+EXTRACT = "extract"     # origin of rows parsed from .out files
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    source      TEXT NOT NULL UNIQUE,
+    origin      TEXT NOT NULL,
+    composition TEXT NOT NULL,
+    cr REAL, co REAL, fe REAL,
+    T           REAL,
+    phase       TEXT,
+    realization INTEGER NOT NULL DEFAULT 0,
+    mtime_ns    INTEGER,
+    size        INTEGER,
+    stored      REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observables (
+    run_id   INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    quantity TEXT NOT NULL,
+    value    REAL,
+    PRIMARY KEY (run_id, quantity)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_point ON runs(composition, T, phase, realization);
+CREATE INDEX IF NOT EXISTS runs_fractions ON runs(cr, co, fe, T);
+CREATE INDEX IF NOT EXISTS runs_temperature ON runs(T, phase);
+"""
+RUN_FIELDS = ("composition", "T", "phase", "realization")
+FRACTIONS = ("cr", "co", "fe")
+RE_COMPOSITION = re.compile(r"Cr([\d\.]+)_Co([\d\.]+)_Fe([\d\.]+)")
+
+
+# ---- Connection ------------------------------------------------------------
+def connect(path=DB_FILE):
+    """Open (and create) the database: WAL journal, foreign keys, busy timeout."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """Write lock taken up front, so concurrent writers queue instead of deadlocking."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def composition_fractions(composition):
+    """(xCr, xCo, xFe) of a 'Cr0.50_Co0.25_Fe0.25' name (NaN if it is not one)."""
+    m = RE_COMPOSITION.search(composition)
+    return tuple(float(v) for v in m.groups()) if m else (np.nan,) * 3
+
+
+# ---- Writing ---------------------------------------------------------------
+def store_run(conn, source, origin, composition, values, T=None, phase=None, realization=0,
+              mtime_ns=None, size=None):
+    """Replace the run of `source` by one with `values` ({quantity: number})."""
+    conn.execute("DELETE FROM runs WHERE source = ?", (source,))
+    cur = conn.execute(
+        "INSERT INTO runs (source, origin, composition, cr, co, fe, T, phase, realization,"
+        " mtime_ns, size, stored) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (source, origin, composition, *composition_fractions(composition), T, phase,
+         int(realization), mtime_ns, size, time.time()))
+    conn.executemany("INSERT INTO observables (run_id, quantity, value) VALUES (?, ?, ?)",
+                     [(cur.lastrowid, q, float(v)) for q, v in values.items()])
+
+
+def entry_values(entry):
+    """Run fields and numeric values of one extract manifest entry (None if empty)."""
+    lattice = entry.get("lattice")
+    values, fields = {}, {}
+    for rec in entry.get("records", []):
+        fields = {"composition": rec["Composition"], "T": rec["Temperature"]}
+        values[f"γ_{rec['Fault_Type']}(mJ/m²)"] = rec["Gamma_mJ_m2"]
+    if lattice:
+        fields = {k: lattice.get(k, 0) for k in RUN_FIELDS}
+        values.update({k: v for k, v in lattice.items()
+                       if k not in RUN_FIELDS and isinstance(v, (int, float))})
+    return (fields, values) if fields else None
+
+
+def sync_manifest(conn, manifest, changed=()):
+    """
+    Bring the extracted runs in line with the extract manifest: store the
+    files in `changed` and any not yet in the database, drop removed ones.
+    Returns (stored, removed).
+    """
+    with transaction(conn):
+        known = dict(conn.execute("SELECT source, mtime_ns FROM runs WHERE origin = ?",
+                                  (EXTRACT,)))
+        stored = 0
+        for rel, entry in manifest.items():
+            if rel not in changed and known.get(rel) == entry["mtime_ns"]:
+                continue
+            run = entry_values(entry)
+            if run is None:
+                conn.execute("DELETE FROM runs WHERE source = ?", (rel,))
+                continue
+            fields, values = run
+            store_run(conn, rel, EXTRACT, values=values, mtime_ns=entry["mtime_ns"],
+                      size=entry["size"], **fields)
+            stored += 1
+        removed = [(rel,) for rel in set(known) - set(manifest)]
+        conn.executemany("DELETE FROM runs WHERE source = ?", removed)
+    return stored, len(removed)
+
+
+def import_table(conn, path):
+    """Rows of a compiled CSV (composition, T(K), ...) as runs of origin = file name."""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    name = os.path.basename(path)
+    with transaction(conn):
+        conn.execute("DELETE FROM runs WHERE origin = ?", (name,))
+        for row in df.to_dict("records"):
+            comp, T = row.pop("composition"), row.pop("T(K)")
+            values = {q: v for q, v in row.items() if isinstance(v, (int, float))}
+            store_run(conn, f"{name}:{comp}@{T}K", name, comp, values, T=float(T))
+    return len(df)
+
+
+# ---- Queries ---------------------------------------------------------------
+def _where(composition=None, T=None, phase=None, realization=None, origin=None, **ranges):
+    """SQL condition and parameters; ranges are (lo, hi) pairs, lists mean IN."""
+    cond, params = [], []
+    for column, value in (("composition", composition), ("phase", phase),
+                          ("realization", realization), ("origin", origin)):
+        if value is None:
+            continue
+        values = [value] if isinstance(value, (str, int)) else list(value)
+        cond.append(f"r.{column} IN ({', '.join('?' * len(values))})")
+        params += values
+    for column, bounds in (("T", T), *((c, ranges.get(c)) for c in FRACTIONS)):
+        if bounds is None:
+            continue
+        lo, hi = bounds if np.ndim(bounds) else (bounds, bounds)
+        cond.append(f"r.{column} BETWEEN ? AND ?")
+        params += [float(lo) - 1e-9, float(hi) + 1e-9]
+    return (" WHERE " + " AND ".join(cond) if cond else ""), params
+
+
+def query(conn, **filters):
+    """
+    Long table (one row per run and quantity) of the runs matching `filters`:
+    composition / phase / realization / origin (value or list), T, cr, co, fe
+    (value or (lo, hi)).
+    """
+    import pandas as pd  # extract_energies_and_lattice.py only stores runs
+
+    where, params = _where(**filters)
+    sql = ("SELECT r.id AS run, r.source, r.origin, r.composition, r.cr AS Cr, r.co AS Co,"
+           " r.fe AS Fe, r.T, r.phase, r.realization, o.quantity, o.value"
+           " FROM runs r JOIN observables o ON o.run_id = r.id" + where)
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def lattice_records(conn, **filters):
+    """Lattice records of the extracted NPT runs (as in the extract manifest)."""
+    long = query(conn, origin=EXTRACT, **filters)
+    long = long[long["phase"].notna()]
+    records = []
+    for _, run in long.groupby("run", sort=False):
+        first = run.iloc[0]
+        rec = {"composition": first["composition"], "T": int(first["T"]),
+               "phase": first["phase"], "realization": int(first["realization"])}
+        rec.update(zip(run["quantity"], run["value"]))
+        records.append(rec)
+    return records
+
+
+def point_table(conn, **filters):
+    """
+    One row per (composition, T) with numeric Cr/Co/Fe: imported columns,
+    overridden by the Lattice_all / Ensemble_all values of extracted runs.
+    """
+    import pandas as pd
+
+    long = query(conn, **filters)
+    imported = long[long["origin"] != EXTRACT]
+    df = pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=["composition", "T"]))
+    if len(imported):
+        df = imported.pivot_table(index=["composition", "T"], columns="quantity",
+                                  values="value", aggfunc="last")
+    records = lattice_records(conn, **filters)
+    if records:
+        ext = pd.DataFrame(lattice_rows(records)).merge(
+            pd.DataFrame(ensemble_rows(records)), on=["composition", "T(K)"],
+            how="outer", suffixes=("", "_ensemble"))
+        ext = ext.rename(columns={"T(K)": "T"}).set_index(["composition", "T"])
+        ext = ext[[c for c in ext if not c.endswith("_ensemble")]]
+        df = ext.combine_first(df) if len(df) else ext
+    df = df.reset_index().rename(columns={"T": "T(K)"})
+    df.columns.name = None
+    if len(df):
+        df["T(K)"] = df["T(K)"].astype(int)
+        fractions = np.array([composition_fractions(c) for c in df["composition"]])
+        df.insert(1, "Cr", fractions[:, 0])
+        df.insert(2, "Co", fractions[:, 1])
+        df.insert(3, "Fe", fractions[:, 2])
+    return df
+
+
+def add_filter_arguments(p):
+    """--composition / --phase / --T / --cr / --co / --fe options for a CLI."""
+    p.add_argument("--composition", nargs="+", default=None)
+    p.add_argument("--phase", nargs="+", default=None)
+    for name in ("T", "cr", "co", "fe"):
+        p.add_argument(f"--{name}", type=float, nargs=2, metavar=("LO", "HI"), default=None)
+
+
+def filters_from(args):
+    return {k: getattr(args, k) for k in ("composition", "phase", "T", "cr", "co", "fe")
+            if getattr(args, k) is not None}
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Query / fill the compiled results database.")
+    p.add_argument("command", nargs="?", choices=["summary", "import", "query"],
+                   default="summary")
+    p.add_argument("files", nargs="*", help="import: compiled CSV tables")
+    p.add_argument("--db", default=DB_FILE)
+    p.add_argument("--long", action="store_true", help="query: one row per quantity")
+    p.add_argument("-o", "--output", default=None, help="query: CSV instead of printing")
+    add_filter_arguments(p)
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    args = p.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.command == "import":
+        with instrument.stage("results_db", report=args.report, command="import") as rec:
+            rec["rows"] = sum(import_table(conn, path) for path in args.files)
+            for path in args.files:
+                print(f"📥 Imported {path}")
+    elif args.command == "query":
+        with instrument.stage("results_db", report=args.report, command="query") as rec:
+            df = (query(conn, **filters_from(args)) if args.long
+                  else point_table(conn, **filters_from(args)))
+            rec["rows"] = len(df)
+        if args.output:
+            df.to_csv(args.output, index=False)
+            print(f"✅ {len(df)} rows written to: {args.output}")
+        else:
+            print(df.to_string(index=False))
+    else:
+        print(f"🗄️ {args.db}")
+        for origin, n, points, q in conn.execute(
+                "SELECT r.origin, COUNT(DISTINCT r.id), COUNT(DISTINCT r.composition || r.T),"
+                " COUNT(o.quantity) FROM runs r LEFT JOIN observables o ON o.run_id = r.id"
+                " GROUP BY r.origin ORDER BY r.origin"):
+            print(f"   {origin:<20} {n:6d} runs, {points:5d} points, {q:7d} values")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""
+run_cache.py
+Content-addressed result store for the LAMMPS sweep.
+
+Each run is keyed by a SHA-256 over everything that determines its output:
+the input script (which carries the seeds 12345/54321), the MEAM files,
+any structure it reads, and the -var values (composition, T, phase).
+Finished runs are copied into <cache>/<key[:2]>/<key>/ together with a
+meta.json; an entry only becomes visible once it is complete (written to a
+temporary directory and renamed), so a sweep killed by a node crash simply
+reruns the jobs that had not finished and skips everything else.
+
+Usage
+-----
+python run_cache.py --stats
+python run_cache.py --budget-gb 50      # evict least recently used entries
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', 'Results', '.run_cache')
+
+META_FILE = "meta.json"
+_file_hashes = {}
+
+
+# ---- Keys ------------------------------------------------------------------
+def file_digest(path):
+    """SHA-256 of a file, memoized on (path, size, mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        _file_hashes[memo_key] = h.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def run_key(job, work_dir):
+    """Hash of a job's input files (by content) and its -var values."""
+    h = hashlib.sha256()
+    for name in sorted(job["deps"]):
+        h.update(f"file {name} {file_digest(os.path.join(work_dir, name))}\n".encode())
+    for name, value in sorted(job["variables"].items()):
+        h.update(f"var {name} {value}\n".encode())
+    return h.hexdigest()
+
+
+# ---- Store -----------------------------------------------------------------
+def entry_dir(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, META_FILE + ".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+
+def _copy(src, dst):
+    # Always a real copy: LAMMPS truncates its outputs in place, which would
+    # corrupt a hard-linked cache entry on the next run.
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy2(src, dst)
+
+
+def lookup(cache_dir, key):
+    """meta dict of a complete entry, or None."""
+    return _read_meta(entry_dir(cache_dir, key))
+
+
+def restore(cache_dir, key, job_dir, skip=None):
+    """
+    Copy a cached run's outputs back into its composition folder. Files for
+    which skip(destination, cached copy) is true are left alone (run_sweep.py
+    passes snapshot_archive.archived, so pruned snapshots stay pruned).
+    """
+    path = entry_dir(cache_dir, key)
+    meta = _read_meta(path)
+    if meta is None:
+        return False
+    for rel in meta["files"]:
+        dst, src = os.path.join(job_dir, rel), os.path.join(path, rel)
+        if skip is not None and skip(dst, src):
+            continue
+        _copy(src, dst)
+    meta["last_used"] = time.time()
+    _write_meta(path, meta)
+    return True
+
+
+def store(cache_dir, key, job, job_dir):
+    """
+    Save a finished run's outputs atomically under its key. Runs missing one
+    of their declared outputs are not stored (False), so a rerun recreates it.
+    """
+    final = entry_dir(cache_dir, key)
+    if os.path.isdir(final):
+        return True
+    missing = [rel for rel in job["outputs"] if not os.path.exists(os.path.join(job_dir, rel))]
+    if missing:
+        return False
+    tmp = os.path.join(cache_dir, f".tmp-{uuid.uuid4().hex}")
+    size = 0
+    for rel in job["outputs"]:
+        src = os.path.join(job_dir, rel)
+        _copy(src, os.path.join(tmp, rel))
+        size += os.path.getsize(src)
+    os.makedirs(tmp, exist_ok=True)
+    now = time.time()
+    _write_meta(tmp, {"job": job["name"], "variables": job["variables"],
+                      "files": list(job["outputs"]), "size": size, "created": now,
+                      "last_used": now})
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # Another worker stored the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return True
+
+
+# ---- Maintenance -----------------------------------------------------------
+def entries(cache_dir):
+    """(path, meta) for every complete entry."""
+    if not os.path.isdir(cache_dir):
+        return []
+    found = []
+    for prefix in os.listdir(cache_dir):
+        sub = os.path.join(cache_dir, prefix)
+        if prefix.startswith('.') or not os.path.isdir(sub):
+            continue
+        for key in os.listdir(sub):
+            meta = _read_meta(os.path.join(sub, key))
+            if meta is not None:
+                found.append((os.path.join(sub, key), meta))
+    return found
+
+
+def clean_partial(cache_dir):
+    """Remove temporary entries left behind by an interrupted sweep."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    stale = [d for d in os.listdir(cache_dir) if d.startswith(".tmp-")]
+    for d in stale:
+        shutil.rmtree(os.path.join(cache_dir, d), ignore_errors=True)
+    return len(stale)
+
+
+def evict(cache_dir, budget_bytes):
+    """Drop least recently used entries until the store fits in budget_bytes."""
+    found = sorted(entries(cache_dir), key=lambda e: e[1]["last_used"])
+    total = sum(meta["size"] for _, meta in found)
+    removed = 0
+    for path, meta in found:
+        if total <= budget_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= meta["size"]
+        removed += 1
+    return removed, total
+
+
+def main():
+    p = argparse.ArgumentParser(description="Inspect or trim the LAMMPS run cache.")
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    p.add_argument("--budget-gb", type=float, default=None)
+    p.add_argument("--stats", action="store_true")
+    args = p.parse_args()
+
+    n_partial = clean_partial(args.cache_dir)
+    if n_partial:
+        print(f"🧹 Removed {n_partial} partial entries")
+    if args.budget_gb is not None:
+        removed, total = evict(args.cache_dir, int(args.budget_gb * 1e9))
+        print(f"🗑️ Evicted {removed} entries, {total / 1e9:.2f} GB left")
+    if args.stats or args.budget_gb is None:
+        found = entries(args.cache_dir)
+        total = sum(meta["size"] for _, meta in found)
+        print(f"📦 {len(found)} cached runs, {total / 1e9:.2f} GB in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+run_sweep.py
+Parallel replacement for the serial loop in run_all.sh.
+
+Reads Benchmarking/compositions.txt, builds the full
+composition × phase × temperature job matrix and packs the LAMMPS runs
+onto the available cores (``cores // ranks_per_job`` jobs at a time).
+Jobs are pulled from a shared queue, so a failed or slow ``lmp`` run only
+occupies its own slot while the others keep going.
+
+Layout (same as run_all.sh, rooted at --work-dir)
+------
+<work-dir>/CrCoFe.in, CrCoFe_dhcp.in, *.meam, dhcp_10x10x5.data   (staged)
+<work-dir>/structures/dhcp_Cr0.50_Co0.50_Fe0.00_10x10x5_s12345.data
+<work-dir>/Cr0.50_Co0.50_Fe0.00/data_fcc_300K.dat, final_fcc_300K.cfg
+<work-dir>/Cr0.50_Co0.50_Fe0.00/out_files/log_fcc_300K.out
+
+Usage
+-----
+python run_sweep.py --cores 64 --ranks-per-job 4
+python run_sweep.py --lmp "python fake_lmp.py" --mpirun none   # stand-in lmp
+python run_sweep.py --cache-budget-gb 50      # trim the run cache afterwards
+python run_sweep.py --equil adaptive --block 2000 --eq-tol 2e-4
+python run_sweep.py --sqs                     # SQS cells for fcc, hcp and dhcp
+python run_sweep.py --realizations 5          # 5 disorder realizations per point
+
+Every job (and the sweep as a whole) is appended to the run report
+(Results/run_report.jsonl, see instrument.py) with its wall/CPU time, peak
+RSS, I/O bytes and the LAMMPS loop time and ns/day; --report '' disables it.
+
+Finished runs are stored in a content-addressed cache (see run_cache.py);
+reruns with unchanged inputs restore their outputs instead of calling lmp.
+
+DHCP jobs read a structure generated for their own composition (see
+supercell.py), cached under structures/ by composition, size and seed and
+shared by all temperatures. Structures are generated in a separate process
+pool while the fcc/hcp jobs are already running. With --sqs every phase
+reads a smaller special quasi-random cell (sqs.py) through CrCoFe_dhcp.in.
+
+--realizations K runs K chemical-disorder realizations of every point
+(realization_seed). Member 0 is the plain run above; members r >= 1 write
+data_fcc_300K_r1.dat, out_files/log_fcc_300K_r1.out, ... and are independent
+queue entries, so they fill whatever slots free up;
+extract_energies_and_lattice.py averages them (Ensemble_all.csv).
+"""
+
+import argparse
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import instrument
+import run_cache
+import snapshot_archive
+import sqs
+import supercell
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, '..')
+PROJECT_DIR = os.path.join(SCRIPTS_DIR, '..')
+LAMMPS_DIR = os.path.join(SCRIPTS_DIR, 'Lammps Scripts')
+POTENTIALS_DIR = os.path.join(SCRIPTS_DIR, 'Potentials')
+COMPOSITIONS_FILE = os.path.join(PROJECT_DIR, 'Benchmarking', 'compositions.txt')
+RESULTS_DIR = os.path.join(SCRIPTS_DIR, 'Results')
+CACHE_DIR = run_cache.CACHE_DIR
+STRUCTURES_DIR = 'structures'
+
+# Simulation parameters (as in run_all.sh)
+PHASES = ["fcc", "hcp", "dhcp"]
+TEMPS = [150, 300, 500]
+DHCP_SIZE = (10, 10, 5)     # nx, ny, ABAC repeats (as dhcp_10x10x5.data)
+STRUCTURE_SEED = 12345
+SEED_STRIDE = 7919          # seed offset between ensemble members
+# NPT length (see equilibrate.in): fixed 20000 steps or adaptive early stop
+EQUIL = {"equil": "fixed", "max_steps": 20000, "block": 2000, "eq_tol": 2.0e-4}
+POLL_S = 0.2                # job status poll interval (s)
+
+# Files every job expects one directory above its composition folder
+INPUT_FILES = [
+    os.path.join(LAMMPS_DIR, 'CrCoFe.in'),
+    os.path.join(LAMMPS_DIR, 'CrCoFe_dhcp.in'),
+    os.path.join(LAMMPS_DIR, 'equilibrate.in'),
+    os.path.join(LAMMPS_DIR, 'gsfe.in'),
+    os.path.join(POTENTIALS_DIR, 'library.meam'),
+    os.path.join(POTENTIALS_DIR, 'CrCoFe.meam'),
+    os.path.join(POTENTIALS_DIR, 'dhcp_10x10x5.data'),
+]
+
+
+# ---- Job matrix ------------------------------------------------------------
+def read_compositions(path=COMPOSITIONS_FILE):
+    """Read (xCr, xCo, xFe) triples, skipping blank lines and '#' comments."""
+    compositions = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            xCr, xCo, xFe = (float(v) for v in line.split())
+            compositions.append((xCr, xCo, xFe))
+    return compositions
+
+
+def composition_folder(xCr, xCo, xFe):
+    """Folder name used throughout the project, e.g. Cr0.50_Co0.25_Fe0.25."""
+    return f"Cr{xCr:.2f}_Co{xCo:.2f}_Fe{xFe:.2f}"
+
+
+def structure_path(spec):
+    """Path (relative to the work dir) of a generated structure, e.g.
+    structures/dhcp_Cr0.50_Co0.25_Fe0.25_10x10x5_s12345.data
+    (..._s12345_sqs3x20000.data for an SQS with 3 shells, 20000 swaps)"""
+    nx, ny, nrepeats = spec["size"]
+    name = (f"{spec['phase']}_{composition_folder(*spec['composition'])}_"
+            f"{nx}x{ny}x{nrepeats}_s{spec['seed']}")
+    if spec.get("sqs"):
+        name += f"_sqs{spec['sqs']['shells']}x{spec['sqs']['steps']}"
+    return os.path.join(STRUCTURES_DIR, name + ".data")
+
+
+def realization_seed(seed, r):
+    """Seed of ensemble member r (member 0 keeps `seed`)."""
+    return seed + SEED_STRIDE * r
+
+
+def build_jobs(compositions, phases=PHASES, temperatures=TEMPS,
+               dhcp_size=DHCP_SIZE, structure_seed=STRUCTURE_SEED, equil=None, sqs_options=None,
+               realizations=1):
+    """
+    Full composition × phase × temperature matrix as a list of job dicts,
+    `realizations` times over (member-major, so every point gets member 0
+    first). `equil` overrides the equilibration variables of EQUIL. With
+    `sqs_options` ({"shells", "steps", "sizes"}) every phase reads an SQS cell
+    (sqs.py) instead of a random one.
+    """
+    equil = {**EQUIL, **(equil or {})}
+    jobs = []
+    for r in range(realizations):
+        # Member 0 passes no seed variables: same runs (and cache keys) as before
+        suffix = f"_r{r}" if r else ""
+        member = {"seed": realization_seed(structure_seed, r), "suffix": suffix} if r else {}
+        for xCr, xCo, xFe in compositions:
+            folder = composition_folder(xCr, xCo, xFe)
+            for phase in phases:
+                for T in temperatures:
+                    variables = {"T_run": T, "xCr": f"{xCr:.2f}",
+                                 "xCo": f"{xCo:.2f}", "xFe": f"{xFe:.2f}", **equil, **member}
+                    structure = None
+                    if phase == "dhcp" or sqs_options:
+                        # Pre-built structure, read by CrCoFe_dhcp.in
+                        input_file = "CrCoFe_dhcp.in"
+                        size = (tuple(sqs_options["sizes"][phase]) if sqs_options
+                                else tuple(dhcp_size))
+                        structure = {"phase": phase, "composition": (xCr, xCo, xFe),
+                                     "size": size,
+                                     "seed": realization_seed(structure_seed, r)}
+                        if sqs_options:
+                            structure["sqs"] = {"shells": sqs_options["shells"],
+                                                "steps": sqs_options["steps"]}
+                        data_file = structure_path(structure)
+                        deps = [input_file, data_file]
+                        variables = {"phase": phase, **variables,
+                                     "data_file": os.path.join("..", data_file)}
+                        variables.update(zip(("nx", "ny", "nrepeats"), size))
+                    else:
+                        input_file = "CrCoFe.in"
+                        deps = [input_file]
+                        variables = {"phase": phase, **variables}
+                    log = os.path.join("out_files", f"log_{phase}_{T}K{suffix}.out")
+                    jobs.append({
+                        "name": f"{folder}/{phase}_{T}K{suffix}",
+                        "composition": folder,
+                        "phase": phase,
+                        "T": T,
+                        "realization": r,
+                        "input": input_file,
+                        "variables": variables,
+                        "structure": structure,
+                        "deps": deps + ["equilibrate.in", "library.meam", "CrCoFe.meam"],
+                        "log": log,
+                        "outputs": [f"data_{phase}_{T}K{suffix}.dat",
+                                    f"final_{phase}_{T}K{suffix}.cfg", log],
+                    })
+    return jobs
+
+
+# ---- Launching -------------------------------------------------------------
+def stage_inputs(work_dir, input_files=INPUT_FILES):
+    """Copy LAMMPS inputs and potentials into work_dir (the '..' of each job)."""
+    os.makedirs(work_dir, exist_ok=True)
+    for src in input_files:
+        dst = os.path.join(work_dir, os.path.basename(src))
+        if not os.path.exists(dst) or os.path.getmtime(src) > os.path.getmtime(dst):
+            shutil.copy2(src, dst)
+
+
+def generate_structure(work_dir, spec):
+    """Write the structure for `spec` unless it is already cached on disk."""
+    path = os.path.join(work_dir, structure_path(spec))
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if spec.get("sqs"):
+        positions, types, box, _ = sqs.build_sqs(spec["phase"], spec["size"],
+                                                 spec["composition"], spec["seed"],
+                                                 spec["sqs"]["shells"], spec["sqs"]["steps"])
+        kind = f"SQS ({spec['sqs']['shells']} shells)"
+    else:
+        positions, types, box = supercell.build(phase=spec["phase"], size=spec["size"],
+                                                composition=spec["composition"],
+                                                seed=spec["seed"])
+        kind = "supercell"
+    nx, ny, nrepeats = spec["size"]
+    tmp = f"{path}.tmp{os.getpid()}"
+    supercell.write_lammps_data(
+        tmp, positions, types, box,
+        f"{spec['phase']} {kind} {composition_folder(*spec['composition'])} "
+        f"nx={nx} ny={ny} repeats={nrepeats} seed={spec['seed']}")
+    os.replace(tmp, path)
+    return path
+
+
+def job_command(job, lmp="lmp", mpirun="mpirun", ranks=4):
+    """argv for one job; mpirun=None/'' runs lmp directly (e.g. a stand-in)."""
+    cmd = []
+    if mpirun:
+        cmd += shlex.split(mpirun) + ["-np", str(ranks)]
+    cmd += shlex.split(lmp)
+    for name, value in job["variables"].items():
+        cmd += ["-var", name, str(value)]
+    cmd += ["-in", os.path.join("..", job["input"])]
+    return cmd
+
+
+def run_job(job, work_dir, lmp="lmp", mpirun="mpirun", ranks=4, timeout=None):
+    """Run one job in its composition folder; never raises on LAMMPS failure."""
+    job_dir = os.path.join(work_dir, job["composition"])
+    log_path = os.path.join(job_dir, job["log"])
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    cmd = job_command(job, lmp, mpirun, ranks)
+
+    start = time.time()
+    status, returncode, resources = "ok", None, {}
+    with open(log_path, 'w') as log:
+        try:
+            # Own session so a timeout can kill mpirun together with its ranks
+            proc = subprocess.Popen(cmd, cwd=job_dir, stdout=log,
+                                    stderr=subprocess.STDOUT, start_new_session=True)
+        except OSError as exc:
+            log.write(f"Failed to launch {cmd[0]}: {exc}\n")
+            status = "failed"
+        else:
+            # wait4 instead of proc.wait: it also returns this job's own rusage
+            while True:
+                pid, wait_status, rusage = os.wait4(proc.pid, os.WNOHANG)
+                if pid:
+                    break
+                if timeout is not None and time.time() - start > timeout:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    _, wait_status, rusage = os.wait4(proc.pid, 0)
+                    status = "timeout"
+                    break
+                time.sleep(POLL_S)
+            returncode = proc.returncode = os.waitstatus_to_exitcode(wait_status)
+            resources = instrument.rusage_resources(rusage)
+            if status == "ok" and returncode != 0:
+                status = "failed"
+
+    return {"job": job, "status": status, "returncode": returncode,
+            "wall_s": time.time() - start, "log": log_path, "resources": resources}
+
+
+def run_job_cached(job, work_dir, cache_dir, lmp="lmp", mpirun="mpirun",
+                   ranks=4, timeout=None):
+    """run_job, but restore the outputs from the run cache when possible."""
+    job_dir = os.path.join(work_dir, job["composition"])
+    key = run_cache.run_key(job, work_dir)
+    if run_cache.restore(cache_dir, key, job_dir, skip=snapshot_archive.archived):
+        return {"job": job, "status": "cached", "returncode": 0, "wall_s": 0.0,
+                "log": os.path.join(job_dir, job["log"])}
+
+    res = run_job(job, work_dir, lmp, mpirun, ranks, timeout)
+    if res["status"] == "ok" and not run_cache.store(cache_dir, key, job, job_dir):
+        print(f"⚠️ {job['name']}: outputs incomplete, not cached")
+    return res
+
+
+def report_job(report, res):
+    """Append one job result (resources + LAMMPS performance) to the run report."""
+    job = res["job"]
+    rec = {"stage": "lammps", "job": job["name"], "composition": job["composition"],
+           "phase": job["phase"], "T": job["T"], "realization": job.get("realization", 0),
+           "status": res["status"],
+           "returncode": res["returncode"], "wall_s": res["wall_s"],
+           **res.get("resources", {})}
+    if res["status"] in ("ok", "failed", "timeout") and os.path.exists(res["log"]):
+        rec.update(instrument.lammps_performance(res["log"]))
+    instrument.write_record(report, rec)
+
+
+def _run_when_ready(ready, run, job, *args):
+    """Wait for the job's structure (if any), then run it."""
+    if ready is not None:
+        try:
+            ready.result()
+        except Exception as exc:
+            return {"job": job, "status": "failed", "returncode": None, "wall_s": 0.0,
+                    "log": f"structure generation failed: {exc}"}
+    return run(job, *args)
+
+
+def run_jobs(jobs, work_dir=RESULTS_DIR, cores=None, ranks_per_job=4,
+             lmp="lmp", mpirun="mpirun", timeout=None, cache_dir=None,
+             structure_workers=2, report=None):
+    """Pack jobs onto `cores` (cores // ranks_per_job concurrent runs)."""
+    cores = cores or os.cpu_count() or 1
+    slots = max(1, cores // ranks_per_job)
+    print(f"🚀 {len(jobs)} jobs on {cores} cores: {slots} × {ranks_per_job} ranks")
+
+    if cache_dir:
+        run_cache.clean_partial(cache_dir)
+        run, args = run_job_cached, (work_dir, cache_dir, lmp, mpirun, ranks_per_job, timeout)
+    else:
+        run, args = run_job, (work_dir, lmp, mpirun, ranks_per_job, timeout)
+
+    # Jobs without a pending structure go to the front of the queue, then
+    # member 0 of every point before the further ensemble members
+    jobs = sorted(jobs, key=lambda job: (job.get("structure") is not None,
+                                         job.get("realization", 0)))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=structure_workers) as generator, \
+            ThreadPoolExecutor(max_workers=slots) as pool:
+        ready = {}
+        for job in jobs:
+            spec = job.get("structure")
+            if spec is not None and structure_path(spec) not in ready:
+                ready[structure_path(spec)] = generator.submit(generate_structure,
+                                                               work_dir, spec)
+        futures = []
+        for job in jobs:
+            spec = job.get("structure")
+            pending = ready[structure_path(spec)] if spec is not None else None
+            futures.append(pool.submit(_run_when_ready, pending, run, job, *args))
+        for done, future in enumerate(as_completed(futures), start=1):
+            res = future.result()
+            results.append(res)
+            report_job(report, res)
+            mark = "✅" if res["status"] in ("ok", "cached") else "❌"
+            print(f"{mark} [{done}/{len(jobs)}] {res['job']['name']} "
+                  f"{res['status']} in {res['wall_s']:.1f} s")
+    return results
+
+
+# ---- CLI -------------------------------------------------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Run the Cr–Co–Fe LAMMPS sweep in parallel.")
+    p.add_argument("--compositions", default=COMPOSITIONS_FILE)
+    p.add_argument("--work-dir", default=RESULTS_DIR)
+    p.add_argument("--phases", nargs="+", default=PHASES)
+    p.add_argument("--temps", nargs="+", type=int, default=TEMPS)
+    p.add_argument("--cores", type=int, default=None, help="default: all CPUs")
+    p.add_argument("--ranks-per-job", type=int, default=4)
+    p.add_argument("--lmp", default="lmp", help="LAMMPS executable (or a stand-in)")
+    p.add_argument("--mpirun", default="mpirun", help="MPI launcher, 'none' to disable")
+    p.add_argument("--timeout", type=float, default=None, help="per-job limit in seconds")
+    p.add_argument("--dhcp-size", type=int, nargs=3, default=list(DHCP_SIZE),
+                   metavar=("NX", "NY", "NREPEATS"))
+    p.add_argument("--structure-seed", type=int, default=STRUCTURE_SEED)
+    p.add_argument("--equil", choices=["fixed", "adaptive"], default=EQUIL["equil"],
+                   help="adaptive: stop NPT once the block averages are stationary")
+    p.add_argument("--max-steps", type=int, default=EQUIL["max_steps"])
+    p.add_argument("--block", type=int, default=EQUIL["block"], help="steps per block")
+    p.add_argument("--eq-tol", type=float, default=EQUIL["eq_tol"],
+                   help="relative change of the block averages counted as converged")
+    p.add_argument("--sqs", action="store_true",
+                   help="special quasi-random cells (sqs.SQS_SIZES) for every phase")
+    p.add_argument("--sqs-shells", type=int, default=sqs.SHELLS)
+    p.add_argument("--sqs-steps", type=int, default=sqs.STEPS)
+    p.add_argument("--realizations", type=int, default=1,
+                   help="chemical-disorder realizations (ensemble members) per point")
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    p.add_argument("--no-cache", action="store_true", help="always rerun every job")
+    p.add_argument("--cache-budget-gb", type=float, default=None,
+                   help="evict least recently used cache entries beyond this size")
+    p.add_argument("--report", default=instrument.REPORT_FILE,
+                   help="run report (JSON lines), '' to disable")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+
+    equil = {"equil": args.equil, "max_steps": args.max_steps, "block": args.block,
+             "eq_tol": args.eq_tol}
+    sqs_options = ({"shells": args.sqs_shells, "steps": args.sqs_steps,
+                    "sizes": sqs.SQS_SIZES} if args.sqs else None)
+    jobs = build_jobs(read_compositions(args.compositions), args.phases, args.temps,
+                      args.dhcp_size, args.structure_seed, equil, sqs_options,
+                      args.realizations)
+    stage_inputs(args.work_dir)
+    cache_dir = None if args.no_cache else args.cache_dir
+    with instrument.stage("sweep", report=args.report, jobs=len(jobs),
+                          realizations=args.realizations) as rec:
+        results = run_jobs(jobs, args.work_dir, args.cores, args.ranks_per_job,
+                           args.lmp, mpirun, args.timeout, cache_dir, report=args.report)
+        rec["cached"] = sum(r["status"] == "cached" for r in results)
+        rec["failed"] = sum(r["status"] not in ("ok", "cached") for r in results)
+    if cache_dir and args.cache_budget_gb is not None:
+        removed, total = run_cache.evict(cache_dir, int(args.cache_budget_gb * 1e9))
+        print(f"🗑️ Evicted {removed} cache entries, {total / 1e9:.2f} GB kept")
+
+    n_cached = sum(r["status"] == "cached" for r in results)
+    if n_cached:
+        print(f"📦 {n_cached} runs restored from cache")
+    failed = [r for r in results if r["status"] not in ("ok", "cached")]
+    for r in failed:
+        print(f"⚠️ {r['job']['name']}: {r['status']} (see {r['log']})")
+    print(f"\n✨ {len(results) - len(failed)}/{len(results)} runs finished in: {args.work_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,13 +5,6 @@ import os
 # === Paths ===
 INPUT_FILE = "../../Results/All_the_results_compiled/SFE_all.csv"
 OUTPUT_DIR = "../../Plots/"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# === Load data ===
-df = pd.read_csv(INPUT_FILE)
-
-# === Extract unique compositions ===
-compositions = df["composition"].unique()
 
 # === Define energy types and their labels ===
 energy_types = {
@@ -20,16 +13,28 @@ energy_types = {
     "γ_Twin(mJ/m²)": "Twin Boundary Energy (TWE)"
 }
 
-# === Loop over each energy type and plot ===
-for energy_col, energy_label in energy_types.items():
+
+def output_name(energy_col):
+    """e.g. γ_ISF(mJ/m²) -> ISF_vs_temp.png"""
+    return f"{energy_col.replace('γ_', '').replace('(mJ/m²)', '').strip()}_vs_temp.png"
+
+
+def plot_energy_vs_temp(df, energy_col, energy_label, output_dir):
+    """
+    One figure: energy_col against T for every composition, with error bars
+    when df has its standard error (σ_<energy_col>, e.g. from an ensemble run).
+    """
     plt.figure(figsize=(8, 6))
+    sem_col = f"σ_{energy_col}"
 
-    for comp in compositions:
+    for comp in df["composition"].unique():
         subset = df[df["composition"] == comp]
-        plt.plot(
+        plt.errorbar(
             subset["T(K)"],
             subset[energy_col],
+            yerr=subset[sem_col] if sem_col in subset else None,
             marker="o",
+            capsize=3,
             label=comp,
         )
 
@@ -51,8 +56,19 @@ for energy_col, energy_label in energy_types.items():
 
     # === Adjust layout and save ===
     plt.tight_layout(rect=[0, 0, 0.8, 1])
-    output_file = os.path.join(OUTPUT_DIR, f"{energy_col.replace('γ_', '').replace('(mJ/m²)', '').strip()}_vs_temp.png")
+    output_file = os.path.join(output_dir, output_name(energy_col))
     plt.savefig(output_file, dpi=300, bbox_inches="tight")
     plt.close()
 
     print(f"✅ Saved clean plot for {energy_label} to: {output_file}")
+
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # === Load data ===
+    df = pd.read_csv(INPUT_FILE)
+
+    # === Loop over each energy type and plot ===
+    for energy_col, energy_label in energy_types.items():
+        plot_energy_vs_temp(df, energy_col, energy_label, OUTPUT_DIR)
@@ -0,0 +1,362 @@
+"""
+snapshot_archive.py
+Packs the write_data / write_dump cfg snapshots of each composition folder
+(data_<phase>_<T>K.dat, final_<phase>_<T>K.cfg, also inside dat_files/ and
+cfg_files/) into one compressed container, Results/<composition>/snapshots.npz.
+
+The container is a zip of .npy members (readable with np.load) plus an
+index.json member; every frame is stored on its own, so reading one frame
+decompresses only that frame's members:
+  <frame>/positions.npy   float32, byte-shuffled (4, 3N) uint8 before
+                          deflate (byte planes of similar values compress
+                          much better than interleaved floats)
+  <frame>/types.npy       uint8, 1 = Cr, 2 = Co, 3 = Fe
+  <frame>/ids.npy         int32, left out when the ids are 1..N in order
+  <frame>/images.npy      int8 image flags (data files)
+The frame name is the file's path inside the composition folder. The index
+keeps the box, atom count and the source file's mtime/size of every frame,
+so re-archiving a folder only parses new or changed files. With --prune the
+text files are deleted after their frame has been read back and compared
+(types exact, positions within float32 rounding).
+
+    arc = open_archive("Results/Cr0.33_Co0.33_Fe0.34/snapshots.npz")
+    snap = read_frame(arc, "dat_files/data_fcc_300K.dat")     # one frame
+    snap = load_snapshot("Results/.../dat_files/data_fcc_300K.dat")
+    export_frame(arc, "final_hcp_300K.cfg", "hcp_300K.data")  # for OVITO
+
+load_snapshot() reads the text file (via the snapshot_reader.py sidecar)
+while it exists and the archived frame once it has been pruned. A changed
+file that no longer parses keeps its previously archived frame (and is not
+pruned). run_sweep.py's cache restore skips snapshot files that were pruned
+from the very file it holds (same size and mtime, see archived()), so cached
+reruns do not bring them back; the outputs of a different run are restored.
+
+Usage
+-----
+python snapshot_archive.py                          # every composition folder
+python snapshot_archive.py --prune -j 8             # ... and delete the text files
+python snapshot_archive.py --list Results/Cr0.33_Co0.33_Fe0.34
+python snapshot_archive.py --extract Results/Cr0.33_Co0.33_Fe0.34 final_fcc_300K.cfg -o fcc.data
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrument
+from snapshot_reader import clear_sidecar, parse_snapshot, read_snapshot
+from supercell import write_lammps_data
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
+
+ARCHIVE_NAME = "snapshots.npz"
+ARCHIVE_VERSION = 1
+INDEX = "index.json"
+LEVEL = 6                   # deflate level
+POSITION_TOL = 1e-3         # Å, read-back check before pruning (float32: ~1e-5 Å)
+PATTERNS = ("data_*.dat", "final_*.cfg")
+
+
+# ---- Encoding --------------------------------------------------------------
+def shuffle(values):
+    """float32 array → (4, n) uint8 byte planes."""
+    flat = np.ascontiguousarray(values, dtype=np.float32).reshape(-1)
+    return np.ascontiguousarray(flat.view(np.uint8).reshape(-1, 4).T)
+
+
+def unshuffle(planes, shape):
+    return np.ascontiguousarray(planes.T).view(np.float32).reshape(shape)
+
+
+def encode(arrays):
+    """Arrays as stored ({name: array}) and their encodings ({name: str})."""
+    natoms = len(arrays["types"])
+    stored = {"positions": shuffle(arrays["positions"]),
+              "types": np.asarray(arrays["types"]).astype(np.uint8)}
+    enc = {"positions": "float32-shuffle", "types": "uint8"}
+    ids = np.asarray(arrays["ids"])
+    if np.array_equal(ids, np.arange(1, natoms + 1)):
+        enc["ids"] = "range"
+    else:
+        stored["ids"], enc["ids"] = ids.astype(np.int32), "int32"
+    if "images" in arrays:
+        images = np.asarray(arrays["images"])
+        small = images.size == 0 or np.abs(images).max() < 128
+        stored["images"] = images.astype(np.int8 if small else np.int16)
+        enc["images"] = str(stored["images"].dtype)
+    return stored, enc
+
+
+def decode(value, encoding, natoms):
+    if encoding == "float32-shuffle":
+        return unshuffle(value, (natoms, 3))
+    return value
+
+
+def _npy_bytes(array):
+    buf = io.BytesIO()
+    np.lib.format.write_array(buf, array, allow_pickle=False)
+    return buf.getvalue()
+
+
+# ---- Archive ---------------------------------------------------------------
+def archive_path(comp_dir):
+    return os.path.join(comp_dir, ARCHIVE_NAME)
+
+
+def composition_snapshots(comp_dir):
+    """{frame name: path} of the snapshot files in a composition folder."""
+    files = {}
+    for pattern in PATTERNS:
+        for path in (glob.glob(os.path.join(comp_dir, pattern))
+                     + glob.glob(os.path.join(comp_dir, "*", pattern))):
+            files[os.path.relpath(path, comp_dir).replace(os.sep, "/")] = path
+    return dict(sorted(files.items()))
+
+
+def open_archive(path):
+    """{"path", "frames": {name: meta}} of an archive (or of a composition folder)."""
+    if os.path.isdir(path):
+        path = archive_path(path)
+    with zipfile.ZipFile(path) as zf:
+        index = json.loads(zf.read(INDEX))
+    if index.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"{path}: archive version {index.get('version')}")
+    return {"path": path, "frames": index["frames"]}
+
+
+def _read_index(path):
+    try:
+        return open_archive(path)["frames"]
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return {}
+
+
+def read_frame(archive, name, arrays=None):
+    """
+    One frame as a read_snapshot()-style dict (positions are float32).
+    `arrays` limits what is decompressed, e.g. ("types",).
+    """
+    if isinstance(archive, str):
+        archive = open_archive(archive)
+    meta = archive["frames"][name]
+    natoms = meta["natoms"]
+    snap = {"path": f"{archive['path']}:{name}", "box": meta["box"], "natoms": natoms}
+    with zipfile.ZipFile(archive["path"]) as zf:
+        for key, encoding in meta["arrays"].items():
+            if arrays is not None and key not in arrays:
+                continue
+            if encoding == "range":
+                snap[key] = np.arange(1, natoms + 1, dtype=np.int32)
+                continue
+            with zf.open(f"{name}/{key}.npy") as f:
+                value = np.lib.format.read_array(f, allow_pickle=False)
+            snap[key] = decode(value, encoding, natoms)
+    return snap
+
+
+def write_archive(path, frames, old_path=None):
+    """
+    Write frames {name: (meta, stored arrays or None)} to `path` atomically;
+    frames without arrays are copied member by member from `old_path`.
+    """
+    tmp = f"{path}.tmp-{uuid.uuid4().hex}"
+    old = zipfile.ZipFile(old_path) if old_path else None
+    try:
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=LEVEL) as zf:
+            for name, (meta, stored) in frames.items():
+                for key, encoding in meta["arrays"].items():
+                    if encoding == "range":
+                        continue
+                    member = f"{name}/{key}.npy"
+                    data = _npy_bytes(stored[key]) if stored is not None else old.read(member)
+                    zf.writestr(member, data)
+            index = {"version": ARCHIVE_VERSION,
+                     "frames": {name: meta for name, (meta, _) in frames.items()}}
+            zf.writestr(INDEX, json.dumps(index, indent=1))
+    finally:
+        if old is not None:
+            old.close()
+    os.replace(tmp, path)
+
+
+def _verify(archive, name, arrays):
+    snap = read_frame(archive, name)
+    return (np.array_equal(snap["types"], np.asarray(arrays["types"]))
+            and np.array_equal(snap["ids"], np.asarray(arrays["ids"]))
+            and np.abs(snap["positions"] - np.asarray(arrays["positions"])).max(initial=0.0)
+            <= POSITION_TOL)
+
+
+def archive_composition(comp_dir, prune=False):
+    """
+    Add the new / changed snapshot files of one composition folder to its
+    archive (frames of pruned files are kept). Returns a summary dict.
+    """
+    path = archive_path(comp_dir)
+    known = _read_index(path)
+    files = composition_snapshots(comp_dir)
+    frames, parsed, failed, source_bytes = {}, {}, set(), 0
+    for name, meta in known.items():
+        if name not in files:
+            frames[name] = (meta, None)
+    for name, src in files.items():
+        st = os.stat(src)
+        stamp = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        source_bytes += st.st_size
+        if name in known and known[name]["source"] == stamp:
+            frames[name] = (known[name], None)
+            continue
+        try:
+            arrays, box = parse_snapshot(src)
+        except (ValueError, IndexError) as exc:
+            failed.add(name)
+            if name in known:
+                # Keep what was archived; the old stamp makes the next run retry
+                frames[name] = (known[name], None)
+                print(f"⚠️ {src}: unreadable, previously archived frame kept ({exc})")
+            else:
+                print(f"⚠️ {src}: not archived ({exc})")
+            continue
+        stored, enc = encode(arrays)
+        box = {k: (list(map(float, v)) if k == "origin" else float(v)) for k, v in box.items()}
+        meta = {"source": stamp, "box": box, "natoms": len(arrays["types"]), "arrays": enc}
+        frames[name] = (meta, stored)
+        parsed[name] = arrays
+
+    if parsed or set(frames) != set(known):
+        write_archive(path, dict(sorted(frames.items())), path if known else None)
+
+    pruned = 0
+    if prune and files:
+        archive = open_archive(path)
+        for name, src in files.items():
+            if name not in archive["frames"] or name in failed:
+                continue
+            arrays = parsed.get(name) or parse_snapshot(src)[0]
+            if not _verify(archive, name, arrays):
+                print(f"⚠️ {src}: archived frame differs, not pruned")
+                continue
+            clear_sidecar(src)
+            os.remove(src)
+            pruned += 1
+    return {"composition": os.path.basename(os.path.normpath(comp_dir)),
+            "frames": len(frames), "parsed": len(parsed), "pruned": pruned,
+            "source_bytes": source_bytes,
+            "archive_bytes": os.path.getsize(path) if frames else 0}
+
+
+# ---- Access by file name ---------------------------------------------------
+def find_frame(path):
+    """(archive, frame name) holding the snapshot file `path`, or None."""
+    path = os.path.abspath(path)
+    comp_dir = os.path.dirname(path)
+    for _ in range(2):                  # the folder itself or dat_files/ / cfg_files/
+        archive = archive_path(comp_dir)
+        name = os.path.relpath(path, comp_dir).replace(os.sep, "/")
+        if name in _read_index(archive):
+            return archive, name
+        comp_dir = os.path.dirname(comp_dir)
+    return None
+
+
+def archived(path, source):
+    """
+    Whether `path` is gone and its archived frame was made from a file with
+    the size and mtime of `source` (e.g. the run cache copy of it).
+    """
+    if os.path.exists(path):
+        return False
+    found = find_frame(path)
+    if found is None:
+        return False
+    st = os.stat(source)
+    stamp = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    return _read_index(found[0])[found[1]]["source"] == stamp
+
+
+def load_snapshot(path, arrays=None):
+    """The text snapshot while it exists, otherwise its archived frame."""
+    if os.path.exists(path):
+        return read_snapshot(path)
+    found = find_frame(path)
+    if found is None:
+        raise FileNotFoundError(f"{path}: neither on disk nor in an archive")
+    return read_frame(found[0], found[1], arrays)
+
+
+def export_frame(archive, name, out_path):
+    """Write one archived frame as a LAMMPS data file (OVITO, read_data)."""
+    snap = read_frame(archive, name)
+    positions = np.asarray(snap["positions"], dtype=float) - snap["box"]["origin"]
+    write_lammps_data(out_path, positions, snap["types"], snap["box"],
+                      f"{name} from {os.path.basename(snap['path'].split(':')[0])}")
+    return out_path
+
+
+# ---- CLI -------------------------------------------------------------------
+def composition_dirs(results_dir=RESULTS_DIR):
+    return sorted(os.path.dirname(p) for p in
+                  glob.glob(os.path.join(results_dir, "*", "")) if composition_snapshots(p)
+                  or os.path.exists(archive_path(p)))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Pack snapshots into per-composition archives.")
+    p.add_argument("folders", nargs="*", help="composition folders (default: all under Results/)")
+    p.add_argument("--results-dir", default=RESULTS_DIR)
+    p.add_argument("--prune", action="store_true", help="delete archived text snapshots")
+    p.add_argument("--list", action="store_true", help="list the frames of the folders")
+    p.add_argument("--extract", nargs=2, metavar=("FOLDER", "FRAME"),
+                   help="write one frame as a LAMMPS data file")
+    p.add_argument("-o", "--output", default=None, help="--extract: output file")
+    p.add_argument("-j", "--workers", type=int, default=None)
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    args = p.parse_args(argv)
+
+    if args.extract:
+        folder, name = args.extract
+        out = args.output or os.path.basename(name).rsplit(".", 1)[0] + ".data"
+        export_frame(open_archive(folder), name, out)
+        print(f"✅ {name} written to: {out}")
+        return 0
+
+    folders = args.folders or composition_dirs(args.results_dir)
+    if args.list:
+        for folder in folders:
+            arc = open_archive(folder)
+            print(f"📦 {arc['path']} ({os.path.getsize(arc['path']) / 1e6:.1f} MB)")
+            for name, meta in arc["frames"].items():
+                print(f"   {name}: {meta['natoms']} atoms")
+        return 0
+
+    start = time.time()
+    print(f"📦 Archiving {len(folders)} composition folders...")
+    with instrument.stage("archive", report=args.report, prune=args.prune) as rec:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(archive_composition, folders, [args.prune] * len(folders)))
+        rec.update(folders=len(folders), frames=sum(r["frames"] for r in results),
+                   parsed=sum(r["parsed"] for r in results),
+                   archive_bytes=sum(r["archive_bytes"] for r in results))
+    for r in results:
+        ratio = r["source_bytes"] / r["archive_bytes"] if r["archive_bytes"] else 0.0
+        print(f"  {r['composition']}: {r['frames']} frames ({r['parsed']} new), "
+              f"{r['archive_bytes'] / 1e6:.1f} MB"
+              + (f", {ratio:.1f}× smaller than the text files" if r["source_bytes"] else "")
+              + (f", {r['pruned']} files pruned" if r["pruned"] else ""))
+    print(f"✅ {sum(r['frames'] for r in results)} frames archived in {time.time() - start:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,277 @@
+"""
+snapshot_reader.py
+Fast reader for the write_data (data_<phase>_<T>K.dat) and write_dump cfg
+(final_<phase>_<T>K.cfg) snapshots of every run.
+
+A text file is parsed once with NumPy (the atom block is located by byte
+offset and converted in one call, no Python loop per atom). The result is
+stored in a binary sidecar directory next to the file,
+  .data_fcc_300K.dat.snap/{meta.json, positions.npy, types.npy, ids.npy, images.npy}
+and later loads memory-map those .npy files, so opening hundreds of
+snapshots is instant and only the pages actually touched are read. The
+sidecar is rebuilt when the source file's mtime or size changes.
+
+    snap = read_snapshot("Cr0.33_Co0.33_Fe0.34/data_fcc_300K.dat")
+    snap["positions"]      # (N, 3) float64, Cartesian Å (memory-mapped)
+    snap["types"]          # (N,) int8, 1 = Cr, 2 = Co, 3 = Fe
+    snap["box"]            # {"origin", "lx", "ly", "lz", "xy", "xz", "yz"}
+    type_fractions(snap)   # composition check
+
+CFG dumps carry no atom IDs (ids are 1..N in file order); their types are
+recovered from the per-atom masses unless element names were set with
+dump_modify element.
+
+Usage
+-----
+python snapshot_reader.py                     # index every snapshot under Results/
+python snapshot_reader.py a.dat b.cfg -j 8
+python snapshot_reader.py --clear             # delete the sidecars
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from supercell import ELEMENTS, MASSES
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
+
+SIDECAR_SUFFIX = ".snap"
+SIDECAR_VERSION = 1
+ARRAYS = ("positions", "types", "ids", "images")
+
+
+# ---- Text parsers ----------------------------------------------------------
+def _numbers(text):
+    """Whitespace-separated numbers → flat float64 array (single C-level pass)."""
+    return np.fromstring(text, dtype=np.float64, sep=" ")
+
+
+def _header_value(header, key):
+    for line in header.splitlines():
+        if line.rstrip().endswith(key):
+            return line.split()
+    return None
+
+
+def parse_data_file(path):
+    """Atoms section (and box) of a LAMMPS data file as arrays."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = mm.find(b"\nAtoms")
+        if start < 0:
+            raise ValueError(f"{path}: no Atoms section")
+        header = mm[:start].decode(errors="replace")
+        # Skip the "Atoms # style" line and the blank line after it
+        start = mm.find(b"\n", start + 1) + 1
+        while mm[start:start + 1] in (b"\n", b"\r"):
+            start += 1
+        end = mm.find(b"\n\n", start)
+        block = mm[start:end if end >= 0 else len(mm)].decode()
+
+    natoms = int(_header_value(header, " atoms")[0])
+    box = {"origin": [0.0, 0.0, 0.0], "xy": 0.0, "xz": 0.0, "yz": 0.0}
+    for i, axis in enumerate("xyz"):
+        lo, hi = (float(v) for v in _header_value(header, f"{axis}lo {axis}hi")[:2])
+        box["origin"][i] = lo
+        box[f"l{axis}"] = hi - lo
+    tilt = _header_value(header, "xy xz yz")
+    if tilt:
+        box["xy"], box["xz"], box["yz"] = (float(v) for v in tilt[:3])
+
+    values = _numbers(block)
+    if natoms == 0 or len(values) % natoms:
+        raise ValueError(f"{path}: cannot split {len(values)} values into {natoms} atoms")
+    cols = values.reshape(natoms, -1)
+    # atomic style: id type x y z [ix iy iz]
+    arrays = {"ids": cols[:, 0].astype(np.int32), "types": cols[:, 1].astype(np.int8),
+              "positions": np.ascontiguousarray(cols[:, 2:5])}
+    if cols.shape[1] >= 8:
+        arrays["images"] = cols[:, 5:8].astype(np.int16)
+    return arrays, box
+
+
+def _types_from_cfg(masses, elements):
+    """Atom types from element names (if set) or else from the masses."""
+    names = np.unique(elements)
+    if all(name in ELEMENTS for name in names):
+        lookup = {name: i + 1 for i, name in enumerate(ELEMENTS)}
+        return np.array([lookup[e] for e in elements], dtype=np.int8)
+    ref = np.array([MASSES[e] for e in ELEMENTS])
+    nearest = np.abs(masses[:, None] - ref[None, :]).argmin(axis=1)
+    return (nearest + 1).astype(np.int8)
+
+
+def parse_cfg(path):
+    """Extended CFG dump (mass / element / reduced coordinates per atom)."""
+    with open(path, 'r') as f:
+        text = f.read()
+    head, _, body = text.partition("entry_count")
+    entry_count = int(body.split("\n", 1)[0].split("=")[1])
+    lines = body.split("\n", 1)[1].splitlines()
+    lines = [line for line in lines if not line.startswith("auxiliary")]
+
+    H = np.zeros((3, 3))
+    natoms = 0
+    for line in head.splitlines():
+        if line.startswith("Number of particles"):
+            natoms = int(line.split("=")[1])
+        elif line.startswith("H0("):
+            i, j = (int(v) - 1 for v in line[3:line.index(")")].split(","))
+            H[i, j] = float(line.split("=")[1].split()[0])
+
+    masses = _numbers(" ".join(lines[0:3 * natoms:3]))
+    elements = np.array([line.strip() for line in lines[1:3 * natoms:3]])
+    reduced = _numbers(" ".join(lines[2:3 * natoms:3])).reshape(natoms, entry_count)[:, :3]
+    arrays = {"ids": np.arange(1, natoms + 1, dtype=np.int32),
+              "types": _types_from_cfg(masses, elements),
+              "positions": reduced @ H}
+    box = {"origin": [0.0, 0.0, 0.0], "lx": H[0, 0], "ly": H[1, 1], "lz": H[2, 2],
+           "xy": H[1, 0], "xz": H[2, 0], "yz": H[2, 1]}
+    return arrays, box
+
+
+def parse_snapshot(path):
+    """(arrays, box) from a .cfg dump or a data file (anything else)."""
+    if path.endswith(".cfg"):
+        return parse_cfg(path)
+    return parse_data_file(path)
+
+
+# ---- Sidecar cache ---------------------------------------------------------
+def sidecar_dir(path):
+    head, name = os.path.split(os.path.abspath(path))
+    return os.path.join(head, f".{name}{SIDECAR_SUFFIX}")
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _load_sidecar(path, mmap_mode):
+    side = sidecar_dir(path)
+    try:
+        with open(os.path.join(side, "meta.json"), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != SIDECAR_VERSION or meta.get("source") != _source_stamp(path):
+        return None
+    snap = {"path": path, "box": meta["box"], "natoms": meta["natoms"]}
+    for name in meta["arrays"]:
+        snap[name] = np.load(os.path.join(side, f"{name}.npy"), mmap_mode=mmap_mode)
+    return snap
+
+
+def _write_sidecar(path, arrays, box, stamp):
+    side = sidecar_dir(path)
+    tmp = f"{side}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    meta = {"version": SIDECAR_VERSION, "source": stamp, "box": box,
+            "natoms": len(arrays["types"]), "arrays": sorted(arrays)}
+    with open(os.path.join(tmp, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(side, ignore_errors=True)
+    try:
+        os.replace(tmp, side)
+    except OSError:
+        # Another process published the same sidecar first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def read_snapshot(path, cache=True, mmap_mode="r"):
+    """
+    Positions, types, ids (and image flags for data files) of one snapshot.
+    With cache, arrays come memory-mapped from the sidecar (built on first use).
+    """
+    if cache:
+        snap = _load_sidecar(path, mmap_mode)
+        if snap is not None:
+            return snap
+    stamp = _source_stamp(path)
+    arrays, box = parse_snapshot(path)
+    box = {k: (list(map(float, v)) if k == "origin" else float(v)) for k, v in box.items()}
+    if cache:
+        _write_sidecar(path, arrays, box, stamp)
+    return {"path": path, "box": box, "natoms": len(arrays["types"]), **arrays}
+
+
+def clear_sidecar(path):
+    shutil.rmtree(sidecar_dir(path), ignore_errors=True)
+
+
+# ---- Helpers ---------------------------------------------------------------
+def cell_matrix(box):
+    """Rows are the box vectors a, b, c (LAMMPS restricted triclinic)."""
+    return np.array([[box["lx"], 0.0, 0.0],
+                     [box["xy"], box["ly"], 0.0],
+                     [box["xz"], box["yz"], box["lz"]]])
+
+
+def fractional(snap):
+    """Reduced coordinates in [0, 1) of every atom."""
+    s = (np.asarray(snap["positions"]) - snap["box"]["origin"]) @ np.linalg.inv(cell_matrix(snap["box"]))
+    return s - np.floor(s)
+
+
+def type_fractions(snap, ntypes=len(ELEMENTS)):
+    """Fraction of each atom type 1..ntypes (e.g. the Cr, Co, Fe composition)."""
+    counts = np.bincount(np.asarray(snap["types"]), minlength=ntypes + 1)[1:ntypes + 1]
+    return counts / max(len(snap["types"]), 1)
+
+
+def snapshot_files(results_dir=RESULTS_DIR):
+    """data_*.dat and final_*.cfg in every composition folder (incl. organized subfolders)."""
+    files = []
+    for pattern in ("data_*.dat", "final_*.cfg"):
+        files += glob.glob(os.path.join(results_dir, "*", pattern))
+        files += glob.glob(os.path.join(results_dir, "*", "*", pattern))
+    return sorted(files)
+
+
+# ---- CLI -------------------------------------------------------------------
+def _index(path):
+    snap = read_snapshot(path)
+    return path, snap["natoms"], type_fractions(snap).tolist()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Index LAMMPS snapshots into binary sidecars.")
+    p.add_argument("paths", nargs="*", help="files (default: every snapshot under Results/)")
+    p.add_argument("--results-dir", default=RESULTS_DIR)
+    p.add_argument("--clear", action="store_true", help="delete the sidecars")
+    p.add_argument("-j", "--workers", type=int, default=None)
+    args = p.parse_args(argv)
+
+    paths = args.paths or snapshot_files(args.results_dir)
+    if args.clear:
+        for path in paths:
+            clear_sidecar(path)
+        print(f"🗑️ Removed sidecars of {len(paths)} snapshots")
+        return
+
+    start = time.time()
+    print(f"🔍 Indexing {len(paths)} snapshots...")
+    natoms = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for path, n, fractions in pool.map(_index, paths):
+            natoms += n
+            comp = " ".join(f"{el}={x:.3f}" for el, x in zip(ELEMENTS, fractions))
+            print(f"  {os.path.relpath(path, args.results_dir)}: {n} atoms, {comp}")
+    print(f"✅ {len(paths)} snapshots, {natoms} atoms indexed in {time.time() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+sqs.py
+Special quasi-random structures (SQS) for fcc / hcp / dhcp Cr–Co–Fe cells.
+
+Instead of one random shuffle per composition (`set type/fraction` in
+CrCoFe.in, random_types in supercell.py), the species are arranged so that
+the Warren–Cowley short-range-order parameters of the first shells are as
+close as possible to those of the ideal random alloy (α = 0):
+    α_s^ab = 1 − N_s^ab / (B_s x_a x_b)
+N_s^ab is the number of (ordered) a–b bonds in shell s, B_s the number of
+bonds in that shell and x the composition. The search is simulated
+annealing over swaps of two unlike atoms.
+
+The neighbour list of every shell is built once (periodic images included,
+so small cells are handled exactly). A swap of atoms i (type a) and
+j (type b) only changes the bond counts through the neighbour types n_i,
+n_j of the two atoms (the i–j bonds themselves stay a–b):
+    ΔN_s = (e_b − e_a) ⊗ (n_i − n_j) + its transpose
+so each trial move costs O(neighbours), independent of the cell size.
+
+    positions, types, box, info = build_sqs("fcc", (6, 6, 3), (0.5, 0.25, 0.25))
+    info["alpha"]          # (shells, 3, 3) Warren–Cowley parameters
+
+run_sweep.py --sqs uses these cells for all phases (read through
+Lammps Scripts/CrCoFe_dhcp.in).
+
+Usage
+-----
+python sqs.py fcc --size 6 6 3 --composition 0.50 0.25 0.25 -o fcc_sqs.data
+python sqs.py dhcp --size 6 6 2 --shells 4 --steps 50000
+"""
+
+import argparse
+import itertools
+import math
+
+import numpy as np
+
+import supercell
+from snapshot_reader import cell_matrix
+
+SHELLS = 3              # neighbour shells matched
+STEPS = 20000           # annealing swap trials
+TOL = 1e-3              # relative distance tolerance of a shell
+# Default SQS cells (nx, ny, stacking repeats): ~300 atoms per phase
+SQS_SIZES = {"fcc": (6, 6, 3), "hcp": (6, 6, 4), "dhcp": (6, 6, 2)}
+
+
+# ---- Neighbour shells ------------------------------------------------------
+def _image_shifts(H, cutoff):
+    """Lattice translations (fractional) that can bring a neighbour within cutoff."""
+    volume = abs(np.linalg.det(H))
+    reps = []
+    for k in range(3):
+        cross = np.cross(H[(k + 1) % 3], H[(k + 2) % 3])
+        width = volume / np.linalg.norm(cross)
+        reps.append(int(math.ceil(cutoff / width)))
+    ranges = [range(-r, r + 1) for r in reps]
+    return np.array(list(itertools.product(*ranges)), dtype=float)
+
+
+def _pair_distances(frac, H, centers, cutoff, chunk=64):
+    """(i, j, d) of every periodic pair with d < cutoff for the atoms `centers`."""
+    shifts = _image_shifts(H, cutoff)
+    out_i, out_j, out_d = [], [], []
+    for start in range(0, len(centers), chunk):
+        idx = centers[start:start + chunk]
+        df = frac[None, :, :] - frac[idx, None, :]
+        df -= np.round(df)
+        # (chunk, N, images, 3) Cartesian separations
+        dr = (df[:, :, None, :] + shifts[None, None, :, :]) @ H
+        d = np.linalg.norm(dr, axis=-1)
+        i, j, _ = np.nonzero((d < cutoff) & (d > 1e-8))
+        out_i.append(idx[i])
+        out_j.append(j)
+        out_d.append(d[(d < cutoff) & (d > 1e-8)])
+    return np.concatenate(out_i), np.concatenate(out_j), np.concatenate(out_d)
+
+
+def neighbor_shells(positions, box, nshells=SHELLS, tol=TOL):
+    """
+    Shell radii and, per shell, a padded (N, z_max) neighbour-index array
+    (sentinel N where a site has fewer neighbours in that shell). A
+    neighbour reached through several periodic images appears once per image.
+    """
+    H = cell_matrix({"xz": 0.0, "yz": 0.0, "xy": 0.0, **box})
+    frac = positions @ np.linalg.inv(H)
+    frac -= np.floor(frac)
+    natoms = len(positions)
+
+    # Shell radii from one atom per distinct layer (all inequivalent sites)
+    _, first = np.unique(np.round(positions[:, 2], 6), return_index=True)
+    d1 = _pair_distances(frac, H, first[:1], np.linalg.norm(H, axis=1).max())[2].min()
+    cutoff = 1.5 * d1
+    while True:
+        d = np.sort(_pair_distances(frac, H, first, cutoff)[2])
+        radii = d[np.concatenate([[True], np.diff(d) > tol * d1])]
+        if len(radii) > nshells:
+            break
+        cutoff *= 1.25
+    radii = radii[:nshells]
+
+    i, j, d = _pair_distances(frac, H, np.arange(natoms), radii[-1] * (1 + tol))
+    shell = np.abs(d[:, None] - radii[None, :]).argmin(axis=1)
+    shells = []
+    for s in range(nshells):
+        si, sj = i[shell == s], j[shell == s]
+        z = np.bincount(si, minlength=natoms)
+        nbr = np.full((natoms, z.max()), natoms, dtype=np.int32)
+        order = np.argsort(si, kind="stable")
+        rank = np.arange(len(si)) - np.repeat(np.cumsum(z) - z, z)
+        nbr[si[order], rank] = sj[order]
+        shells.append(nbr)
+    return radii, shells
+
+
+# ---- Correlations ----------------------------------------------------------
+def pair_counts(types, shells, ntypes=len(supercell.ELEMENTS)):
+    """(shells, K, K) ordered bond counts N_s^ab (types 1..K → indices 0..K-1)."""
+    t = np.append(np.asarray(types, dtype=np.int64) - 1, ntypes)     # sentinel → K
+    counts = np.zeros((len(shells), ntypes, ntypes))
+    for s, nbr in enumerate(shells):
+        a = np.repeat(t[:-1], nbr.shape[1])
+        b = t[nbr.ravel()]
+        keep = b < ntypes
+        np.add.at(counts[s], (a[keep], b[keep]), 1.0)
+    return counts
+
+
+def warren_cowley(counts, fractions):
+    """α_s^ab = 1 − N_s^ab / (B_s x_a x_b); NaN for absent species."""
+    bonds = counts.sum(axis=(1, 2))[:, None, None]
+    expected = bonds * np.outer(fractions, fractions)[None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(expected > 0, 1.0 - counts / expected, np.nan)
+
+
+def shell_weights(nshells):
+    """Closer shells matter more: w_s = 1/s."""
+    return 1.0 / np.arange(1, nshells + 1)
+
+
+def objective(alpha, weights):
+    """Σ_s w_s Σ_{a≤b} (α_s^ab)² over the species present."""
+    iu = np.triu_indices(alpha.shape[1])
+    a2 = np.nan_to_num(alpha[:, iu[0], iu[1]]) ** 2
+    return float(weights @ a2.sum(axis=1))
+
+
+# ---- Annealing -------------------------------------------------------------
+def _neighbor_types(t, nbr_row, exclude, ntypes):
+    """Type histogram of one atom's neighbours in a shell, without `exclude`."""
+    nb = nbr_row[nbr_row != exclude]
+    return np.bincount(t[nb], minlength=ntypes + 1)[:ntypes]
+
+
+def anneal(types, shells, steps=STEPS, weights=None, seed=12345, t_start=None, t_end=1e-7):
+    """
+    Swap-move simulated annealing of `types` towards α = 0.
+    Returns (best types, best α, objective history every 1 % of the steps).
+    """
+    rng = np.random.default_rng(seed)
+    ntypes = len(supercell.ELEMENTS)
+    natoms = len(types)
+    t = np.append(np.asarray(types, dtype=np.int64) - 1, ntypes)
+    fractions = np.bincount(t[:-1], minlength=ntypes) / natoms
+    weights = shell_weights(len(shells)) if weights is None else np.asarray(weights)
+
+    counts = pair_counts(types, shells, ntypes)
+    current = objective(warren_cowley(counts, fractions), weights)
+    best_t, best_obj = t.copy(), current
+    if len(np.unique(t[:-1])) < 2:
+        return types, warren_cowley(counts, fractions), [current]
+
+    def trial():
+        """A random unlike pair (i, j) and the bond counts after swapping it."""
+        while True:
+            i, j = rng.integers(natoms, size=2)
+            if t[i] != t[j]:
+                break
+        delta = np.zeros_like(counts)
+        e = np.zeros(ntypes)
+        e[t[j]], e[t[i]] = 1.0, -1.0
+        for s, nbr in enumerate(shells):
+            dn = (_neighbor_types(t, nbr[i], j, ntypes)
+                  - _neighbor_types(t, nbr[j], i, ntypes))
+            delta[s] = np.outer(e, dn) + np.outer(dn, e)
+        return i, j, counts + delta
+
+    if t_start is None:
+        # Typical uphill step of a random swap sets the starting temperature
+        ups = [objective(warren_cowley(trial()[2], fractions), weights) - current
+               for _ in range(min(200, steps))]
+        ups = [u for u in ups if u > 0]
+        t_start = float(np.mean(ups)) if ups else 1e-3
+    cooling = (t_end / t_start) ** (1.0 / max(steps - 1, 1))
+
+    history, temp = [current], t_start
+    for step in range(steps):
+        i, j, new_counts = trial()
+        new = objective(warren_cowley(new_counts, fractions), weights)
+        if new <= current or rng.random() < math.exp(-(new - current) / temp):
+            t[i], t[j] = t[j], t[i]
+            counts, current = new_counts, new
+            if current < best_obj:
+                best_t, best_obj = t.copy(), current
+        temp *= cooling
+        if (step + 1) % max(steps // 100, 1) == 0:
+            history.append(current)
+    best_types = (best_t[:-1] + 1).astype(np.int8)
+    return best_types, warren_cowley(pair_counts(best_types, shells, ntypes), fractions), history
+
+
+def build_sqs(phase, size=None, composition=(1 / 3, 1 / 3, 1 / 3), seed=12345,
+              nshells=SHELLS, steps=STEPS, a=supercell.A_HEX, weights=None):
+    """
+    Positions, types and box of an SQS cell (as supercell.build) and an info
+    dict with the shell radii, α before/after and the objective history.
+    """
+    size = tuple(size or SQS_SIZES[phase])
+    positions, types, box = supercell.build(phase=phase, a=a, size=size,
+                                            composition=composition, seed=seed)
+    radii, shells = neighbor_shells(positions, box, nshells)
+    fractions = np.bincount(types, minlength=len(supercell.ELEMENTS) + 1)[1:] / len(types)
+    alpha0 = warren_cowley(pair_counts(types, shells), fractions)
+    types, alpha, history = anneal(types, shells, steps, weights, seed)
+    info = {"radii": radii, "coordination": [int((nbr < len(types)).sum(axis=1).max())
+                                             for nbr in shells],
+            "alpha_random": alpha0, "alpha": alpha, "history": history}
+    return positions, types, box, info
+
+
+# ---- CLI -------------------------------------------------------------------
+def alpha_table(alpha):
+    """One line per shell with the α of every unlike and like pair."""
+    iu = np.triu_indices(alpha.shape[1])
+    names = [f"{supercell.ELEMENTS[a]}-{supercell.ELEMENTS[b]}" for a, b in zip(*iu)]
+    lines = []
+    for s, shell in enumerate(alpha, start=1):
+        lines.append(f"  shell {s}: " + "  ".join(
+            f"{n}={v:+.4f}" for n, v in zip(names, shell[iu]) if np.isfinite(v)))
+    return lines
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Special quasi-random Cr–Co–Fe supercells.")
+    p.add_argument("phase", choices=sorted(supercell.SEQUENCES))
+    p.add_argument("--size", type=int, nargs=3, default=None, metavar=("NX", "NY", "NREPEATS"),
+                   help="default: SQS_SIZES of the phase")
+    p.add_argument("--composition", type=float, nargs=3, default=[0.33, 0.33, 0.34],
+                   metavar=("xCr", "xCo", "xFe"))
+    p.add_argument("--a", type=float, default=supercell.A_HEX, help="in-plane NN distance (Å)")
+    p.add_argument("--shells", type=int, default=SHELLS)
+    p.add_argument("--steps", type=int, default=STEPS)
+    p.add_argument("--seed", type=int, default=12345)
+    p.add_argument("-o", "--output", default=None)
+    args = p.parse_args(argv)
+
+    positions, types, box, info = build_sqs(args.phase, args.size, args.composition, args.seed,
+                                            args.shells, args.steps, args.a)
+    nx, ny, nrepeats = args.size or SQS_SIZES[args.phase]
+    outname = args.output or f"{args.phase}_sqs_{nx}x{ny}x{nrepeats}.data"
+    supercell.write_lammps_data(
+        outname, positions, types, box,
+        f"{args.phase} SQS ({supercell.SEQUENCES[args.phase]}) nx={nx} ny={ny} "
+        f"repeats={nrepeats} shells={args.shells} seed={args.seed}")
+
+    radii = ", ".join(f"{r:.3f}" for r in info["radii"])
+    print(f"🔍 Shells at {radii} Å (z = {info['coordination']})")
+    print("Random start:")
+    print("\n".join(alpha_table(info["alpha_random"])))
+    print(f"SQS ({args.steps} swaps):")
+    print("\n".join(alpha_table(info["alpha"])))
+    print(f"✅ Wrote {outname} with {len(types)} atoms")
+
+
+if __name__ == "__main__":
+    main()
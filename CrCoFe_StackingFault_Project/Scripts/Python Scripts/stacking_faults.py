@@ -0,0 +1,327 @@
+"""
+stacking_faults.py
+Direct γ_ISF / γ_ESF / γ_Twin from explicitly faulted {111} supercells.
+
+Every fault is built by relabelling the A/B/C stacking of the layers above
+a fault plane k in the middle of a periodic-in-plane slab (vacuum along z):
+  perfect  ...A B C A B C A B C...
+  ISF      layers i > k shifted by one partial      ...A B C A | C A B...
+  ESF      i > k by one partial, i > k+1 by another ...A B C A | C | B C A...
+  Twin     layers mirrored about k                  ...A B C A | C B A...
+Atom order and types are identical in all four structures. The block above
+k is moved as a whole: translated by one or two partials (ISF, ESF), or
+mirrored in-plane (y → −y, which swaps the B and C sites) and translated
+onto the mirrored stacking (Twin). Every atom therefore keeps its
+neighbours except across the fault, and the perfect slab (its surfaces and
+its random chemistry) is a common reference:
+    γ = (E_fault − E_perfect) / (lx · ly)        [eV/Å² → mJ/m²]
+The Twin value is the energy of one coherent twin boundary.
+
+Per composition, one generated LAMMPS input relaxes the perfect slab and
+the three faults for every temperature in a single invocation: the
+potential is set up once and each structure replaces the previous one with
+delete_atoms + read_data add merge. Temperatures enter through the lattice
+parameter a_fcc(T) of Lattice_all.csv (static relaxation, z only by
+default). The jobs run through run_sweep.py's scheduler and run cache.
+
+Usage
+-----
+python stacking_faults.py --cores 64 --ranks-per-job 4
+python stacking_faults.py --collect-only        # re-read the logs only
+
+Output
+------
+- Results/All_Results_Compiled/SFE_direct.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+import re
+
+import numpy as np
+
+import instrument
+import run_sweep
+import supercell
+from annni import EV_PER_A2_TO_MJ_PER_M2, FAULTS, cell_lattice_parameter
+
+# Paths
+LATTICE_FILE = os.path.join(run_sweep.RESULTS_DIR, 'All_Results_Compiled', 'Lattice_all.csv')
+FAULTS_DIR = os.path.join(run_sweep.STRUCTURES_DIR, 'faults')
+
+CONFIGS = ("perfect",) + FAULTS
+SIZE = (10, 10)         # in-plane cells of the slab
+NLAYERS = 24            # {111} layers
+VACUUM = 15.0           # Å of vacuum above the slab
+SEED = 12345
+LOG = os.path.join("out_files", "log_faults.out")
+
+RE_FAULT = re.compile(r'^Fault (\w+) T=(\S+): E=(\S+) area=(\S+) atoms=(\d+)')
+
+
+# ---- Structures ------------------------------------------------------------
+def fault_shifts(kind, nlayers=NLAYERS, plane=None):
+    """A/B/C site index (0, 1, 2) of every layer for one fault type."""
+    k = nlayers // 2 if plane is None else plane
+    i = np.arange(nlayers)
+    s = i % 3
+    if kind == "ISF":
+        s = s + (i > k)
+    elif kind == "ESF":
+        s = s + (i > k) + (i > k + 1)
+    elif kind == "Twin":
+        s = np.where(i > k, 2 * k - i, i)
+    elif kind != "perfect":
+        raise ValueError(f"Unknown fault type: {kind!r}")
+    return s % 3
+
+
+def fault_sequence(kind, nlayers=NLAYERS, plane=None):
+    """Stacking of the slab as a string, e.g. 'ABCACAB...' for an ISF."""
+    return "".join("ABC"[s] for s in fault_shifts(kind, nlayers, plane))
+
+
+def fault_slab(kind, a_fcc=supercell.A_FCC, size=SIZE, nlayers=NLAYERS, vacuum=VACUUM):
+    """
+    Positions and triclinic box of a (faulted) {111} slab with vacuum.
+
+    Every atom keeps its index. Above an ISF/ESF each layer is moved forward
+    along <112> by the number of partials it changes site (0, 1 or 2), so the
+    blocks are rigid translations of the perfect slab with the same
+    chemistry. The twinned block is the in-plane mirror image (y → −y) of the
+    perfect one, translated by 2k partials: site s → 2k − s, and every atom
+    keeps its (mirrored) neighbours. The mirror maps the periodic cell onto
+    itself only when ny is a multiple of nx.
+    """
+    nx, ny = size
+    if kind == "Twin" and ny % nx:
+        raise ValueError(f"Twin slab needs ny to be a multiple of nx, got {nx}x{ny}")
+    a = a_fcc / math.sqrt(2.0)
+    positions, box = supercell.stacking_positions(
+        fault_sequence("perfect", nlayers), a, nx, ny, 1,
+        layer_spacing=a_fcc / math.sqrt(3.0))
+    # In-plane lattice coordinates (u along x, v along the 60° vector)
+    fv = positions[:, 1] / (a * math.sqrt(3.0) / 2.0)
+    fu = positions[:, 0] / a - 0.5 * fv
+    if kind == "Twin":
+        k = nlayers // 2
+        above = np.repeat(np.arange(nlayers) > k, nx * ny)
+        fu, fv = np.where(above, fu + fv, fu), np.where(above, -fv, fv)
+        partials = np.where(above, 2 * k, 0)
+    else:
+        partials = np.repeat((fault_shifts(kind, nlayers) - fault_shifts("perfect", nlayers)) % 3,
+                             nx * ny)
+    u, v = supercell.SITE_SHIFTS["B"]
+    # Back into the periodic (triclinic) cell
+    fu, fv = (fu + partials * u) % nx, (fv + partials * v) % ny
+    positions[:, 0] = a * (fu + 0.5 * fv)
+    positions[:, 1] = a * math.sqrt(3.0) / 2.0 * fv
+    return positions, dict(box, lz=box["lz"] + vacuum)
+
+
+# ---- LAMMPS input ----------------------------------------------------------
+def _data_name(folder, T, kind):
+    return os.path.join(FAULTS_DIR, folder, f"T{T}_{kind}.data")
+
+
+def _change_box(box):
+    return (f"change_box      all x final 0.0 {box['lx']:.8f} y final 0.0 {box['ly']:.8f} "
+            f"z final 0.0 {box['lz']:.8f} xy final {box['xy']:.8f} units box")
+
+
+def fault_input(folder, boxes, relax="z"):
+    """
+    Text of the per-composition LAMMPS input (paths relative to the job dir).
+    `boxes` maps each temperature to its slab box.
+    """
+    lines = [f"# Generated by stacking_faults.py: perfect slab + ISF/ESF/Twin, {folder}",
+             "", "units           metal", "atom_style      atomic", "boundary        p p p", ""]
+    for n, T in enumerate(boxes):
+        for kind in CONFIGS:
+            data = os.path.join("..", _data_name(folder, T, kind))
+            if n == 0 and kind == "perfect":
+                lines += [f"read_data       {data}",
+                          "pair_style      meam",
+                          "pair_coeff      * * ../library.meam Cr Co Fe ../CrCoFe.meam Cr Co Fe",
+                          "neighbor        2.0 bin",
+                          "neigh_modify    delay 0 every 1 check yes",
+                          "min_style       cg",
+                          "thermo          100",
+                          "thermo_style    custom step pe fnorm lx ly lz"]
+                if relax == "z":
+                    lines.append("fix             zonly all setforce 0.0 0.0 NULL")
+            else:
+                # Keep the potential loaded, swap the atoms (and box for a new T)
+                lines.append("delete_atoms    group all")
+                if kind == "perfect":
+                    lines.append(_change_box(boxes[T]))
+                lines.append(f"read_data       {data} add merge")
+            lines += ["minimize        0.0 1.0e-6 5000 50000",
+                      f'print           "Fault {kind} T={T}: E=$(pe:%.10f) '
+                      'area=$(lx*ly:%.10f) atoms=$(atoms)"', ""]
+    return "\n".join(lines)
+
+
+def write_composition(work_dir, composition, a_by_T, size=SIZE, nlayers=NLAYERS,
+                      vacuum=VACUUM, seed=SEED, relax="z"):
+    """
+    Data files for every temperature and configuration plus the input file
+    of one composition. Returns the run_sweep job dict.
+    """
+    folder = run_sweep.composition_folder(*composition)
+    natoms = size[0] * size[1] * nlayers
+    types = supercell.random_types(natoms, composition, seed)
+    deps, boxes = [], {}
+    for T, a in a_by_T.items():
+        for kind in CONFIGS:
+            positions, box = fault_slab(kind, a, size, nlayers, vacuum)
+            rel = _data_name(folder, T, kind)
+            path = os.path.join(work_dir, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp{os.getpid()}"
+            supercell.write_lammps_data(
+                tmp, positions, types, box,
+                f"{kind} {{111}} slab {folder} a_fcc={a:.6f} T={T} "
+                f"{size[0]}x{size[1]}x{nlayers} layers seed={seed}")
+            os.replace(tmp, path)
+            deps.append(rel)
+        boxes[T] = box
+
+    input_name = f"faults_{folder}.in"
+    with open(os.path.join(work_dir, input_name), 'w') as f:
+        f.write(fault_input(folder, boxes, relax) + "\n")
+    return {"name": f"{folder}/faults", "composition": folder, "phase": "faults",
+            "T": ",".join(str(T) for T in a_by_T), "input": input_name,
+            "variables": {}, "structure": None,
+            "deps": [input_name] + deps + ["library.meam", "CrCoFe.meam"],
+            "log": LOG, "outputs": [LOG]}
+
+
+# ---- Lattice parameters ----------------------------------------------------
+def lattice_parameters(path, compositions, temperatures, default=supercell.A_FCC):
+    """
+    {composition folder: {T: a_fcc}} from Lattice_all.csv (per-cell or legacy
+    supercell values); `default` where a composition/T is missing.
+    """
+    table = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    a = float(cell_lattice_parameter(float(row["a_fcc(Å)"])))
+                    table[(row["composition"], int(float(row["T(K)"])))] = a
+                except (KeyError, ValueError):
+                    continue
+    out = {}
+    for comp in compositions:
+        folder = run_sweep.composition_folder(*comp)
+        out[folder] = {T: table.get((folder, T), default) for T in temperatures}
+    return out
+
+
+# ---- Results ---------------------------------------------------------------
+def fault_energies(log_path):
+    """{(kind, T): (E, area, atoms)} from the 'Fault ...' lines of a log."""
+    energies = {}
+    with open(log_path, 'r', errors='replace') as f:
+        for line in f:
+            m = RE_FAULT.match(line)
+            if m:
+                energies[(m.group(1), m.group(2))] = (float(m.group(3)), float(m.group(4)),
+                                                      int(m.group(5)))
+    return energies
+
+
+def gamma_rows(folder, energies):
+    """One row per temperature: γ of each fault vs. the perfect slab (mJ/m²)."""
+    rows = []
+    temps = sorted({T for _, T in energies}, key=float)
+    for T in temps:
+        if ("perfect", T) not in energies:
+            continue
+        E0, area, atoms = energies[("perfect", T)]
+        row = {"composition": folder, "T(K)": int(float(T)), "E_perfect(eV)": E0,
+               "atoms": atoms, "area(Å²)": area}
+        for kind in FAULTS:
+            if (kind, T) in energies:
+                E = energies[(kind, T)][0]
+                row[f"γ_{kind}(mJ/m²)"] = (E - E0) / area * EV_PER_A2_TO_MJ_PER_M2
+        rows.append(row)
+    return rows
+
+
+def collect(work_dir, folders, output):
+    """Write SFE_direct.csv from the fault logs of `folders`."""
+    rows = []
+    for folder in folders:
+        log_path = os.path.join(work_dir, folder, LOG)
+        if os.path.exists(log_path):
+            rows += gamma_rows(folder, fault_energies(log_path))
+    fields = (["composition", "T(K)"] + [f"γ_{k}(mJ/m²)" for k in FAULTS]
+              + ["E_perfect(eV)", "atoms", "area(Å²)"])
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Direct stacking-fault energies from faulted slabs.")
+    p.add_argument("--compositions", default=run_sweep.COMPOSITIONS_FILE)
+    p.add_argument("--temps", nargs="+", type=int, default=run_sweep.TEMPS)
+    p.add_argument("--lattice", default=LATTICE_FILE,
+                   help=f"Lattice_all.csv for a_fcc(T) (default {supercell.A_FCC} Å if missing)")
+    p.add_argument("--size", type=int, nargs=2, default=list(SIZE), metavar=("NX", "NY"))
+    p.add_argument("--layers", type=int, default=NLAYERS)
+    p.add_argument("--vacuum", type=float, default=VACUUM)
+    p.add_argument("--seed", type=int, default=SEED)
+    p.add_argument("--relax", choices=["z", "full"], default="z",
+                   help="z: atoms relax along [111] only; full: all directions")
+    p.add_argument("--work-dir", default=run_sweep.RESULTS_DIR)
+    p.add_argument("--cores", type=int, default=None)
+    p.add_argument("--ranks-per-job", type=int, default=4)
+    p.add_argument("--lmp", default="lmp")
+    p.add_argument("--mpirun", default="mpirun", help="'none' to run lmp directly")
+    p.add_argument("--timeout", type=float, default=None)
+    p.add_argument("--cache-dir", default=run_sweep.CACHE_DIR)
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    p.add_argument("--collect-only", action="store_true", help="only re-read existing logs")
+    p.add_argument("-o", "--output", default=None,
+                   help="default: <work-dir>/All_Results_Compiled/SFE_direct.csv")
+    args = p.parse_args(argv)
+
+    compositions = run_sweep.read_compositions(args.compositions)
+    folders = [run_sweep.composition_folder(*c) for c in compositions]
+    output = args.output or os.path.join(args.work_dir, 'All_Results_Compiled', 'SFE_direct.csv')
+
+    failed = []
+    if not args.collect_only:
+        a_fcc = lattice_parameters(args.lattice, compositions, args.temps)
+        run_sweep.stage_inputs(args.work_dir)
+        jobs = [write_composition(args.work_dir, comp, a_fcc[folder], tuple(args.size),
+                                  args.layers, args.vacuum, args.seed, args.relax)
+                for comp, folder in zip(compositions, folders)]
+        print(f"🧱 {len(jobs)} compositions × {len(args.temps)} T × {len(CONFIGS)} slabs written")
+        mpirun = None if args.mpirun.lower() == "none" else args.mpirun
+        with instrument.stage("faults", report=args.report, jobs=len(jobs)):
+            results = run_sweep.run_jobs(jobs, args.work_dir, args.cores, args.ranks_per_job,
+                                         args.lmp, mpirun, args.timeout,
+                                         None if args.no_cache else args.cache_dir,
+                                         report=args.report)
+        failed = [r for r in results if r["status"] not in ("ok", "cached")]
+        for r in failed:
+            print(f"⚠️ {r['job']['name']}: {r['status']} (see {r['log']})")
+
+    rows = collect(args.work_dir, folders, output)
+    print(f"✅ SFE_direct.csv ({len(rows)} rows) written to: {output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
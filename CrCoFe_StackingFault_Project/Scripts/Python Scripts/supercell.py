@@ -0,0 +1,182 @@
+"""
+supercell.py
+Vectorized close-packed supercell generator (fcc / hcp / dhcp or any
+A/B/C stacking sequence) writing LAMMPS data files.
+
+Layers are triangular nets spanned by e1 = (a, 0, 0) and
+e2 = (a/2, a*sqrt(3)/2, 0), with A/B/C sites at fractional shifts
+(0, 0), (1/3, 1/3) and (2/3, 2/3). The box is the matching triclinic cell
+(nx*e1, ny*e2, nlayers*dz), so the structure is periodic in x, y and z as
+long as the stacking sequence closes on itself.
+
+Atom types follow the pair_coeff order used by the LAMMPS inputs
+(1 = Cr, 2 = Co, 3 = Fe).
+
+Usage
+-----
+python supercell.py dhcp --size 10 10 5 --composition 0.33 0.33 0.34 -o dhcp.data
+python supercell.py fcc --size 60 60 40 --binary -o fcc_big.npz
+python supercell.py --sequence ABCACB --size 10 10 4 -o 6H.data
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+ELEMENTS = ("Cr", "Co", "Fe")
+MASSES = {"Cr": 51.996, "Co": 58.933, "Fe": 55.845}
+
+# Stacking period of each phase (layers along [111] / [0001])
+SEQUENCES = {"fcc": "ABC", "hcp": "AB", "dhcp": "ABAC"}
+SITE_SHIFTS = {"A": (0.0, 0.0), "B": (1.0 / 3.0, 1.0 / 3.0), "C": (2.0 / 3.0, 2.0 / 3.0)}
+
+A_FCC = 3.54                       # cubic fcc lattice parameter used in CrCoFe.in (Å)
+A_HEX = A_FCC / math.sqrt(2.0)     # nearest-neighbour distance in a close-packed layer
+CHUNK = 200000                     # atoms formatted per write call
+
+
+# ---- Geometry --------------------------------------------------------------
+def stacking_positions(sequence, a=A_HEX, nx=10, ny=10, nrepeats=5, layer_spacing=None):
+    """
+    Positions of a close-packed stack, vectorized over all atoms.
+
+    sequence       stacking period, e.g. "ABC" (fcc) or "ABAC" (dhcp)
+    a              in-plane nearest-neighbour distance (Å)
+    nx, ny         in-plane repetitions
+    nrepeats       number of stacking periods along z
+    layer_spacing  distance between layers (default: ideal a*sqrt(2/3))
+
+    Returns (positions (N, 3) float64, box dict with lx, ly, lz, xy).
+    """
+    sequence = sequence.upper()
+    if not sequence or set(sequence) - set(SITE_SHIFTS):
+        raise ValueError(f"Stacking sequence must use only A/B/C: {sequence!r}")
+    dz = a * math.sqrt(2.0 / 3.0) if layer_spacing is None else layer_spacing
+    nlayers = len(sequence) * nrepeats
+
+    shifts = np.array([SITE_SHIFTS[s] for s in sequence] * nrepeats)      # (L, 2)
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny), indexing="ij")
+    # Fractional in-plane coordinates for every (layer, site): (L, nx*ny)
+    fu = (ix.ravel()[None, :] + shifts[:, 0:1]) % nx
+    fv = (iy.ravel()[None, :] + shifts[:, 1:2]) % ny
+
+    positions = np.empty((nlayers, nx * ny, 3))
+    positions[..., 0] = a * (fu + 0.5 * fv)
+    positions[..., 1] = a * (math.sqrt(3.0) / 2.0) * fv
+    positions[..., 2] = (np.arange(nlayers) * dz)[:, None]
+
+    box = {"lx": nx * a, "ly": ny * a * math.sqrt(3.0) / 2.0,
+           "lz": nlayers * dz, "xy": ny * a / 2.0}
+    return positions.reshape(-1, 3), box
+
+
+def phase_positions(phase, a=A_HEX, nx=10, ny=10, nrepeats=5, layer_spacing=None):
+    """stacking_positions for a named phase (fcc, hcp, dhcp)."""
+    return stacking_positions(SEQUENCES[phase], a, nx, ny, nrepeats, layer_spacing)
+
+
+# ---- Chemistry -------------------------------------------------------------
+def species_counts(natoms, composition):
+    """Exact atom counts per element (largest-remainder rounding)."""
+    x = np.asarray(composition, dtype=float)
+    x = x / x.sum()
+    raw = x * natoms
+    counts = np.floor(raw).astype(int)
+    short = natoms - counts.sum()
+    counts[np.argsort(raw - counts)[::-1][:short]] += 1
+    return counts
+
+
+def random_types(natoms, composition, seed=12345):
+    """Random substitutional types 1..3 for (xCr, xCo, xFe)."""
+    counts = species_counts(natoms, composition)
+    types = np.repeat(np.arange(1, len(counts) + 1, dtype=np.int8), counts)
+    return np.random.default_rng(seed).permutation(types)
+
+
+# ---- Output ----------------------------------------------------------------
+def write_lammps_data(path, positions, types, box, comment="Cr-Co-Fe supercell"):
+    """Write an atomic-style LAMMPS data file, formatted in large chunks."""
+    natoms = len(positions)
+    with open(path, "w") as f:
+        f.write(f"{comment}\n")
+        f.write(f"{natoms} atoms\n\n")
+        f.write(f"{len(ELEMENTS)} atom types\n\n")
+        f.write(f"0.0 {box['lx']:.8f} xlo xhi\n")
+        f.write(f"0.0 {box['ly']:.8f} ylo yhi\n")
+        f.write(f"0.0 {box['lz']:.8f} zlo zhi\n")
+        if box.get("xy", 0.0):
+            f.write(f"{box['xy']:.8f} 0.0 0.0 xy xz yz\n")
+        f.write("\nMasses\n\n")
+        for i, el in enumerate(ELEMENTS, start=1):
+            f.write(f"{i} {MASSES[el]}  # {el}\n")
+        f.write("\nAtoms # atomic\n\n")
+
+        row = "%d %d %.8f %.8f %.8f\n"
+        for start in range(0, natoms, CHUNK):
+            stop = min(start + CHUNK, natoms)
+            block = np.empty((stop - start, 5), dtype=object)
+            block[:, 0] = np.arange(start + 1, stop + 1)
+            block[:, 1] = types[start:stop]
+            block[:, 2:] = positions[start:stop]
+            f.write((row * (stop - start)) % tuple(block.ravel()))
+
+
+def write_binary(path, positions, types, box):
+    """Compact binary alternative (.npz): float64 positions, int8 types, box."""
+    np.savez(path, positions=positions, types=np.asarray(types, dtype=np.int8),
+             box=np.array([box["lx"], box["ly"], box["lz"], box.get("xy", 0.0)]))
+
+
+def build(phase=None, sequence=None, a=A_HEX, size=(10, 10, 5), layer_spacing=None,
+          composition=(1 / 3, 1 / 3, 1 / 3), seed=12345):
+    """Positions, types and box for one supercell."""
+    sequence = sequence or SEQUENCES[phase]
+    nx, ny, nrepeats = size
+    positions, box = stacking_positions(sequence, a, nx, ny, nrepeats, layer_spacing)
+    types = random_types(len(positions), composition, seed)
+    return positions, types, box
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Generate close-packed Cr–Co–Fe supercells.")
+    p.add_argument("phase", nargs="?", choices=sorted(SEQUENCES), default="dhcp")
+    p.add_argument("--sequence", help="arbitrary A/B/C stacking period (overrides phase)")
+    p.add_argument("--a", type=float, default=A_HEX, help="in-plane NN distance (Å)")
+    p.add_argument("--layer-spacing", type=float, default=None,
+                   help="distance between layers (Å), default ideal a*sqrt(2/3)")
+    p.add_argument("--size", type=int, nargs=3, default=[10, 10, 5],
+                   metavar=("NX", "NY", "NREPEATS"))
+    p.add_argument("--composition", type=float, nargs=3, default=[0.33, 0.33, 0.34],
+                   metavar=("xCr", "xCo", "xFe"))
+    p.add_argument("--seed", type=int, default=12345)
+    p.add_argument("--binary", action="store_true", help="write .npz instead of text")
+    p.add_argument("-o", "--output", default=None)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sequence = (args.sequence or SEQUENCES[args.phase]).upper()
+    positions, types, box = build(sequence=sequence, a=args.a, size=args.size,
+                                  layer_spacing=args.layer_spacing,
+                                  composition=args.composition, seed=args.seed)
+    nx, ny, nrepeats = args.size
+    name = args.sequence or args.phase
+    outname = args.output or f"{name}_{nx}x{ny}x{nrepeats}.{'npz' if args.binary else 'data'}"
+
+    if args.binary:
+        write_binary(outname, positions, types, box)
+    else:
+        comment = (f"{name} supercell ({sequence}) generated: a={args.a:.6f} "
+                   f"nx={nx} ny={ny} repeats={nrepeats}")
+        write_lammps_data(outname, positions, types, box, comment)
+
+    counts = np.bincount(types, minlength=len(ELEMENTS) + 1)[1:]
+    summary = ", ".join(f"{el}={n}" for el, n in zip(ELEMENTS, counts))
+    print(f"Wrote {outname} with {len(positions)} atoms ({summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+surrogate.py
+Fitted surrogate for γ_ISF/ESF/Twin and a_fcc at any (Cr, Co, Fe, T).
+
+Every target is a Bayesian linear model on a Redlich–Kister basis in the
+composition x = (xCr, xCo, xFe), multiplied by powers of the scaled
+temperature τ = (T − T0) / ΔT:
+  φ(x)    = x_i                                         (pure elements)
+            x_i x_j (x_i − x_j)^k,  k = 0..order        (binary i < j)
+            x_Cr x_Co x_Fe                              (ternary)
+  f(x, T) = Σ_d Σ_b w_bd φ_b(x) τ^d,   d = 0..t_degree
+So unlike the ternary interpolation (ternary_grid.py) it also extrapolates
+in T, smoothly (linear in T by default). The weights have a Gaussian prior
+whose precision α and the noise precision β are set by maximizing the
+evidence (MacKay), so a fit needs no tuning. Predictions return the mean and
+the predictive standard deviation sqrt(1/β + φᵀ S φ); a large std (far from
+the training compositions or temperatures) tells the caller to run LAMMPS
+instead.
+
+The whole model is a few small arrays (weights and covariance per target)
+in one .npz; load() takes milliseconds and predict() works in chunks, so
+millions of query points need no more memory than CHUNK rows of φ.
+
+    s = load("surrogate.npz")
+    mean, std = predict(s, comps, T, "γ_ISF(mJ/m²)")    # comps: (n, 3)
+
+Usage
+-----
+python surrogate.py                                   # fit and save
+python surrogate.py --order 2 --t-degree 1 -o surrogate.npz
+python surrogate.py --query 0.4 0.3 0.3 700           # print predictions
+
+Inputs / Output
+---------------
+- All_the_results_compiled/SFE_all.csv, Lattice_all.csv (or Ensemble_all.csv,
+  whose member-averaged γ_<fault>_ANNNI are fitted as the γ_<fault>(mJ/m²)
+  targets)
+- Results/surrogate.npz (a generated file, kept out of the curated data folder)
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import instrument
+from annni import cell_lattice_parameter
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', '..', 'All_the_results_compiled')
+SFE_FILE = os.path.join(DATA_DIR, 'SFE_all.csv')
+LATTICE_FILE = os.path.join(DATA_DIR, 'Lattice_all.csv')
+RESULTS_DIR = os.path.join(BASE_DIR, '..', 'Results')
+MODEL_FILE = os.path.join(RESULTS_DIR, 'surrogate.npz')
+
+TARGETS = ["γ_ISF(mJ/m²)", "γ_ESF(mJ/m²)", "γ_Twin(mJ/m²)", "a_fcc(Å)"]
+ORDER = 2               # highest Redlich–Kister power of the binary terms
+T_DEGREE = 1            # polynomial degree in T
+CHUNK = 1 << 16         # query rows per block in predict()
+MAX_ITER = 200          # evidence iterations
+PAIRS = ((0, 1), (0, 2), (1, 2))
+
+
+# ---- Basis -----------------------------------------------------------------
+def composition_basis(x, order=ORDER):
+    """Redlich–Kister features of compositions x ((n, 3) fractions)."""
+    x = np.asarray(x, dtype=float)
+    cols = [x[:, 0], x[:, 1], x[:, 2]]
+    for i, j in PAIRS:
+        xx, dx = x[:, i] * x[:, j], x[:, i] - x[:, j]
+        cols += [xx * dx ** k for k in range(order + 1)]
+    cols.append(x[:, 0] * x[:, 1] * x[:, 2])
+    return np.column_stack(cols)
+
+
+def design(x, T, basis):
+    """Design matrix: composition features times τ^d for d = 0..t_degree."""
+    phi = composition_basis(x, basis["order"])
+    tau = (np.asarray(T, dtype=float) - basis["T0"]) / basis["T_scale"]
+    return np.hstack([phi * tau[:, None] ** d for d in range(basis["t_degree"] + 1)])
+
+
+# ---- Fit -------------------------------------------------------------------
+def fit_evidence(Phi, y, max_iter=MAX_ITER, tol=1e-8):
+    """
+    Bayesian linear regression with α, β from evidence maximization.
+    y is standardized inside; returns {"m", "S", "alpha", "beta", "y_mean",
+    "y_scale", "gamma"} (γ: number of well-determined parameters).
+    """
+    y_mean, y_scale = float(np.mean(y)), float(np.std(y)) or 1.0
+    t = (np.asarray(y, dtype=float) - y_mean) / y_scale
+    n, p = Phi.shape
+    PtP, Pty = Phi.T @ Phi, Phi.T @ t
+    eig = np.linalg.eigvalsh(PtP)
+    alpha, beta = 1.0, 1.0 / max(np.var(t), 1e-12)
+    for _ in range(max_iter):
+        A = alpha * np.eye(p) + beta * PtP
+        m = beta * np.linalg.solve(A, Pty)
+        lam = beta * eig
+        gamma = float(np.sum(lam / (alpha + lam)))
+        resid = float(np.sum((t - Phi @ m) ** 2))
+        new_alpha = gamma / max(float(m @ m), 1e-300)
+        new_beta = max(n - gamma, 1e-12) / max(resid, 1e-300)
+        done = (abs(new_alpha - alpha) <= tol * alpha and abs(new_beta - beta) <= tol * beta)
+        alpha, beta = new_alpha, new_beta
+        if done:
+            break
+    A = alpha * np.eye(p) + beta * PtP
+    S = np.linalg.inv(A)
+    m = beta * S @ Pty
+    return {"m": m, "S": S, "alpha": alpha, "beta": beta, "y_mean": y_mean,
+            "y_scale": y_scale, "gamma": gamma}
+
+
+def fit(x, T, targets, order=ORDER, t_degree=T_DEGREE):
+    """
+    Surrogate {"basis", "targets": {name: model}} from compositions x
+    ((n, 3)), temperatures T and {name: values}; NaN values are skipped.
+    """
+    T = np.asarray(T, dtype=float)
+    T0 = float(T.mean())
+    basis = {"order": int(order), "t_degree": int(t_degree), "T0": T0,
+             "T_scale": float(np.ptp(T)) or 1.0,
+             "T_range": (float(T.min()), float(T.max()))}
+    Phi = design(x, T, basis)
+    models = {}
+    for name, y in targets.items():
+        y = np.asarray(y, dtype=float)
+        ok = np.isfinite(y)
+        models[name] = fit_evidence(Phi[ok], y[ok])
+        models[name]["n"] = int(ok.sum())
+    return {"basis": basis, "targets": models}
+
+
+# ---- Prediction ------------------------------------------------------------
+def predict(surrogate, x, T, target, chunk=CHUNK):
+    """Mean and predictive standard deviation of `target` at (x, T) arrays."""
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    T = np.broadcast_to(np.asarray(T, dtype=float), (len(x),))
+    model = surrogate["targets"][target]
+    mean = np.empty(len(x))
+    std = np.empty(len(x))
+    for start in range(0, len(x), chunk):
+        sl = slice(start, start + chunk)
+        Phi = design(x[sl], T[sl], surrogate["basis"])
+        mean[sl] = Phi @ model["m"]
+        var = 1.0 / model["beta"] + np.einsum("ij,ij->i", Phi @ model["S"], Phi)
+        std[sl] = np.sqrt(var)
+    return (model["y_mean"] + model["y_scale"] * mean, model["y_scale"] * std)
+
+
+# ---- Storage ---------------------------------------------------------------
+def save(path, surrogate):
+    """One .npz: basis scalars, target names and per-target arrays."""
+    basis = surrogate["basis"]
+    names = list(surrogate["targets"])
+    arrays = {"targets": np.array(names), "order": basis["order"],
+              "t_degree": basis["t_degree"], "T0": basis["T0"],
+              "T_scale": basis["T_scale"], "T_range": np.array(basis["T_range"])}
+    for i, name in enumerate(names):
+        for key, value in surrogate["targets"][name].items():
+            arrays[f"{i}_{key}"] = np.asarray(value)
+    tmp = f"{path[:-4]}.tmp{os.getpid()}.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load(path):
+    """Surrogate saved by save()."""
+    with np.load(path) as z:
+        basis = {"order": int(z["order"]), "t_degree": int(z["t_degree"]),
+                 "T0": float(z["T0"]), "T_scale": float(z["T_scale"]),
+                 "T_range": tuple(float(v) for v in z["T_range"])}
+        targets = {}
+        for i, name in enumerate(z["targets"]):
+            prefix = f"{i}_"
+            model = {k[len(prefix):]: z[k] for k in z.files if k.startswith(prefix)}
+            for key in ("alpha", "beta", "y_mean", "y_scale", "gamma"):
+                model[key] = float(model[key])
+            model["n"] = int(model["n"])
+            targets[str(name)] = model
+    return {"basis": basis, "targets": targets}
+
+
+# ---- Data ------------------------------------------------------------------
+def training_table(sfe_path=SFE_FILE, lattice_path=LATTICE_FILE):
+    """
+    SFE and lattice tables merged on (composition, T), fractions added.
+    Ensemble_all.csv γ_<fault>_ANNNI columns stand in for γ_<fault>(mJ/m²).
+    """
+    df = pd.read_csv(sfe_path)
+    for fault in ("ISF", "ESF", "Twin"):
+        if f"γ_{fault}(mJ/m²)" not in df and f"γ_{fault}_ANNNI" in df:
+            df[f"γ_{fault}(mJ/m²)"] = df[f"γ_{fault}_ANNNI"]
+    if lattice_path and os.path.exists(lattice_path):
+        lat = pd.read_csv(lattice_path)
+        lat = lat[["composition", "T(K)", "a_fcc(Å)"]]
+        df = df.drop(columns=["a_fcc(Å)"], errors="ignore").merge(
+            lat, on=["composition", "T(K)"], how="left")
+    if "a_fcc(Å)" in df:
+        # Older Lattice_all.csv files hold 10×10×10 supercell lengths
+        df["a_fcc(Å)"] = cell_lattice_parameter(df["a_fcc(Å)"].to_numpy())
+    df[["Cr", "Co", "Fe"]] = df["composition"].str.extract(
+        r"Cr([\d\.]+)_Co([\d\.]+)_Fe([\d\.]+)").astype(float)
+    return df
+
+
+# ---- CLI -------------------------------------------------------------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Fit / query the γ and a_fcc surrogate.")
+    p.add_argument("--sfe", default=SFE_FILE, help="SFE_all.csv or Ensemble_all.csv")
+    p.add_argument("--lattice", default=LATTICE_FILE)
+    p.add_argument("--targets", nargs="+", default=TARGETS)
+    p.add_argument("--order", type=int, default=ORDER)
+    p.add_argument("--t-degree", type=int, default=T_DEGREE)
+    p.add_argument("-o", "--output", default=MODEL_FILE)
+    p.add_argument("--query", type=float, nargs=4, metavar=("CR", "CO", "FE", "T"),
+                   help="print the predictions of a saved model at one point")
+    p.add_argument("--report", default=instrument.REPORT_FILE)
+    args = p.parse_args(argv)
+
+    if args.query:
+        s = load(args.output)
+        xCr, xCo, xFe, T = args.query
+        for name in s["targets"]:
+            mean, std = predict(s, [[xCr, xCo, xFe]], [T], name)
+            print(f"{name:>16}: {mean[0]:.6g} ± {std[0]:.2g}")
+        lo, hi = s["basis"]["T_range"]
+        if not lo <= T <= hi:
+            print(f"⚠️ T outside the training range {lo:g}–{hi:g} K (extrapolated)")
+        return 0
+
+    with instrument.stage("surrogate", report=args.report) as rec:
+        df = training_table(args.sfe, args.lattice)
+        targets = {t: df[t].to_numpy() for t in args.targets if t in df}
+        for t in sorted(set(args.targets) - set(targets)):
+            print(f"⚠️ {t} not in the training tables, skipped")
+        x, T = df[["Cr", "Co", "Fe"]].to_numpy(), df["T(K)"].to_numpy()
+        s = fit(x, T, targets, args.order, args.t_degree)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        save(args.output, s)
+        rec.update(rows=len(df), targets=len(targets))
+
+    n_basis = design(x[:1], T[:1], s["basis"]).shape[1]
+    print(f"🧮 {len(df)} points, {n_basis} basis functions per target")
+    for name, y in targets.items():
+        mean, std = predict(s, x, T, name)
+        ok = np.isfinite(y)
+        rmse = np.sqrt(np.mean((mean[ok] - y[ok]) ** 2))
+        m = s["targets"][name]
+        print(f"   {name:>16}: RMSE {rmse:.3g}, mean std {std[ok].mean():.3g}, "
+              f"{m['gamma']:.1f} effective parameters")
+    print(f"✅ Surrogate saved to: {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+"""
+ternary_grid.py
+Shared ternary composition grid with cached barycentric interpolation.
+
+The grid (Cr, Co, Fe fractions at a fixed step) and, for a given set of
+sampled compositions, the Delaunay simplex and barycentric weights of every
+grid point are computed once and cached in memory and on disk (CACHE_DIR,
+Results/.ternary_cache/ unless set_cache_dir() moves it). Interpolating a property is then a single
+gather + weighted sum, so all properties and temperatures that share the
+same compositions reuse one triangulation:
+
+    w = interpolation_weights(points, step=0.02)
+    grid_z = interpolate(w, values)        # values: (n,) or (n, k)
+    x, y = to_cartesian(w["grid"])
+"""
+
+import hashlib
+import os
+
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', 'Results', '.ternary_cache')
+
+_memo = {}
+
+
+def set_cache_dir(path):
+    """On-disk cache folder of this process ('' keeps the weights in memory only)."""
+    global CACHE_DIR
+    CACHE_DIR = path
+
+
+def simplex_grid(step=0.02):
+    """All (Cr, Co, Fe) with fractions on multiples of `step`, Cr-major order."""
+    n = int(round(1.0 / step))
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing="ij")
+    keep = (i + j) <= n
+    i, j = i[keep], j[keep]
+    return np.column_stack([i, j, n - i - j]) / n
+
+
+def to_cartesian(comps):
+    """Ternary (Cr, Co, Fe) → plot (x, y), as used by the ternary contour plots."""
+    comps = np.asarray(comps, dtype=float)
+    x = comps[:, 1] + 0.5 * comps[:, 2]
+    y = np.sqrt(3) / 2 * comps[:, 2]
+    return x, y
+
+
+def _key(points, step):
+    h = hashlib.sha1(np.round(np.asarray(points, dtype=float), 6).tobytes())
+    h.update(f"{step:.6g}".encode())
+    return h.hexdigest()[:16]
+
+
+def _build(points, grid):
+    """Simplex vertices and barycentric weights of every grid point."""
+    tri = Delaunay(np.asarray(points, dtype=float)[:, :2])
+    xy = grid[:, :2]
+    simplex = tri.find_simplex(xy)
+    inside = simplex >= 0
+    s = np.where(inside, simplex, 0)
+
+    T = tri.transform[s]                                  # (G, 3, 2)
+    b = np.einsum("gij,gj->gi", T[:, :2], xy - T[:, 2])   # (G, 2)
+    weights = np.column_stack([b, 1.0 - b.sum(axis=1)])
+    vertices = tri.simplices[s]
+    weights[~inside] = 0.0
+    return vertices.astype(np.int32), weights, inside
+
+
+def interpolation_weights(points, step=0.02, cache_dir=None):
+    """
+    Grid and interpolation weights for compositions `points` ((n, 3) Cr, Co,
+    Fe). Cached per (points, step) in memory and as .npz in cache_dir
+    (default CACHE_DIR, '' for memory only).
+    """
+    key = _key(points, step)
+    if key in _memo:
+        return _memo[key]
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+
+    path = os.path.join(cache_dir, f"grid_{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path) as z:
+            w = {name: z[name] for name in z.files}
+    else:
+        grid = simplex_grid(step)
+        try:
+            vertices, weights, inside = _build(points, grid)
+        except (QhullError, ValueError):
+            # Fewer than 3 points or all collinear: nothing to interpolate
+            vertices = np.zeros((len(grid), 3), dtype=np.int32)
+            weights = np.zeros((len(grid), 3))
+            inside = np.zeros(len(grid), dtype=bool)
+        w = {"grid": grid, "vertices": vertices, "weights": weights, "inside": inside}
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path[:-4]}.tmp{os.getpid()}.npz"
+            np.savez(tmp, **w)
+            os.replace(tmp, path)
+
+    _memo[key] = w
+    return w
+
+
+def interpolate(w, values):
+    """
+    Linear (barycentric) interpolation of values at the sampled points onto
+    the grid; NaN outside the convex hull. `values` may be (n,) or (n, k).
+    """
+    values = np.asarray(values, dtype=float)
+    gathered = values[w["vertices"]]                     # (G, 3[, k])
+    if values.ndim == 1:
+        out = np.einsum("gv,gv->g", w["weights"], gathered)
+    else:
+        out = np.einsum("gv,gvk->gk", w["weights"], gathered)
+    out[~w["inside"]] = np.nan
+    return out
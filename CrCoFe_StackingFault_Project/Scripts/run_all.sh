@@ -6,6 +6,7 @@
 # ------------------------------------------------------------
 #chmod +x run_all.sh
 #./run_all.sh
+# For full sweeps on many cores use Python Scripts/run_sweep.py instead.
 # --- Define compositions (Cr Co Fe) ---
 compositions=(
   "0.50 0.50 0.00"